@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 13:40'
+
+Usage:
+性能测试脚本,不需要启动redis,在项目根目录执行:
+python -m benchmarks.bench_command_routing
+python -m benchmarks.bench_hashing
+python -m benchmarks.bench_memoize_key
+"""
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 13:40'
+
+Usage:
+execute_command 路由开销的性能测试(不访问redis)
+对比 每次调用都分析Redis命令函数参数(旧) 与 查询import时生成的命令表(新) 的耗时
+
+python -m benchmarks.bench_command_routing
+"""
+import time
+import timeit
+from zlib import crc32
+
+from redis import Redis
+
+from distributed_redis_sdk.base_redis import BaseRedis
+from distributed_redis_sdk.utils import COMMAND_TABLE, get_func_name
+
+COMMANDS = [
+    ('GET', 'user:1'),
+    ('SET', 'user:1', b'1'),
+    ('HGETALL', 'user:1:profile'),
+    ('ZADD', 'rank', 1, 'user:1'),
+    ('EXPIRE', 'user:1', 10),
+]
+
+
+def legacy_check(args):
+    """
+    旧的校验方式:每次调用都通过 getattr 和 __code__.co_varnames 分析命令函数
+    :param args:
+    :return:
+    """
+    if len(args) < 2:
+        raise Exception('no key')
+    command_name = args[0]
+    func_name = get_func_name(command_name)
+    command_func = getattr(Redis, func_name)
+    func_params = command_func.__code__.co_varnames
+    allow_command_list = ['touch']
+    if func_params[1] not in ['key', 'keys', 'name', 'names', 'src'] and func_name not in allow_command_list:
+        raise Exception('no key')
+    not_allowed_command_list = ['config_set']
+    if command_name in not_allowed_command_list:
+        raise Exception('not allowed')
+    key = args[1]
+    if not isinstance(key, (int, str)):
+        raise TypeError
+    return key
+
+
+def table_check(args):
+    """
+    新的校验方式:查询命令表
+    :param args:
+    :return:
+    """
+    if len(args) < 2:
+        raise Exception('no key')
+    spec = COMMAND_TABLE.get(args[0])
+    if spec is None or not spec.routable:
+        raise Exception('no key')
+    key = args[1]
+    if not isinstance(key, (int, str)):
+        raise TypeError
+    return key
+
+
+def make_base_redis():
+    """
+    生成加载了本地hash环的BaseRedis对象(3个节点,每个节点160个虚拟节点)
+    :return:
+    """
+    base_redis = BaseRedis()
+    ring = {}
+    for node in range(3):
+        node_url = f'redis://127.0.0.1:{7000 + node}/0'
+        for i in range(160):
+            ring[str(crc32(f'{node_url}#{i}'.encode()))] = node_url
+    base_redis.hash_ring.load(ring)
+    base_redis.hash_ring.expire_at = time.monotonic() + 3600
+    return base_redis
+
+
+def timing(func, number):
+    """
+    执行func并返回每条命令的平均耗时(秒)
+    :param func:
+    :param number:
+    :return:
+    """
+    total = min(timeit.repeat(lambda: [func(args) for args in COMMANDS], number=number // len(COMMANDS), repeat=5))
+    return total / number
+
+
+def bench(name, func, number=200000):
+    """
+    执行并打印每条命令的平均耗时(已减去循环本身的耗时)
+    :param name:
+    :param func:
+    :param number:
+    :return:
+    """
+    cost = timing(func, number) - timing(lambda args: args, number)
+    print(f'{name:<40}{cost * 1e9:>10.0f} ns/command')
+
+
+if __name__ == '__main__':
+    base_redis = make_base_redis()
+    bench('校验命令(旧:每次分析命令函数)', legacy_check)
+    bench('校验命令(新:查询命令表)', table_check)
+    bench('校验命令+定位节点(BaseRedis._plan_command)', base_redis._plan_command)  # pylint:disable=protected-access
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 18:20'
+
+Usage:
+定位节点的hash函数和算法的性能与分布测试(不访问redis)
+对每种 定位算法 x hash函数 的组合,用模拟的key集合统计:
+1.每秒定位key的次数(get_node)
+2.各节点key数量的 最大值/平均值(越接近1.0分布越均匀)
+
+python -m benchmarks.bench_hashing
+python -m benchmarks.bench_hashing --nodes 5 --vnodes 40 --keys 50000
+"""
+import argparse
+import base64
+import hashlib
+import time
+from collections import Counter
+from zlib import crc32
+
+from distributed_redis_sdk.utils import HASHERS, ALGORITHMS, make_consistency_hash
+
+
+def make_ring(nodes, vnodes):
+    """
+    生成与manager端相同格式的hash环:每个真实节点 vnodes 个虚拟节点,虚拟节点的hash值为 crc32(节点url#序号)
+    :param nodes: 真实节点数量
+    :param vnodes: 每个真实节点的虚拟节点数量
+    :return:
+    """
+    ring = {}
+    for node in range(nodes):
+        node_url = f'redis://10.0.0.{node + 1}:6379/0'
+        for i in range(vnodes):
+            ring[str(crc32(f'{node_url}#{i}'.encode()))] = node_url
+    return ring
+
+
+def make_keys(count):
+    """
+    生成模拟的缓存key:memoize/cached 的key(前缀+函数名+base64的md5),以及业务中常见的 前缀+自增id 形式的key
+    :param count:
+    :return:
+    """
+    keys = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            digest = base64.b64encode(hashlib.md5(str(i).encode()).digest())[:16].decode()
+            keys.append(f'BEI:app.views.get_user{digest}')
+        elif kind == 1:
+            keys.append(f'BEI:user:{i}')
+        elif kind == 2:
+            keys.append(f'BEI:order:{i}:items')
+        else:
+            keys.append(f'BEI:view//api/goods/{i}')
+    return keys
+
+
+def bench(name, consistency_hash, keys):
+    """
+    打印每秒定位次数和 节点key数量的最大值/平均值
+    :param name:
+    :param consistency_hash:
+    :param keys:
+    :return:
+    """
+    get_node = consistency_hash.get_node
+    start = time.perf_counter()
+    loads = Counter(get_node(key) for key in keys)
+    cost = time.perf_counter() - start
+    node_count = len(consistency_hash.node_set)
+    skew = max(loads.values()) / (len(keys) / node_count)
+    print(f'{name:<24}{len(keys) / cost:>14,.0f} lookups/s{skew:>12.3f} max/mean')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, default=10, help='真实节点数量')
+    parser.add_argument('--vnodes', type=int, default=160, help='每个真实节点的虚拟节点数量')
+    parser.add_argument('--keys', type=int, default=200000, help='模拟的key数量')
+    args = parser.parse_args()
+
+    ring = make_ring(args.nodes, args.vnodes)
+    keys = make_keys(args.keys)
+    print(f'{args.nodes}个节点,每个节点{args.vnodes}个虚拟节点,{args.keys}个key')
+    for algorithm in ALGORITHMS:
+        for hasher in HASHERS:
+            bench(f'{algorithm}/{hasher}', make_consistency_hash(ring, algorithm, hasher), keys)
+        if algorithm == 'ring':
+            for hasher in HASHERS:
+                bench(f'ring+slots/{hasher}', make_consistency_hash(ring, algorithm, hasher, 65536), keys)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 21:10'
+
+Usage:
+memoize生成缓存key的性能测试(不访问redis,不包含读取版本号)
+对 0个,3个,10个参数 的函数和实例方法,分别统计每秒生成key的次数:
+old:每次调用时分析函数(function_namespace + _memoize_kwargs_to_args)
+compiled:装饰时预先分析函数(compile_function_namespace + compile_kwargs_to_args)
+
+python -m benchmarks.bench_memoize_key
+python -m benchmarks.bench_memoize_key --calls 50000
+"""
+import argparse
+import base64
+import hashlib
+import time
+
+from distributed_redis_sdk.base_redis import BaseRedis
+from distributed_redis_sdk.utils import function_namespace, compile_function_namespace, compile_kwargs_to_args
+
+
+def func_0():
+    pass
+
+
+def func_3(a, b, c=3):
+    pass
+
+
+def func_10(a, b, c, d, e, f=6, g=7, h=8, i=9, j=10):
+    pass
+
+
+class Service:
+    """实例方法"""
+
+    def method_3(self, a, b, c=3):
+        pass
+
+    def __repr__(self):
+        return 'Service'
+
+
+# 测试的函数和调用参数 (名称, 函数, args, kwargs)
+CASES = [
+    ('0 args', func_0, (), {}),
+    ('3 args', func_3, (1, 2), {}),
+    ('3 args+kwargs', func_3, (1,), {'b': 2, 'c': 4}),
+    ('10 args', func_10, tuple(range(10)), {}),
+    ('10 args+kwargs', func_10, (1, 2, 3, 4, 5), {'g': 1, 'j': 2}),
+    ('method 3 args', Service.method_3, (Service(), 1, 2), {}),
+]
+
+
+def build_key(fname, keyargs, keykwargs):
+    """
+    与 _memoize_make_cache_key 中生成key的方式相同(版本号固定为空)
+    """
+    cache_key = hashlib.md5(u"{0}{1}{2}".format(fname, keyargs, keykwargs).encode("utf-8"))
+    return base64.b64encode(cache_key.digest())[:16].decode("utf-8")
+
+
+def make_old(f):
+    def make_key(args, kwargs):
+        fname, _ = function_namespace(f, args=args)
+        keyargs, keykwargs = BaseRedis._memoize_kwargs_to_args(None, f, *args, **kwargs)  # pylint:disable=protected-access
+        return build_key(fname, keyargs, keykwargs)
+
+    return make_key
+
+
+def make_compiled(f):
+    namespace = compile_function_namespace(f)
+    to_args = compile_kwargs_to_args(f)
+
+    def make_key(args, kwargs):
+        fname, _ = namespace(args)
+        keyargs, keykwargs = to_args(args, kwargs)
+        return build_key(fname, keyargs, keykwargs)
+
+    return make_key
+
+
+def bench(make_key, args, kwargs, calls):
+    """
+    :return: 每秒生成key的次数
+    """
+    start = time.perf_counter()
+    for _ in range(calls):
+        make_key(args, kwargs)
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20000, help='每种情况生成key的次数')
+    args = parser.parse_args()
+
+    print(f'{"":<18}{"old keys/s":>14}{"compiled keys/s":>18}{"speedup":>10}')
+    for name, f, f_args, f_kwargs in CASES:
+        old, compiled = make_old(f), make_compiled(f)
+        assert old(f_args, f_kwargs) == compiled(f_args, f_kwargs)
+        old_rate = bench(old, f_args, f_kwargs, args.calls)
+        compiled_rate = bench(compiled, f_args, f_kwargs, args.calls)
+        print(f'{name:<18}{old_rate:>14,.0f}{compiled_rate:>18,.0f}{compiled_rate / old_rate:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -8,20 +8,27 @@ Usage:
 提供根据key获取分布式redis节点 对象的功能
 """
 
+import asyncio
 import base64
 import functools
 import hashlib
 import inspect
+import time
+import weakref
 
 from flask import request, url_for
 from redis import Redis
+from redis.exceptions import RedisError
 
+from .async_sdk import AsyncDistributedRedisSdk, aioredis
 from .base_redis import BaseRedis
-from .exception import InvalidConfigException
+from .exception import InvalidConfigException, CircuitOpenException
 from .log_obj import log
 from .utils import iteritems_wrapper, memoize_make_version_hash, memvname, function_namespace, get_arg_names, get_id, \
     wants_args, get_arg_default, dump_object, load_object, normalize_timeout, try_times, try_times_default, byte2str, \
-    ConsistencyHash, get_redis_obj, get_hash_ring_map, get_func_name
+    ConsistencyHash, get_redis_obj, get_hash_ring_map, get_func_name, merge_config, RetryPolicy, ALGORITHMS, HASHERS, \
+    NearCache, NearCacheSubscriber, near_key, compile_function_namespace, compile_kwargs_to_args, SingleFlight, \
+    Call, Sleep, Flow, run_flow_async, load_entry_object
 from .utils.constant import *
 
 
@@ -47,6 +54,18 @@ class DistributedRedisSdk(BaseRedis):
         self.k_redis_password = k_redis_password
         self.k_redis_db = k_redis_db
         self.default_timeout = k_default_timeout
+        # 异步函数缓存装饰器使用的 异步客户端配置,以及 key:事件循环 val:异步客户端 的dict
+        self._async_config = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        # memoize,cached 缓存未命中时合并并发调用的单飞对象,以及装饰器没有指定时是否开启
+        self.single_flight = SingleFlight()
+        self.single_flight_enabled = False
+        # 跨进程的重新计算锁:装饰器没有指定时是否开启,软过期之后旧数据仍可读取的时间(秒),锁的过期时间(秒),
+        # 以及没有旧数据时等待新数据的最长时间(秒)
+        self.recompute_lock_enabled = False
+        self.stale_ttl = 60
+        self.recompute_lock_timeout = 10
+        self.recompute_wait = 3
 
         # 加载时即配置
         if app is not None:
@@ -61,12 +80,7 @@ class DistributedRedisSdk(BaseRedis):
             raise InvalidConfigException("`config`参数必须是dict的实例或者None")
 
         # 更新所有的配置
-        basic_config = app.config.copy()
-        if self.config:
-            basic_config.update(self.config)
-        if config:
-            basic_config.update(config)
-        config = basic_config
+        config = merge_config(app.config, self.config, config)
 
         # 设置参数
         self.k_redis_host = config.get(k_redis_host)
@@ -77,13 +91,90 @@ class DistributedRedisSdk(BaseRedis):
         if not self.key_prefix or not isinstance(self.key_prefix, str):
             raise Exception('分布式缓存前缀配置DIS_CACHE_PREFIX必须设置,并且不同项目不能重复')
         self.default_timeout = config.get(k_default_timeout) or 300  # 缓存默认过期时间
+        self.hash_ring.refresh_interval = config.get(k_ring_refresh_interval) or 5  # hash环快照刷新间隔
+        self.hash_ring.slots = config.get(k_ring_slots)  # 槽位表的槽位数量
+        # 定位节点的算法和hash函数
+        self.hash_ring.algorithm = config.get(k_ring_algorithm) or 'ring'
+        self.hash_ring.hasher = config.get(k_ring_hasher) or 'crc32'
+        if self.hash_ring.algorithm not in ALGORITHMS:
+            raise InvalidConfigException(f'配置DIS_RING_ALGORITHM只能是 {", ".join(ALGORITHMS)} 之一')
+        if not callable(self.hash_ring.hasher) and self.hash_ring.hasher not in HASHERS:
+            raise InvalidConfigException(f'配置DIS_RING_HASHER只能是 {", ".join(HASHERS)} 之一')
+        # node redis 连接池配置
+        self.node_pool.max_connections = config.get(k_node_max_connections)
+        self.node_pool.pool_timeout = config.get(k_node_pool_timeout)
+        self.node_pool.socket_connect_timeout = config.get(k_node_connect_timeout)
+        self.node_pool.socket_timeout = config.get(k_node_socket_timeout)
+        # 多节点操作并发执行的线程数
+        fan_out_workers = config.get(k_fan_out_workers)
+        self.fan_out_workers = 8 if fan_out_workers is None else fan_out_workers
+        # redis连接错误/超时时的重试策略
+        self.retry_policy = RetryPolicy(
+            max_attempts=config.get(k_retry_max_attempts) or 3,
+            base_delay=config.get(k_retry_base_delay, 0.05),
+            max_delay=config.get(k_retry_max_delay, 1),
+            deadline=config.get(k_retry_deadline, 3),
+        )
+        # 节点熔断器配置
+        self.circuit_breakers.failure_threshold = config.get(k_circuit_failure_threshold, 5)
+        self.circuit_breakers.cooldown = config.get(k_circuit_cooldown, 10)
+        self.circuit_breakers.fail_mode = config.get(k_circuit_fail_mode) or 'raise'
+        self.circuit_breakers.failover = bool(config.get(k_circuit_failover))
+        # 缓存副本配置
+        self.replication_factor = config.get(k_replication_factor) or 1
+        self.replication_prefixes = config.get(k_replication_prefixes) or {}
+        # 对冲读配置
+        self.hedge_percentile = config.get(k_hedge_percentile)
+        self.hedge_min_delay = config.get(k_hedge_min_delay, 0.005)
+        # 只读命令是否分摊到节点的只读副本
+        self.read_from_replicas = config.get(k_read_from_replicas, True)
+        # 有界负载配置
+        self.bounded_load_epsilon = config.get(k_bounded_load_epsilon)
+        self.bounded_load_max_spill = config.get(k_bounded_load_max_spill, 2)
+        self.bounded_load_min_capacity = config.get(k_bounded_load_min_capacity, 100)
+        self.node_loads.window = config.get(k_bounded_load_window) or 1
+        if self.circuit_breakers.fail_mode not in ('raise', 'miss'):
+            raise InvalidConfigException('熔断配置DIS_CIRCUIT_FAIL_MODE只能是 raise 或 miss')
+        # 本地缓存配置
+        if self.near_cache_subscriber is not None:
+            self.near_cache_subscriber.close()
+            self.near_cache_subscriber = None
+        self.near_cache = None
+        self.version_cache = None
+        self.near_cache_channel = None
+        if config.get(k_near_cache_max_entries):
+            self.near_cache = NearCache(
+                config.get(k_near_cache_max_entries), config.get(k_near_cache_max_bytes), config.get(k_near_cache_ttl) or 5
+            )
+        # memoize版本号的本地缓存
+        memoize_version_ttl = config.get(k_memoize_version_ttl)
+        if memoize_version_ttl:
+            self.version_cache = NearCache(10000, ttl=memoize_version_ttl)
+        near_caches = [cache for cache in (self.near_cache, self.version_cache) if cache is not None]
+        if near_caches:
+            self.near_cache_channel = f'{NEAR_CACHE_CHANNEL}:{self.key_prefix}'
+            self.near_cache_subscriber = NearCacheSubscriber(near_caches, self.near_cache_channel, self._redis_from_url)
+        # 单飞配置
+        self.single_flight_enabled = bool(config.get(k_single_flight))
+        self.single_flight.timeout = config.get(k_single_flight_timeout) or 5
+        # 重新计算锁配置
+        self.recompute_lock_enabled = bool(config.get(k_recompute_lock))
+        self.stale_ttl = config.get(k_stale_ttl, 60)
+        self.recompute_lock_timeout = config.get(k_recompute_lock_timeout) or 10
+        self.recompute_wait = config.get(k_recompute_wait, 3)
 
         self.manager_redis_obj = Redis(self.k_redis_host, self.k_redis_port, self.k_redis_db, self.k_redis_password)
 
-        # 检查redis节点集群是否有 节点
-        if not get_hash_ring_map(self.manager_redis_obj):
+        # 拉取hash环快照,并检查redis节点集群是否有 节点
+        if not self.refresh_hash_ring():
             raise Exception('redis节点集群 没有节点,请添加!')
+        if self.near_cache_subscriber is not None:
+            # 订阅所有主节点的本地缓存清除频道,hash环节点变化时同步
+            self._sync_near_cache_nodes()
+            if self._sync_near_cache_nodes not in self.hash_ring.node_listeners:
+                self.hash_ring.node_listeners.append(self._sync_near_cache_nodes)
 
+        self._async_config = config
         self.app = app
 
         # 扩展原始Flask功能
@@ -98,30 +189,321 @@ class DistributedRedisSdk(BaseRedis):
         # 在init_app时，为flask app注册权限中间件
         log.info("成功注册 分布式缓存 中间件")
 
+    def _sync_near_cache_nodes(self, _=None):
+        """
+        订阅所有主节点的本地缓存清除频道(只读副本上的数据通过主节点写入,不需要订阅)
+        :param _: hash环中所有的真实节点(包括只读副本),不使用
+        :return:
+        """
+        if self.near_cache_subscriber is not None:
+            self.near_cache_subscriber.sync_nodes(set(self.hash_ring.hash_map.values()))
+
+    def near_cache_stats(self):
+        """
+        获取本地缓存的统计信息
+        :return: 没有开启本地缓存时返回None;否则为 hits:命中次数 misses:未命中次数 evictions:淘汰次数 entries:条目数量 bytes:总字节数
+        """
+        if self.near_cache is None:
+            return None
+        return self.near_cache.stats()
+
+    def single_flight_stats(self):
+        """
+        获取 memoize,cached 单飞的统计信息
+        :return: leaders:执行被装饰函数的次数 coalesced:被合并(使用其他调用结果)的次数 timeouts:等待超时后自己执行的次数
+                 in_flight:正在执行的调用数量
+        """
+        return self.single_flight.stats()
+
+    def _single_flight_call(self, enabled, cache_key, compute):
+        """
+        缓存未命中时执行被装饰的函数并写入缓存;开启单飞时同一个缓存key并发的调用只执行一次
+        :param enabled: 装饰器的 single_flight 参数,为None时使用配置 DIS_SINGLE_FLIGHT
+        :param cache_key: 添加前缀后的缓存key
+        :param compute: 执行被装饰的函数并写入缓存的函数,没有参数
+        :return: 被装饰函数的返回值
+        """
+        if not (self.single_flight_enabled if enabled is None else enabled):
+            return compute()
+        return self.single_flight.do(cache_key, compute)
+
+    async def _single_flight_call_async(self, enabled, cache_key, compute):
+        """
+        _single_flight_call 的异步版,compute 为没有参数的异步函数
+        """
+        if not (self.single_flight_enabled if enabled is None else enabled):
+            return await compute()
+        return await self.single_flight.do_async(cache_key, compute)
+
+    def _recompute_timeouts(self, timeout, recompute):
+        """
+        获取 memoize,cached 写入缓存时的过期时间和软过期时间
+        :param timeout: 装饰器的缓存时间
+        :param recompute: 是否开启了重新计算锁
+        :return: (timeout, soft_timeout) 开启时redis中的过期时间为 缓存时间 + DIS_STALE_TTL,软过期时间为缓存时间;
+                 没有开启或永久缓存时没有软过期时间
+        """
+        if not recompute:
+            return timeout, None
+        timeout = normalize_timeout(timeout, self.default_timeout)
+        if timeout == -1:
+            return timeout, None
+        return timeout + self.stale_ttl, timeout
+
+    @staticmethod
+    def _recompute_state(rv, soft_expire_at, cache_none):
+        """
+        根据软过期时间判断缓存是否可以直接使用
+        :return: (rv, found, stale) found:未软过期,可以直接返回;stale:已软过期,重新计算期间可以返回的旧数据
+        """
+        exists = rv is not None or cache_none
+        if soft_expire_at is None or soft_expire_at > time.time():
+            return rv, exists, False
+        return rv, False, exists
+
+    def _recompute_entry_flow(self, cache_key, cache_none):
+        """
+        开启重新计算锁时读取 memoize,cached 的缓存(从主节点读取)
+        :param cache_key: 添加前缀后的缓存key
+        :param cache_none: 装饰器的 cache_none 参数
+        :return: (rv, found, stale) 见 _recompute_state
+        """
+        rv, soft_expire_at = yield Call('cache_get_entry', cache_key, bounded=True, primary=True)
+        if rv is None and soft_expire_at is None and cache_none:
+            # 没有软过期时间的数据(关闭重新计算锁时写入),与原来一样检查key是否存在
+            return rv, (yield Call('has', cache_key, bounded=True, primary=True)), False
+        return self._recompute_state(rv, soft_expire_at, cache_none)
+
+    def _recompute_flow(self, cache_key, compute, stale=False, stale_value=None):
+        """
+        缓存未命中或已软过期时,只有获取到重新计算锁的进程执行 compute;
+        没有获取到锁时,有旧数据则返回旧数据,否则轮询(间隔指数增长)等待新数据,等待超过 DIS_RECOMPUTE_WAIT 后自己执行;
+        等待期间获取到锁(持有锁的进程执行失败或已退出)时自己执行
+        :param cache_key: 添加前缀后的缓存key
+        :param compute: 执行被装饰的函数并写入缓存的流程的函数,没有参数
+        :param stale: 是否有已软过期的旧数据
+        :param stale_value: 旧数据
+        :return: 被装饰函数的返回值或旧数据
+        """
+        deadline = time.monotonic() + self.recompute_wait
+        delay = 0.01
+        while True:
+            try:
+                token = yield Call('_recompute_lock_acquire', cache_key)
+            except (RedisError, CircuitOpenException) as e:
+                # 节点不可用时不加锁,直接执行
+                log.warning(f'获取重新计算锁失败,直接执行,key:{cache_key},error:{e!r}')
+                return (yield from compute())
+            if token is not None:
+                try:
+                    return (yield from compute())
+                finally:
+                    yield Call('_recompute_lock_release', cache_key, token)
+            if stale:
+                return stale_value
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return (yield from compute())
+            yield Sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.2)
+            try:
+                # 新写入的数据即使为None也直接使用,不再等待
+                rv, found, stale = yield from self._recompute_entry_flow(cache_key, True)
+            except (RedisError, CircuitOpenException) as e:
+                log.warning(f'读取缓存失败,直接执行,key:{cache_key},error:{e!r}')
+                return (yield from compute())
+            if found:
+                return rv
+            stale_value = rv
+
+    def _compute_flow(self, decorated_function, f, args, kwargs, cache_key, recompute, response_filter, memoized):
+        """
+        执行被装饰的函数并写入缓存
+        :param decorated_function: 装饰后的函数,写入时读取它的 cache_timeout
+        :param f: 被装饰的函数
+        :param args:
+        :param kwargs:
+        :param cache_key: 添加前缀后的缓存key
+        :param recompute: 是否开启了重新计算锁
+        :param response_filter: 见 memoize,cached
+        :param memoized: 是否为memoize
+        :return: 被装饰函数的返回值
+        """
+        rv = yield Call(functools.partial(f, *args, **kwargs))
+
+        if response_filter is None or response_filter(rv):
+            try:
+                cache_timeout, soft_timeout = self._recompute_timeouts(decorated_function.cache_timeout, recompute)
+                yield Call('cache_set', cache_key, rv, cache_timeout, bounded=True, soft_timeout=soft_timeout)
+                if memoized and soft_timeout is not None:
+                    # 延长版本号的过期时间,下次软过期时旧数据的缓存key不变
+                    yield from self._memoize_version_expire_flow(f, args=args, timeout=cache_timeout)
+            except CircuitOpenException:
+                pass
+            except Exception:
+                if self.app.debug:
+                    raise
+                log.exception(
+                    "Exception possibly due to cache backend."
+                )
+        return rv
+
+    def _decorated_flow(
+            self,
+            decorated_function,
+            f,
+            args,
+            kwargs,
+            key_call,
+            forced_update=None,
+            response_filter=None,
+            cache_none=False,
+            single_flight=None,
+            recompute_lock=None,
+            memoized=False,
+    ):
+        """
+        memoize,cached 装饰后的函数的流程,同步函数和异步函数共用(见 utils.flow):
+        生成缓存key并读取缓存,未命中或已软过期时执行被装饰的函数并写入缓存
+        :param decorated_function: 装饰后的函数
+        :param f: 被装饰的函数
+        :param args:
+        :param kwargs:
+        :param key_call: 生成缓存key(未添加前缀)的 Call
+        :param memoized: 是否为memoize,开启重新计算锁时写入缓存后延长版本号的过期时间
+        其他参数见 memoize,cached
+        :return: 被装饰函数的返回值
+        """
+        recompute = self.recompute_lock_enabled if recompute_lock is None else recompute_lock
+        stale = False
+        try:
+            cache_key = self._use_prefix((yield key_call), True)
+            if (callable(forced_update) and
+                    (forced_update(*args, **kwargs) if wants_args(forced_update) else forced_update()) is True):
+                rv = None
+                found = False
+            elif recompute:
+                rv, found, stale = yield from self._recompute_entry_flow(cache_key, cache_none)
+            else:
+                # 同一个key可能由开启了重新计算锁的调用写入(带软过期时间),读取时去掉软过期时间
+                rv = yield Call('cache_get', cache_key, bounded=True, primary=True, soft_expiry=True)
+                found = True
+
+                # If the value returned by cache.get() is None, it
+                # might be because the key is not found in the cache
+                # or because the cached value is actually None
+                if rv is None:
+                    # If we're sure we don't need to cache None values
+                    # (cache_none=False), don't bother checking for
+                    # key existence, as it can lead to false positives
+                    # if a concurrent call already cached the
+                    # key between steps. This would cause us to
+                    # return None when we shouldn't
+                    if not cache_none:
+                        found = False
+                    else:
+                        found = yield Call('has', cache_key, bounded=True, primary=True)
+        except CircuitOpenException:
+            # 节点熔断中,视为缓存未命中,直接执行函数
+            return (yield Call(functools.partial(f, *args, **kwargs)))
+        except Exception:
+            if self.app.debug:
+                raise
+            log.exception("Exception possibly due to cache backend.")
+            return (yield Call(functools.partial(f, *args, **kwargs)))
+
+        if not found:
+            compute = functools.partial(
+                self._compute_flow, decorated_function, f, args, kwargs, cache_key, recompute, response_filter, memoized
+            )
+            if recompute:
+                compute = functools.partial(self._recompute_flow, cache_key, compute, stale, rv)
+            rv = yield Call('_single_flight_call', single_flight, cache_key, Flow(compute))
+        return rv
+
+    def get_async_client(self):
+        """
+        获取当前事件循环对应的异步客户端,异步函数的缓存装饰器通过它读写缓存
+        异步连接池与事件循环绑定,所以每个事件循环各自创建一个
+        :return: 不能使用 redis.asyncio 时返回None
+        """
+        if aioredis is None:
+            return None
+        loop = asyncio.get_event_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = AsyncDistributedRedisSdk(config=self._async_config)
+            # 与同步客户端共用本地缓存,同一进程中只订阅一次清除频道
+            client.near_cache = self.near_cache
+            client.version_cache = self.version_cache
+            self._async_clients[loop] = client
+        return client
+
+    async def _async_call(self, func_name, *args, **kwargs):
+        """
+        在异步函数的缓存装饰器中调用缓存方法,不阻塞事件循环
+        能使用 redis.asyncio 时调用异步客户端的同名方法,否则在线程池中执行同步方法
+        :param func_name: 方法名,如 cache_get,set_many
+        :return:
+        """
+        client = self.get_async_client()
+        if client is not None:
+            return await getattr(client, func_name)(*args, **kwargs)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, functools.partial(getattr(self, func_name), *args, **kwargs))
+
+    def _async_resolve(self, func_name):
+        """
+        异步执行 memoize,cached 的流程时,流程中 Call 的方法名对应的方法:
+        单飞使用异步版,缓存方法通过 _async_call 调用(不阻塞事件循环)
+        :param func_name:
+        :return: 返回awaitable的函数
+        """
+        if func_name == '_single_flight_call':
+            return self._single_flight_call_async
+        return functools.partial(self._async_call, func_name)
+
+    def _run_async(self, flow):
+        """
+        异步执行 memoize,cached 的流程,见 utils.flow
+        :param flow:
+        :return: awaitable
+        """
+        return run_flow_async(flow, self._async_resolve)
+
     # -------通过装饰器 缓存函数 部分 start---------
-    def set_many(self, mapping: dict, timeout=None, use_prefix=False):
+    @try_times_default
+    def set_many(self, mapping: dict, timeout=None, use_prefix=False, timeouts: dict = None, replicas=None):
         """
         设置多个值
+        按节点分组,每个节点的SET/SETEX命令通过一个pipeline发送(多个节点时并发执行)
         :param mapping:
-        :param timeout:
+        :param timeout:值为<=0时,永久缓存;值为None时,缓存设置的过期时间或300s;值为其他>0时,则缓存给定的时间
         :param use_prefix: 默认不在key添加 前缀
-        :return:
-        """
-        if not isinstance(mapping, dict):
-            raise TypeError
-
-        result = None
-        for key, value in iteritems_wrapper(mapping):
-            key = self._use_prefix(key, use_prefix)
-            result = self.cache_set(key, value, timeout)
+        :param timeouts: 每个key单独的过期时间,key:mapping中的key val:过期时间;不在其中的key使用timeout
+        :param replicas:副本数量,大于1时写入每个key的所有副本节点;为None时根据key前缀和配置获取
+        :return: key:mapping中的key val:是否设置成功(有副本时任一副本写入成功即为成功)
 
-        return result
+        Usage:
+        >>>self.set_many({'a': 1, 'b': 2}, 10) # 都缓存10s
+        >>>self.set_many({'a': 1, 'b': 2}, 10, timeouts={'b': 60}) # a缓存10s,b缓存60s
+        """
+        return self._run(self._set_many_flow(mapping, timeout, use_prefix, timeouts, replicas))
 
-    def get_many(self, keys: list, use_prefix=False):
+    @try_times_default
+    def get_many(self, keys: list, use_prefix=False, replicas=None, primary=False):
         """
         获取多条数据
+        按节点分组,每个节点只执行一次MGET(多个节点时并发执行),结果按输入的keys顺序返回
+        有副本的key按副本节点分组,从主节点读取,主节点不可用或超过对冲等待时间未返回时读取其他副本
+        节点有只读副本(HASH_RING_REPLICAS)时,MGET发送到只读副本
+        开启本地缓存(DIS_NEAR_CACHE_MAX_ENTRIES)时,只从redis读取本地缓存未命中的key,读取的结果写入本地缓存(从主节点读取)
+        注意:与 cache_get 相同,带软过期时间的数据(开启重新计算锁的 memoize,cached 写入)返回的是二进制数据,不能使用此方法读取
         :param use_prefix:默认不使用添加key的前缀
         :param keys:
+        :param replicas:副本数量;为None时根据key前缀和配置获取
+        :param primary:是否只从主节点读取(不发送到只读副本);memoize的版本号等需要立即读到其他进程写入的数据时使用
         :return:
 
         Usage:
@@ -129,24 +511,23 @@ class DistributedRedisSdk(BaseRedis):
         >>>self.get_many(['a','b'],True)
 
         """
-        if not isinstance(keys, list):
-            raise TypeError
-        keys = self._use_prefix(keys, use_prefix)
-
-        result_list = []
-        for key in keys:
-            cache_result = self.cache_get(key)
-            result_list.append(cache_result)
-        return result_list
+        return self._run(self._get_many_flow(keys, use_prefix, replicas, primary))
 
     @try_times_default
-    def cache_set(self, name: str or int, value, timeout=None, use_prefix=False):
+    def cache_set(
+            self, name: str or int, value, timeout=None, use_prefix=False, replicas=None, bounded=False, soft_timeout=None
+    ):
         """
         设置缓存,直接存储value的二进制数据(不会转为bytes),timeout值不填写,则过期时间为 设置的过期时间或者300s
         :param name:
         :param value:
         :param timeout:值为<=0时,永久缓存;值为None时,缓存设置的过期时间或300s;值为其他>0时,则缓存给定的时间
         :param use_prefix:是否添加前缀,默认不添加
+        :param replicas:副本数量,大于1时并发写入hash环上顺时针方向的多个不重复节点;为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点(需开启 DIS_BOUNDED_LOAD_EPSILON),key所在的节点过载时写入后继节点;
+                       memoize,cached 使用,读取时需同样设置此参数
+        :param soft_timeout:软过期时间(秒),不为None时与数据一起写入(redis中的过期时间仍为timeout);
+                            需要通过 cache_get_entry 读取,同时获取软过期时间
 
         :return:
 
@@ -157,76 +538,91 @@ class DistributedRedisSdk(BaseRedis):
         >>> self.cache_set(1,'test',-2) # 缓存永久
         >>> self.cache_set(1,'test',10) # 缓存10s
         """
-        if timeout and not isinstance(timeout, int):
-            raise TypeError
-        dump = dump_object(value)
-        name = self._use_prefix(name, use_prefix)
-        cache = self.get_redis_node_obj(name)
-        timeout = normalize_timeout(timeout, self.default_timeout)
-
-        if timeout == -1:
-            result = cache.set(name=name, value=dump)
-        else:
-            result = cache.setex(name=name, time=timeout, value=dump)
-        return result
+        return self._run(self._cache_set_flow(name, value, timeout, use_prefix, replicas, bounded, soft_timeout))
 
     @try_times_default
-    def cache_get(self, key, cache_obj=None, use_prefix=False):
+    def cache_get(
+            self, key, cache_obj=None, use_prefix=False, replicas=None, bounded=False, primary=False, soft_expiry=False
+    ):
         """
         获取缓存的二进制数据,并还原为原来的对象
+        开启本地缓存(DIS_NEAR_CACHE_MAX_ENTRIES)时,只有1个副本并且不使用有界负载的key先读取本地缓存
+        注意:cache_set 传入 soft_timeout 写入的数据(开启重新计算锁的 memoize,cached)前带有软过期时间,
+        不传 soft_expiry 时返回的是带软过期时间的二进制数据,需要使用 cache_get_entry 或 soft_expiry=True 读取
         :param key:
-        :param cache_obj:缓存对象,不传此值时,则 通过key 生成缓存对象
+        :param cache_obj:缓存对象,不传此值时,则 通过key 定位节点(经过节点的熔断器)
         :param use_prefix:默认不使用添加key的前缀
+        :param replicas:副本数量,大于1时从主节点读取,主节点不可用时依次读取其他副本;为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点,依次读取候选节点直到找到数据
+        :param primary:是否只从主节点读取(不发送到只读副本);memoize,cached 使用,本地缓存未命中时总是从主节点读取
+        :param soft_expiry:是否去掉数据前的软过期时间(忽略软过期时间);memoize,cached 关闭重新计算锁时使用,
+                           同一个key可能由开启了重新计算锁的进程写入
         :return:
         """
+        if cache_obj is None:
+            return self._run(self._cache_get_flow(key, use_prefix, replicas, bounded, primary, soft_expiry))
         key = self._use_prefix(key, use_prefix)
         cache_obj = self._cache_obj(key, cache_obj)
-        return load_object(cache_obj.get(key))
+        return (load_entry_object if soft_expiry else load_object)(cache_obj.get(key))
+
+    @try_times_default
+    def cache_get_entry(self, key, use_prefix=False, replicas=None, bounded=False, primary=False):
+        """
+        获取缓存的对象,以及 cache_set 写入的软过期时间;本地缓存中没有软过期时间,所以直接读取redis
+        :param key:
+        :param use_prefix:默认不使用添加key的前缀
+        :param replicas:副本数量,为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点
+        :param primary:是否只从主节点读取(不发送到只读副本)
+        :return: (对象, 软过期时间戳) 没有数据时对象为None,没有数据或写入时没有软过期时间时软过期时间戳为None
+        """
+        return self._run(self._cache_get_entry_flow(key, use_prefix, replicas, bounded, primary))
 
-    def cache_delete(self, key, use_prefix=False):
+    def cache_delete(self, key, use_prefix=False, replicas=None, bounded=False):
         """
         删除数据
         :param key:
         :param use_prefix:是否添加前缀,默认不添加
+        :param replicas:副本数量,大于1时删除所有副本;为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点,删除所有候选节点上的数据
         :return:
         """
-        key = self._use_prefix(key, use_prefix)
-        cache = self.get_redis_node_obj(key)
-        return cache.delete(key)
+        return self._run(self._cache_delete_flow(key, use_prefix, replicas, bounded))
 
     @try_times_default
-    def has(self, key, cache_obj=None, use_prefix=False):
+    def has(self, key, cache_obj=None, use_prefix=False, replicas=None, bounded=False, primary=False):
         """
         判断是否存在此key
         :param key: 已经添加过 key_prefix前缀的 key
         :param cache_obj:
         :param use_prefix:是否添加前缀,默认不添加
+        :param replicas:副本数量,大于1时主节点不可用则依次判断其他副本;为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点,依次判断候选节点
+        :param primary:是否只从主节点读取(不发送到只读副本)
         :return:
         """
+        if cache_obj is None:
+            return self._run(self._has_flow(key, use_prefix, replicas, bounded, primary))
         key = self._use_prefix(key, use_prefix)
         cache_obj = self._cache_obj(key, cache_obj)
         return cache_obj.exists(key)
 
+    @try_times_default
     def delete_many(self, keys: list, use_prefix=False):
         """
         删除多条数据
+        按节点分组,每个节点通过一个pipeline发送多key的UNLINK命令(redis 4.0以下版本使用DEL),多个节点时并发执行;
+        key有多个副本时删除所有副本节点上的数据
         :param use_prefix:默认不使用添加key的前缀
         :param keys:
-        :return:
+        :return: 删除的key的总数
 
         Usage:
         >>>self.delete_many(['a','b']) # 默认 use_prefix=False
         >>>self.delete_many(['a','b'],Ture)
 
         """
-        result = None
-        if not isinstance(keys, list):
-            raise TypeError
-        keys = self._use_prefix(keys, use_prefix)
-
-        for key in keys:
-            result = self.cache_delete(key)
-        return result
+        return self._run(self._delete_many_flow(keys, use_prefix))
 
     def clear(self, use_prefix=False):
         """
@@ -247,6 +643,7 @@ class DistributedRedisSdk(BaseRedis):
 
             if keys:
                 status = cache.delete(*keys)
+        self._near_clear()
         return status
 
     def cached(
@@ -259,6 +656,8 @@ class DistributedRedisSdk(BaseRedis):
             query_string=False,
             hash_method=hashlib.md5,
             cache_none=False,
+            single_flight=None,
+            recompute_lock=None,
     ):
         """Decorator. Use this to cache a function. By default the cache key
         is `view/request.path`. You are able to use this decorator with any
@@ -345,67 +744,44 @@ class DistributedRedisSdk(BaseRedis):
                            check when cache.get returns None. This will likely
                            lead to wrongly returned None values in concurrent
                            situations and is not recommended to use.
+        :param single_flight: Default None. 缓存未命中时是否开启进程内的单飞:同一个缓存key并发的调用
+                              只有一个执行被装饰的函数,其他调用等待并使用它的结果(包括抛出的异常),
+                              等待超过 DIS_SINGLE_FLIGHT_TIMEOUT 后自己执行;为None时使用配置 DIS_SINGLE_FLIGHT
+        :param recompute_lock: Default None. 是否开启跨进程的重新计算锁:缓存写入软过期时间(redis中多保留 DIS_STALE_TTL),
+                               未命中或软过期时只有在数据所在节点上获取到锁(SET NX PX)的进程执行被装饰的函数,
+                               其他进程返回旧数据,没有旧数据时等待新数据;为None时使用配置 DIS_RECOMPUTE_LOCK
 
         """
 
+        options = dict(forced_update=forced_update, response_filter=response_filter, cache_none=cache_none,
+                       single_flight=single_flight, recompute_lock=recompute_lock)
+
         def decorator(f):
+            def key_call(args, kwargs):
+                if query_string:
+                    return Call(_make_cache_key_query_string)
+                return Call(_make_cache_key, args, kwargs, use_request=True)
+
             @functools.wraps(f)
             def decorated_function(*args, **kwargs):
                 #: Bypass the cache entirely.
                 if self._bypass_cache(unless, f, *args, **kwargs):
                     return f(*args, **kwargs)
+                return self._run(
+                    self._decorated_flow(decorated_function, f, args, kwargs, key_call(args, kwargs), **options)
+                )
 
-                try:
-                    if query_string:
-                        cache_key = _make_cache_key_query_string()
-                    else:
-                        cache_key = _make_cache_key(
-                            args, kwargs, use_request=True
-                        )
-                    cache_key = self._use_prefix(cache_key, True)
-                    cache = self.get_redis_node_obj(cache_key)
-                    if (callable(forced_update) and
-                            (forced_update(*args, **kwargs) if wants_args(forced_update) else forced_update())
-                            is True):
-                        rv = None
-                        found = False
-                    else:
-                        rv = self.cache_get(cache_key, cache)
-                        found = True
-
-                        # If the value returned by cache.get() is None, it
-                        # might be because the key is not found in the cache
-                        # or because the cached value is actually None
-                        if rv is None:
-                            # If we're sure we don't need to cache None values
-                            # (cache_none=False), don't bother checking for
-                            # key existence, as it can lead to false positives
-                            # if a concurrent call already cached the
-                            # key between steps. This would cause us to
-                            # return None when we shouldn't
-                            if not cache_none:
-                                found = False
-                            else:
-                                found = self.has(cache_key, cache)
-                except Exception:
-                    if self.app.debug:
-                        raise
-                    log.exception("Exception possibly due to cache backend.")
-                    return f(*args, **kwargs)
+            @functools.wraps(f)
+            async def async_decorated_function(*args, **kwargs):
+                """异步函数的缓存,缓存key与同步函数相同,读写缓存不阻塞事件循环"""
+                if self._bypass_cache(unless, f, *args, **kwargs):
+                    return await f(*args, **kwargs)
+                return await self._run_async(
+                    self._decorated_flow(async_decorated_function, f, args, kwargs, key_call(args, kwargs), **options)
+                )
 
-                if not found:
-                    rv = f(*args, **kwargs)
-
-                    if response_filter is None or response_filter(rv):
-                        try:
-                            self.cache_set(cache_key, rv, decorated_function.cache_timeout)
-                        except Exception:
-                            if self.app.debug:
-                                raise
-                            log.exception(
-                                "Exception possibly due to cache backend."
-                            )
-                return rv
+            if inspect.iscoroutinefunction(f):
+                decorated_function = async_decorated_function
 
             def make_cache_key(*args, **kwargs):
                 # Convert non-keyword arguments (which is the way
@@ -464,35 +840,64 @@ class DistributedRedisSdk(BaseRedis):
 
         return decorator
 
-    def _memoize_version(
-            self,
-            f,
-            args=None,
-            kwargs=None,
-            reset=False,
-            delete=False,
-            timeout=None,
-            forced_update=False,
-    ):
-        """Updates the hash version associated with a memoized function or
-        method.
+    def _memoize_version_keys(self, f, args=None, namespace=None):
+        """
+        获取函数(以及实例方法所属实例)版本号的缓存key
+        :param namespace: compile_function_namespace(f) 的返回值,不传时每次调用重新分析函数
+        :return: (fname, instance_fname, fetch_keys)
         """
-        fname, instance_fname = function_namespace(f, args=args)
+        fname, instance_fname = namespace(args) if namespace else function_namespace(f, args=args)
         version_key = memvname(fname)
         fetch_keys = [version_key]
 
         if instance_fname:
             instance_version_key = memvname(instance_fname)
             fetch_keys.append(instance_version_key)
+        return fname, instance_fname, fetch_keys
 
-        # Only delete the per-instance version key or per-function version
-        # key but not both.
-        if delete:
-            key = fetch_keys[-1]
-            self.cache_delete(key)
-            return fname, None
+    def _memoize_version_local(self, fetch_keys):
+        """
+        从本地缓存获取版本号
+        :param fetch_keys: 版本号的key list(未添加前缀)
+        :return: (version_data_list, miss_keys, token) 未命中的版本号为None;token见 NearCache.token
+        """
+        if self.version_cache is None:
+            return [None] * len(fetch_keys), list(fetch_keys), None
+        token = self.version_cache.token()
+        version_data_list = []
+        for key in fetch_keys:
+            _, version_data = self.version_cache.get(near_key(self._use_prefix(key, True)))
+            version_data_list.append(version_data)
+        miss_keys = [key for key, version_data in zip(fetch_keys, version_data_list) if version_data is None]
+        return version_data_list, miss_keys, token
+
+    def _memoize_version_store(self, versions: dict, token=None):
+        """
+        把版本号写入本地缓存
+        :param versions: key:版本号的key(未添加前缀) val:版本号,为None时不写入
+        :param token: 从redis读取前 NearCache.token() 的返回值,读取期间有清除操作时不写入
+        :return:
+        """
+        if self.version_cache is None:
+            return
+        for key, version_data in versions.items():
+            if version_data is not None:
+                self.version_cache.set(near_key(self._use_prefix(key, True)), version_data, len(version_data), token=token)
 
-        version_data_list = list(self.get_many(fetch_keys, True))
+    def _memoize_version_update(
+            self,
+            fetch_keys,
+            version_data_list,
+            instance_fname,
+            args=None,
+            kwargs=None,
+            reset=False,
+            forced_update=False,
+    ):
+        """
+        根据从缓存中获取的版本号,生成缺失或需要重置的版本号;同步和异步的版本号更新共用此逻辑
+        :return: (fetch_keys, version_data_list, dirty) dirty为True时需要把版本号写回缓存
+        """
         dirty = False
 
         if (callable(forced_update) and
@@ -515,33 +920,109 @@ class DistributedRedisSdk(BaseRedis):
             version_data_list = [memoize_make_version_hash()]
             dirty = True
 
+        return fetch_keys, version_data_list, dirty
+
+    def _memoize_version(
+            self,
+            f,
+            args=None,
+            kwargs=None,
+            reset=False,
+            delete=False,
+            timeout=None,
+            forced_update=False,
+            namespace=None,
+    ):
+        """Updates the hash version associated with a memoized function or
+        method.
+        namespace见 _memoize_version_keys
+        """
+        return self._run(self._memoize_version_flow(f, args, kwargs, reset, delete, timeout, forced_update, namespace))
+
+    def _memoize_version_flow(
+            self,
+            f,
+            args=None,
+            kwargs=None,
+            reset=False,
+            delete=False,
+            timeout=None,
+            forced_update=False,
+            namespace=None,
+    ):
+        """
+        _memoize_version 的流程,同步版和异步版的版本号的key和值相同(见 utils.flow)
+        """
+        fname, instance_fname, fetch_keys = self._memoize_version_keys(f, args=args, namespace=namespace)
+
+        # Only delete the per-instance version key or per-function version
+        # key but not both.
+        if delete:
+            key = fetch_keys[-1]
+            yield Call('cache_delete', key, True)
+            return fname, None
+
+        # 先读取本地缓存的版本号,只有未命中的版本号才访问redis
+        version_data_list, miss_keys, token = self._memoize_version_local(fetch_keys)
+        if miss_keys:
+            # 从主节点读取,只读副本复制延迟时读不到版本号会生成新的版本号,缓存一直无法命中
+            miss_versions = dict(zip(miss_keys, (yield Call('get_many', miss_keys, True, primary=True))))
+            self._memoize_version_store(miss_versions, token)
+            version_data_list = [miss_versions.get(key, data) for key, data in zip(fetch_keys, version_data_list)]
+        fetch_keys, version_data_list, dirty = self._memoize_version_update(
+            fetch_keys, version_data_list, instance_fname, args, kwargs, reset, forced_update
+        )
+
         if dirty:
-            self.set_many(dict(zip(fetch_keys, version_data_list)), timeout=timeout, use_prefix=True)
+            versions = dict(zip(fetch_keys, version_data_list))
+            # set_many 清除本地缓存的版本号并广播清除消息,其他进程重新读取新的版本号
+            yield Call('set_many', versions, timeout=timeout, use_prefix=True)
+            self._memoize_version_store(versions)
 
         return fname, "".join(version_data_list)
 
+    def _memoize_version_expire_flow(self, f, args=None, timeout=None):
+        """
+        延长函数(以及实例方法所属实例)版本号的过期时间;只执行EXPIRE,不修改版本号,也不清除本地缓存的版本号
+        :param f:
+        :param args:
+        :param timeout: 新的过期时间(秒)
+        :return:
+        """
+        _, _, fetch_keys = self._memoize_version_keys(f, args=args)
+        for key in self._use_prefix(fetch_keys, True):
+            # 不经过 execute_command,EXPIRE 不会广播本地缓存清除消息
+            yield Call('_route_command', False, 'EXPIRE', key, timeout)
+
     def _memoize_make_cache_key(
             self,
             make_name=None,
             timeout=None,
             forced_update=False,
             hash_method=hashlib.md5,
+            is_async=False,
+            f=None,
+            recompute_lock=None,
     ):
-        """Function used to create the cache_key for memoized functions."""
-
-        def make_cache_key(f, *args, **kwargs):
-            _timeout = getattr(timeout, "cache_timeout", timeout)
-            fname, version_data = self._memoize_version(
-                f, args=args, timeout=_timeout, forced_update=forced_update
-            )
+        """Function used to create the cache_key for memoized functions.
+        is_async为True时返回异步的生成函数,生成的key与同步版相同
+        f为被装饰的函数时,在装饰时分析一次函数签名和命名空间,生成key时不再重复分析;生成的key与不传f时相同
+        开启重新计算锁(recompute_lock)时,版本号与缓存一样多保留 DIS_STALE_TTL,软过期的旧数据仍使用原来的key
+        """
+        # 预先编译的 命名空间 和 参数转换 函数,只用于被装饰的函数f
+        namespace = compile_function_namespace(f) if callable(f) else None
+        to_args = compile_kwargs_to_args(f) if callable(f) else None
 
+        def build_cache_key(f_, fname, version_data, args, kwargs):
             #: this should have to be after version_data, so that it
             #: does not break the delete_memoized functionality.
             altfname = make_name(fname) if callable(make_name) else fname
 
-            if callable(f):
+            if f_ is f and to_args is not None:
+                keyargs, keykwargs = to_args(args, kwargs)
+            elif callable(f_):
                 keyargs, keykwargs = self._memoize_kwargs_to_args(
-                    f, *args, **kwargs
+                    f_, *args, **kwargs
                 )
             else:
                 keyargs, keykwargs = args, kwargs
@@ -556,7 +1037,25 @@ class DistributedRedisSdk(BaseRedis):
 
             return cache_key
 
-        return make_cache_key
+        def version_timeout():
+            _timeout = getattr(timeout, "cache_timeout", timeout)
+            recompute = self.recompute_lock_enabled if recompute_lock is None else recompute_lock
+            return self._recompute_timeouts(_timeout, recompute)[0]
+
+        def make_cache_key_flow(f_, *args, **kwargs):
+            fname, version_data = yield from self._memoize_version_flow(
+                f_, args=args, timeout=version_timeout(), forced_update=forced_update,
+                namespace=namespace if f_ is f else None,
+            )
+            return build_cache_key(f_, fname, version_data, args, kwargs)
+
+        def make_cache_key(f_, *args, **kwargs):
+            return self._run(make_cache_key_flow(f_, *args, **kwargs))
+
+        async def make_cache_key_async(f_, *args, **kwargs):
+            return await self._run_async(make_cache_key_flow(f_, *args, **kwargs))
+
+        return make_cache_key_async if is_async else make_cache_key
 
     def memoize(
             self,
@@ -567,6 +1066,8 @@ class DistributedRedisSdk(BaseRedis):
             response_filter=None,
             hash_method=hashlib.md5,
             cache_none=False,
+            single_flight=None,
+            recompute_lock=None,
     ):
         """Use this to cache the result of a function, taking its arguments
         into account in the cache key.
@@ -634,66 +1135,51 @@ class DistributedRedisSdk(BaseRedis):
                            check when cache.get returns None. This will likely
                            lead to wrongly returned None values in concurrent
                            situations and is not recommended to use.
+        :param single_flight: Default None. 缓存未命中时是否开启进程内的单飞:同一个缓存key并发的调用
+                              只有一个执行被装饰的函数,其他调用等待并使用它的结果(包括抛出的异常),
+                              等待超过 DIS_SINGLE_FLIGHT_TIMEOUT 后自己执行;为None时使用配置 DIS_SINGLE_FLIGHT
+        :param recompute_lock: Default None. 是否开启跨进程的重新计算锁:缓存写入软过期时间(redis中多保留 DIS_STALE_TTL),
+                               未命中或软过期时只有在数据所在节点上获取到锁(SET NX PX)的进程执行被装饰的函数,
+                               其他进程返回旧数据,没有旧数据时等待新数据;为None时使用配置 DIS_RECOMPUTE_LOCK
 
         .. versionadded:: 0.5
             params ``make_name``, ``unless``
         """
 
+        options = dict(forced_update=forced_update, response_filter=response_filter, cache_none=cache_none,
+                       single_flight=single_flight, recompute_lock=recompute_lock, memoized=True)
+
         def memoize(f):
             @functools.wraps(f)
             def decorated_function(*args, **kwargs):
                 #: bypass cache
                 if self._bypass_cache(unless, f, *args, **kwargs):
                     return f(*args, **kwargs)
+                key_call = Call(functools.partial(decorated_function.make_cache_key, f, *args, **kwargs))
+                return self._run(self._decorated_flow(decorated_function, f, args, kwargs, key_call, **options))
 
-                try:
-                    cache_key = decorated_function.make_cache_key(
-                        f, *args, **kwargs
-                    )
-                    cache_key = self._use_prefix(cache_key, True)
-                    # 根据缓存key获取redis节点对象
-                    cache = self.get_redis_node_obj(cache_key)
-                    if (callable(forced_update) and
-                            (forced_update(*args, **kwargs) if wants_args(forced_update) else forced_update()) is True):
-                        rv = None
-                        found = False
-                    else:
-                        rv = self.cache_get(cache_key, cache)
-                        found = True
-
-                        # If the value returned by cache.get() is None, it
-                        # might be because the key is not found in the cache
-                        # or because the cached value is actually None
-                        if rv is None:
-                            # If we're sure we don't need to cache None values
-                            # (cache_none=False), don't bother checking for
-                            # key existence, as it can lead to false positives
-                            # if a concurrent call already cached the
-                            # key between steps. This would cause us to
-                            # return None when we shouldn't
-                            if not cache_none:
-                                found = False
-                            else:
-                                found = self.has(cache_key, cache)
-                except Exception:
-                    if self.app.debug:
-                        raise
-                    log.exception("Exception possibly due to cache backend.")
-                    return f(*args, **kwargs)
+            @functools.wraps(f)
+            async def async_decorated_function(*args, **kwargs):
+                """异步函数的缓存,缓存key与同步函数相同,读写缓存不阻塞事件循环"""
+                if self._bypass_cache(unless, f, *args, **kwargs):
+                    return await f(*args, **kwargs)
+                key_call = Call(functools.partial(async_decorated_function.make_cache_key_async, f, *args, **kwargs))
+                return await self._run_async(
+                    self._decorated_flow(async_decorated_function, f, args, kwargs, key_call, **options)
+                )
 
-                if not found:
-                    rv = f(*args, **kwargs)
-
-                    if response_filter is None or response_filter(rv):
-                        try:
-                            self.cache_set(cache_key, rv, decorated_function.cache_timeout)
-                        except Exception:
-                            if self.app.debug:
-                                raise
-                            log.exception(
-                                "Exception possibly due to cache backend."
-                            )
-                return rv
+            if inspect.iscoroutinefunction(f):
+                decorated_function = async_decorated_function
+                # 异步函数的缓存key生成函数;同步的 make_cache_key 仍然保留,供 delete_memoized 等同步方法使用
+                decorated_function.make_cache_key_async = self._memoize_make_cache_key(
+                    make_name=make_name,
+                    timeout=decorated_function,
+                    forced_update=forced_update,
+                    hash_method=hash_method,
+                    is_async=True,
+                    f=f,
+                    recompute_lock=recompute_lock,
+                )
 
             decorated_function.uncached = f
             decorated_function.cache_timeout = timeout
@@ -702,6 +1188,8 @@ class DistributedRedisSdk(BaseRedis):
                 timeout=decorated_function,
                 forced_update=forced_update,
                 hash_method=hash_method,
+                f=f,
+                recompute_lock=recompute_lock,
             )
             decorated_function.delete_memoized = lambda: self.delete_memoized(f)
 
@@ -825,7 +1313,7 @@ class DistributedRedisSdk(BaseRedis):
             return self._memoize_version(f, reset=True)
         else:
             cache_key = f.make_cache_key(f.uncached, *args, **kwargs)
-            return self.cache_delete(cache_key, True)
+            return self.cache_delete(cache_key, True, bounded=True)
 
     def delete_memoized_verhash(self, f, *args):  # pylint:disable=unused-argument
         """Delete the version hash associated with the function.
@@ -0,0 +1,511 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 14:30'
+
+Usage:
+asyncio版的分布式redis客户端,定位节点的规则与 DistributedRedisSdk 相同
+使用 redis 包自带的 redis.asyncio(redis>=4.2)
+"""
+import asyncio
+import functools
+import itertools
+
+from .base_redis import RedisFlowMixin
+from .exception import InvalidConfigException, CircuitOpenException
+from .log_obj import log
+from .utils import HashRingSnapshot, merge_config, byte2str, CircuitBreakerRegistry, LatencyTracker, NodeLoadTracker, \
+    ALGORITHMS, HASHERS, format_read_replicas, RetryPolicy, try_times_default, run_flow_async
+from .utils.constant import *
+
+try:
+    from redis import asyncio as aioredis
+except Exception:  # pylint:disable=broad-except
+    # 导入失败(如redis版本低于4.2)时不影响同步客户端的使用
+    aioredis = None
+
+# 不能使用 redis.asyncio 时,AsyncDistributedRedisSdk 实例化时报错
+AsyncRedis = aioredis.Redis if aioredis else object
+
+
+class AsyncNodePoolRegistry(object):
+    """
+    asyncio版 node redis 连接池注册表类
+    注意:连接池与事件循环绑定,只能在同一个事件循环中使用
+    """
+
+    def __init__(self, max_connections=None, socket_connect_timeout=None, socket_timeout=None, pool_timeout=None):
+        """
+
+        :param max_connections: 每个节点连接池的最大连接数,不设置时不限制;设置后连接用完时等待 pool_timeout 秒
+        :param socket_connect_timeout: 建立连接的超时时间(秒)
+        :param socket_timeout: 读写的超时时间(秒)
+        :param pool_timeout: 连接池满时等待空闲连接的超时时间(秒)
+        """
+        self.max_connections = max_connections
+        self.socket_connect_timeout = socket_connect_timeout
+        self.socket_timeout = socket_timeout
+        self.pool_timeout = pool_timeout
+        self._clients = {}
+
+    def _create_pool(self, node_url: str):
+        """
+        创建节点的连接池
+        :param node_url:
+        :return:
+        """
+        kwargs = {
+            'socket_connect_timeout': self.socket_connect_timeout,
+            'socket_timeout': self.socket_timeout,
+        }
+        if self.max_connections:
+            return aioredis.BlockingConnectionPool.from_url(
+                node_url, max_connections=self.max_connections, timeout=self.pool_timeout, **kwargs
+            )
+        return aioredis.ConnectionPool.from_url(node_url, **kwargs)
+
+    def get_client(self, node_url: str):
+        """
+        获取节点的异步redis对象,不存在时创建
+        :param node_url:
+        :return:
+        """
+        client = self._clients.get(node_url)
+        if client is None:
+            client = aioredis.Redis(connection_pool=self._create_pool(node_url))
+            self._clients[node_url] = client
+        return client
+
+    def sync_nodes(self, node_urls):
+        """
+        hash环节点变化时调用,关闭已经移除节点的连接池
+        :param node_urls: 当前hash环中所有的真实节点
+        :return:
+        """
+        for node_url in set(self._clients) - set(node_urls):
+            asyncio.ensure_future(self._clients.pop(node_url).connection_pool.disconnect())
+            log.info(f'节点已从hash环移除,关闭连接池,node_url:{node_url}')
+
+    async def disconnect(self):
+        """
+        关闭所有节点的连接池
+        :return:
+        """
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.connection_pool.disconnect()
+
+
+class AsyncDistributedRedisSdk(RedisFlowMixin, AsyncRedis):
+    """
+    asyncio版的分布式redis客户端类
+    与 DistributedRedisSdk 一样通过继承异步Redis类,对execute_command()方法进行二次修改;
+    与同步版共用 RedisFlowMixin 的流程,IO通过 await 执行,多个节点的操作通过 asyncio.gather 并发执行
+
+    Usage:
+    >>> redis = AsyncDistributedRedisSdk(app)  # app为 Flask/Quart 等带有config的对象
+    >>> redis = AsyncDistributedRedisSdk(config={'DIS_MANAGER_REDIS_HOST': '127.0.0.1', ...})
+    >>> await redis.set('test', 1)
+    >>> await redis.get('test')
+    >>> await redis.get_many(['a', 'b'])
+    """
+
+    def __init__(self, app=None, config=None):
+        """
+        对象初始化
+        :param app:
+        :param config:
+        """
+        if aioredis is None:
+            raise ImportError('AsyncDistributedRedisSdk 需要 redis>=4.2 提供的 redis.asyncio')
+        super(AsyncDistributedRedisSdk, self).__init__()
+        if not (config is None or isinstance(config, dict)):
+            raise InvalidConfigException("`config`参数必须是dict的实例或者None")
+
+        # 存储配置
+        self.config = config
+        self.key_prefix = k_prefix
+        self.default_timeout = k_default_timeout
+        self.manager_redis_obj = None
+        self.app = None
+        # 本地缓存的hash环快照,请求路径上不访问 manager redis
+        self.hash_ring = HashRingSnapshot()
+        # 每个节点一个长期复用的连接池,hash环增删节点时关闭已移除节点的连接池
+        self.node_pool = AsyncNodePoolRegistry()
+        self.hash_ring.node_listeners.append(self.node_pool.sync_nodes)
+        # 每个节点一个熔断器,节点连续失败后快速失败
+        self.circuit_breakers = CircuitBreakerRegistry()
+        self.hash_ring.node_listeners.append(self.circuit_breakers.sync_nodes)
+        # 缓存的默认副本数量,以及 key:key前缀 val:副本数量 的dict
+        self.replication_factor = 1
+        self.replication_prefixes = {}
+        # 节点延迟统计,以及对冲读的等待时间(延迟的百分位,为None时不对冲)和等待时间下限(秒)
+        self.latency_tracker = LatencyTracker()
+        self.hash_ring.node_listeners.append(self.latency_tracker.sync_nodes)
+        self.hedge_percentile = None
+        self.hedge_min_delay = 0.005
+        # 有界负载:节点最近的请求次数,允许超过平均负载的比例(为None时不开启),以及最多溢出到之后的几个节点
+        self.node_loads = NodeLoadTracker()
+        self.hash_ring.node_listeners.append(self.node_loads.sync_nodes)
+        self.bounded_load_epsilon = None
+        self.bounded_load_max_spill = 2
+        self.bounded_load_min_capacity = 100
+        # 是否把只读命令分摊到节点的只读副本,以及轮流选择副本用的计数器
+        self.read_from_replicas = True
+        self._read_counter = itertools.count()
+        # 本地缓存和memoize版本号的本地缓存,通过 DistributedRedisSdk.get_async_client() 获取时与同步客户端共用
+        # (同步客户端负责订阅清除频道);以及广播清除消息的频道名,开启了本地缓存时写入/删除key后广播
+        self.near_cache = None
+        self.version_cache = None
+        self.near_cache_channel = None
+        # memoize,cached 重新计算锁的过期时间(秒)
+        self.recompute_lock_timeout = 10
+        # try_times_default 装饰的方法使用的重试策略;redis.asyncio 抛出的异常类与同步版相同
+        self.retry_policy = RetryPolicy()
+        self._ring_lock = None
+
+        # 加载时即配置
+        if app is not None or config is not None:
+            self.init_app(app, config)
+
+    def init_app(self, app=None, config=None):
+        """ 懒加载实现,app可以是任何带有config属性的对象(如Flask,Quart),也可以不传只使用config """
+
+        if not (config is None or isinstance(config, dict)):
+            raise InvalidConfigException("`config`参数必须是dict的实例或者None")
+
+        # 更新所有的配置
+        config = merge_config(getattr(app, 'config', None) or {}, self.config, config)
+
+        # 设置参数
+        self.key_prefix = config.get(k_prefix)
+        if not self.key_prefix or not isinstance(self.key_prefix, str):
+            raise Exception('分布式缓存前缀配置DIS_CACHE_PREFIX必须设置,并且不同项目不能重复')
+        self.default_timeout = config.get(k_default_timeout) or 300  # 缓存默认过期时间
+        self.hash_ring.refresh_interval = config.get(k_ring_refresh_interval) or 5  # hash环快照刷新间隔
+        self.hash_ring.slots = config.get(k_ring_slots)  # 槽位表的槽位数量
+        # 定位节点的算法和hash函数
+        self.hash_ring.algorithm = config.get(k_ring_algorithm) or 'ring'
+        self.hash_ring.hasher = config.get(k_ring_hasher) or 'crc32'
+        if self.hash_ring.algorithm not in ALGORITHMS:
+            raise InvalidConfigException(f'配置DIS_RING_ALGORITHM只能是 {", ".join(ALGORITHMS)} 之一')
+        if not callable(self.hash_ring.hasher) and self.hash_ring.hasher not in HASHERS:
+            raise InvalidConfigException(f'配置DIS_RING_HASHER只能是 {", ".join(HASHERS)} 之一')
+        # node redis 连接池配置
+        self.node_pool.max_connections = config.get(k_node_max_connections)
+        self.node_pool.pool_timeout = config.get(k_node_pool_timeout)
+        self.node_pool.socket_connect_timeout = config.get(k_node_connect_timeout)
+        self.node_pool.socket_timeout = config.get(k_node_socket_timeout)
+        # redis连接错误/超时时的重试策略,与同步版相同
+        self.retry_policy = RetryPolicy(
+            max_attempts=config.get(k_retry_max_attempts) or 3,
+            base_delay=config.get(k_retry_base_delay, 0.05),
+            max_delay=config.get(k_retry_max_delay, 1),
+            deadline=config.get(k_retry_deadline, 3),
+        )
+        # 节点熔断器配置
+        self.circuit_breakers.failure_threshold = config.get(k_circuit_failure_threshold, 5)
+        self.circuit_breakers.cooldown = config.get(k_circuit_cooldown, 10)
+        self.circuit_breakers.fail_mode = config.get(k_circuit_fail_mode) or 'raise'
+        self.circuit_breakers.failover = bool(config.get(k_circuit_failover))
+        # 缓存副本配置
+        self.replication_factor = config.get(k_replication_factor) or 1
+        self.replication_prefixes = config.get(k_replication_prefixes) or {}
+        # 对冲读配置
+        self.hedge_percentile = config.get(k_hedge_percentile)
+        self.hedge_min_delay = config.get(k_hedge_min_delay, 0.005)
+        # 只读命令是否分摊到节点的只读副本
+        self.read_from_replicas = config.get(k_read_from_replicas, True)
+        # 有界负载配置
+        self.bounded_load_epsilon = config.get(k_bounded_load_epsilon)
+        self.bounded_load_max_spill = config.get(k_bounded_load_max_spill, 2)
+        self.bounded_load_min_capacity = config.get(k_bounded_load_min_capacity, 100)
+        self.node_loads.window = config.get(k_bounded_load_window) or 1
+        if self.circuit_breakers.fail_mode not in ('raise', 'miss'):
+            raise InvalidConfigException('熔断配置DIS_CIRCUIT_FAIL_MODE只能是 raise 或 miss')
+        # 其他进程开启了本地缓存时,写入/删除key后需要广播清除消息
+        near_cache_enabled = config.get(k_near_cache_max_entries) or config.get(k_memoize_version_ttl)
+        self.near_cache_channel = f'{NEAR_CACHE_CHANNEL}:{self.key_prefix}' if near_cache_enabled else None
+        self.recompute_lock_timeout = config.get(k_recompute_lock_timeout) or 10
+
+        self.manager_redis_obj = aioredis.Redis(
+            host=config.get(k_redis_host), port=config.get(k_redis_port), db=config.get(k_redis_db),
+            password=config.get(k_redis_password)
+        )
+
+        if app is not None:
+            self.app = app
+            if hasattr(app, 'extensions'):
+                app.extensions["async_distributed_redis_sdk"] = self
+
+    async def refresh_hash_ring(self, force=True):
+        """
+        从 manager redis 拉取hash环
+        :param force: 是否忽略版本号,强制重新拉取
+        :return:
+        """
+        version = await self.manager_redis_obj.get(HASH_RING_VERSION)
+        if version is not None:
+            version = byte2str(version)
+        if self.hash_ring.should_load(version, force):
+            _dict = await self.manager_redis_obj.hgetall(HASH_RING_MAP)
+            read_replicas = format_read_replicas(await self.manager_redis_obj.hgetall(HASH_RING_REPLICAS))
+            self.hash_ring.load({byte2str(k): byte2str(v) for k, v in _dict.items()}, version, read_replicas)
+        self.hash_ring.delay()
+        return self.hash_ring.hash_map
+
+    async def get_hash_ring(self):
+        """
+        获取本地快照中的一致性hash对象,快照到期时才会访问 manager redis
+        :return:
+        """
+        hash_ring = self.hash_ring
+        if not hash_ring.is_expired():
+            return hash_ring.consistency_hash
+
+        if self._ring_lock is None:
+            self._ring_lock = asyncio.Lock()
+        # 已有快照时,其他协程正在刷新则直接使用旧快照
+        if hash_ring.hash_map and self._ring_lock.locked():
+            return hash_ring.consistency_hash
+
+        async with self._ring_lock:
+            if hash_ring.is_expired():
+                try:
+                    await self.refresh_hash_ring(force=False)
+                except Exception:
+                    if not hash_ring.hash_map:
+                        raise
+                    # manager redis 不可用时继续使用旧快照,等下个周期再刷新
+                    log.exception('刷新hash环快照失败,继续使用旧快照')
+                    hash_ring.delay()
+
+        if not hash_ring.hash_map:
+            raise Exception('redis节点集群 没有节点,请添加!')
+        return hash_ring.consistency_hash
+
+    def _run(self, flow):
+        """
+        异步执行流程,流程中 Call 的方法名为本对象的同名方法,见 utils.flow
+        :param flow:
+        :return: awaitable
+        """
+        return run_flow_async(flow, functools.partial(getattr, self))
+
+    def _redis_from_url(self, node_url: str):
+        """
+        通过url获取节点的异步redis对象(同一节点复用同一个连接池)
+        :param node_url:
+        :return:
+        """
+        return self.node_pool.get_client(node_url)
+
+    def _execute_on_node(self, node_url, *args, **options):
+        """
+        在节点上执行命令
+        :param node_url:
+        :param args:
+        :param options:
+        :return: awaitable
+        """
+        return self.node_pool.get_client(node_url).execute_command(*args, **options)
+
+    async def get_redis_node_obj(self, key: str or int, use_prefix=False):
+        """
+        通过key获取对应 节点的异步redis obj
+        注意:此处获取的redis对象是直接从redis包导入的,可以进行任何操作,不会对 execute_command进行修改
+        :param key:
+        :param use_prefix:默认不使用添加key的前缀
+        :return:
+        """
+        return await self._run(self._node_obj_flow(key, use_prefix))
+
+    @classmethod
+    async def _fan_out(cls, func, groups: dict):
+        """
+        对每个节点执行 await func(node_url, node_args),多个节点时通过 asyncio.gather 并发执行
+        :param func: 返回 awaitable 的函数
+        :param groups: key:节点url val:传给func的参数
+        :return: key:节点url val:func的返回值
+        """
+        node_urls = list(groups)
+        results = await asyncio.gather(*(func(node_url, groups[node_url]) for node_url in node_urls))
+        return dict(zip(node_urls, results))
+
+    @try_times_default
+    async def execute_command(self, *args, **options):
+        """
+        Execute a command and return a parsed response
+        与 DistributedRedisSdk.execute_command 相同:通过key定位节点,多key命令按节点拆分后并发执行,再合并结果
+        :param args:
+        :param options:
+        :return:
+        """
+        return await self._run(self._execute_command_flow(*args, **options))
+
+    async def _hedged_call(self, node_urls: list, func):
+        """
+        对冲读,与 BaseRedis._hedged_call 相同,请求通过 asyncio task 并发执行,返回先成功的结果后取消其他请求
+        :param node_urls: 可以执行此读操作的节点list,第一个为主节点
+        :param func: 读操作,参数为节点url,返回awaitable
+        :return:
+        """
+        errors = (aioredis.ConnectionError, aioredis.TimeoutError, CircuitOpenException)
+        error = None
+        if not self.hedge_percentile or len(node_urls) < 2:
+            for node_url in node_urls:
+                try:
+                    return await func(node_url)
+                except errors as e:
+                    error = e
+            raise error
+
+        candidates = iter(node_urls)
+        primary = next(candidates)
+        pending = {asyncio.ensure_future(func(primary)): primary}
+        delay = self.latency_tracker.hedge_delay(primary, self.hedge_percentile, self.hedge_min_delay)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(list(pending), timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 超过等待时间仍未返回,在下一个节点上发出对冲请求,之后不再限时
+                    delay = None
+                    node_url = next(candidates, None)
+                    if node_url is not None:
+                        self.latency_tracker.hedged += 1
+                        pending[asyncio.ensure_future(func(node_url))] = node_url
+                    continue
+                for task in done:
+                    node_url = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except errors as e:
+                        # 节点不可用,立即尝试下一个节点
+                        error = e
+                        next_url = next(candidates, None)
+                        if next_url is not None:
+                            pending[asyncio.ensure_future(func(next_url))] = next_url
+                        continue
+                    if node_url != primary:
+                        self.latency_tracker.hedge_wins += 1
+                    return result
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @try_times_default
+    async def cache_set(
+            self, name: str or int, value, timeout=None, use_prefix=False, replicas=None, bounded=False, soft_timeout=None
+    ):
+        """
+        设置缓存,与 DistributedRedisSdk.cache_set 相同
+        :param name:
+        :param value:
+        :param timeout:值为<=0时,永久缓存;值为None时,缓存设置的过期时间或300s;值为其他>0时,则缓存给定的时间
+        :param use_prefix:是否添加前缀,默认不添加
+        :param replicas:副本数量,为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点
+        :param soft_timeout:软过期时间(秒),不为None时与数据一起写入
+        :return:
+        """
+        return await self._run(self._cache_set_flow(name, value, timeout, use_prefix, replicas, bounded, soft_timeout))
+
+    @try_times_default
+    async def cache_get(self, key, use_prefix=False, replicas=None, bounded=False, primary=False, soft_expiry=False):
+        """
+        获取缓存的二进制数据,并还原为原来的对象;带软过期时间的数据见 DistributedRedisSdk.cache_get
+        :param key:
+        :param use_prefix:默认不使用添加key的前缀
+        :param replicas:副本数量,为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点
+        :param primary:是否只从主节点读取
+        :param soft_expiry:是否去掉数据前的软过期时间
+        :return:
+        """
+        return await self._run(self._cache_get_flow(key, use_prefix, replicas, bounded, primary, soft_expiry))
+
+    @try_times_default
+    async def cache_get_entry(self, key, use_prefix=False, replicas=None, bounded=False, primary=False):
+        """
+        获取缓存的对象和软过期时间,与 DistributedRedisSdk.cache_get_entry 相同
+        :param key:
+        :param use_prefix:默认不使用添加key的前缀
+        :param replicas:副本数量,为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点
+        :param primary:是否只从主节点读取
+        :return: (对象, 软过期时间戳)
+        """
+        return await self._run(self._cache_get_entry_flow(key, use_prefix, replicas, bounded, primary))
+
+    async def cache_delete(self, key, use_prefix=False, replicas=None, bounded=False):
+        """
+        删除数据
+        :param key:
+        :param use_prefix:是否添加前缀,默认不添加
+        :param replicas:副本数量,为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点
+        :return:
+        """
+        return await self._run(self._cache_delete_flow(key, use_prefix, replicas, bounded))
+
+    @try_times_default
+    async def has(self, key, use_prefix=False, replicas=None, bounded=False, primary=False):
+        """
+        判断是否存在此key
+        :param key:
+        :param use_prefix:是否添加前缀,默认不添加
+        :param replicas:副本数量,为None时根据key前缀和配置获取
+        :param bounded:是否使用有界负载定位节点
+        :param primary:是否只从主节点读取
+        :return:
+        """
+        return await self._run(self._has_flow(key, use_prefix, replicas, bounded, primary))
+
+    @try_times_default
+    async def get_many(self, keys: list, use_prefix=False, replicas=None, primary=False):
+        """
+        获取多条数据,与 DistributedRedisSdk.get_many 相同,每个节点一次MGET,多个节点并发执行
+        :param use_prefix:默认不使用添加key的前缀
+        :param keys:
+        :param replicas:副本数量;为None时根据key前缀和配置获取
+        :param primary:是否只从主节点读取;开启本地缓存时总是从主节点读取
+        :return:
+        """
+        return await self._run(self._get_many_flow(keys, use_prefix, replicas, primary))
+
+    @try_times_default
+    async def set_many(self, mapping: dict, timeout=None, use_prefix=False, timeouts: dict = None, replicas=None):
+        """
+        设置多个值,与 DistributedRedisSdk.set_many 相同,每个节点一个pipeline,多个节点并发执行
+        :param mapping:
+        :param timeout:值为<=0时,永久缓存;值为None时,缓存设置的过期时间或300s;值为其他>0时,则缓存给定的时间
+        :param use_prefix: 默认不在key添加 前缀
+        :param timeouts: 每个key单独的过期时间,key:mapping中的key val:过期时间;不在其中的key使用timeout
+        :param replicas:副本数量,大于1时写入每个key的所有副本节点;为None时根据key前缀和配置获取
+        :return: key:mapping中的key val:是否设置成功(有副本时任一副本写入成功即为成功)
+        """
+        return await self._run(self._set_many_flow(mapping, timeout, use_prefix, timeouts, replicas))
+
+    @try_times_default
+    async def delete_many(self, keys: list, use_prefix=False):
+        """
+        删除多条数据,与 DistributedRedisSdk.delete_many 相同,每个节点一个pipeline发送UNLINK,多个节点并发执行;
+        key有多个副本时删除所有副本节点上的数据
+        :param use_prefix:默认不使用添加key的前缀
+        :param keys:
+        :return: 删除的key的总数
+        """
+        return await self._run(self._delete_many_flow(keys, use_prefix))
+
+    async def close(self, close_connection_pool=None):
+        """
+        关闭所有节点及 manager redis 的连接池
+        :param close_connection_pool:
+        :return:
+        """
+        await self.node_pool.disconnect()
+        if self.manager_redis_obj is not None:
+            await self.manager_redis_obj.close()
+        await super(AsyncDistributedRedisSdk, self).close(close_connection_pool)
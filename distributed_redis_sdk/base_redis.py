@@ -7,30 +7,38 @@ create time '2020/7/23 15:44'
 Usage:
 
 """
+import functools
 import inspect
+import itertools
+import json
+import threading
+import time
+import uuid
 from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-import redis
-from redis import ConnectionPool
 from redis import Redis
+from redis.exceptions import ConnectionError, TimeoutError, RedisError, ResponseError  # pylint:disable=redefined-builtin
 
+from .exception import CircuitOpenException
 from .log_obj import log
-from .utils import get_arg_names, get_id, get_arg_default, try_times_default, k_prefix, get_hash_ring_map, get_func_name, \
-    ConsistencyHash
+from .pipeline import DistributedPipeline
+from .utils import get_arg_names, get_id, get_arg_default, try_times_default, k_prefix, \
+    HashRingSnapshot, NodePoolRegistry, RetryPolicy, CircuitBreakerRegistry, FailoverConsistencyHash, \
+    LatencyTracker, NodeLoadTracker, plan_command, miss_result, is_readonly, command_keys, near_key, load_object, \
+    CLEAR_ALL, memvname, dump_object, normalize_timeout, load_entry, load_entry_object, Call, Flow, run_flow, \
+    RECOMPUTE_LOCK_SUFFIX, RECOMPUTE_UNLOCK_SCRIPT
 
 
-class BaseRedis(Redis):
+class RedisFlowMixin(object):
     """
-    redis基类
-    1.对 execute_command进行二次开发
-    2.扩充些 供 子类或内部使用的 方法
+    同步客户端(BaseRedis)和异步客户端(AsyncDistributedRedisSdk)共用的方法
+    1.不涉及IO的方法:定位节点,副本,有界负载,本地缓存,合并多节点的结果等
+    2.需要IO的控制流程(_*_flow):生成器函数,IO通过 yield Call 交给执行者,见 utils.flow
+    子类提供IO的实现:get_hash_ring,_redis_from_url,_execute_on_node,_fan_out,_hedged_call,
+    以及执行流程的 _run(同步客户端返回流程的结果,异步客户端返回awaitable)
     """
 
-    def __init__(self, ):
-        super(BaseRedis, self).__init__()
-        self.key_prefix = k_prefix
-        self.manager_redis_obj = None
-
     def _use_prefix(self, key: list or str or int, use_prefix):
         """
         是否使用前缀,使用则添加
@@ -46,23 +54,1075 @@ class BaseRedis(Redis):
                 key = self.key_prefix + str(key)
         return key
 
+    def _route_hash(self, consistency_hash):
+        """
+        获取定位节点用的一致性hash对象
+        开启故障转移并且有节点熔断时,熔断节点上的key定位到环上顺时针方向的下一个可用节点
+        :param consistency_hash:
+        :return:
+        """
+        breakers = self.circuit_breakers
+        if breakers.failover and breakers.has_unavailable():
+            return FailoverConsistencyHash(consistency_hash, breakers.is_available)
+        return consistency_hash
+
+    def _get_replicas(self, key, replicas=None):
+        """
+        获取key的副本数量;优先使用参数,其次是按前缀设置的副本数量(最长匹配),最后是默认副本数量
+        :param key: 添加前缀后的key
+        :param replicas:
+        :return:
+        """
+        if replicas is None:
+            replicas = self.replication_factor
+            matched = ''
+            for prefix, prefix_replicas in self.replication_prefixes.items():
+                if len(prefix) > len(matched) and str(key).startswith(prefix):
+                    matched, replicas = prefix, prefix_replicas
+        return max(replicas or 1, 1)
+
+    def _get_replica_nodes(self, consistency_hash, key, replicas=None):
+        """
+        获取key的副本所在的节点list,第一个为主节点
+        :param consistency_hash:
+        :param key: 添加前缀后的key
+        :param replicas: 副本数量,为None时根据key前缀和配置获取
+        :return:
+        """
+        consistency_hash = self._route_hash(consistency_hash)
+        replicas = self._get_replicas(key, replicas)
+        if replicas == 1:
+            return [consistency_hash.get_node(key)]
+        return consistency_hash.get_nodes(key, replicas)
+
+    def _locate_replicas(self, consistency_hash, keys: list, replicas=None):
+        """
+        批量定位key的副本所在的节点,按副本节点分组
+        :param consistency_hash:
+        :param keys: 添加前缀后的key list
+        :param replicas: 副本数量,为None时根据key前缀和配置获取
+        :return: 所有key都只有1个副本时返回None;否则 key:副本所在节点的tuple(第一个为主节点) val:key list
+        """
+        if replicas is None and self.replication_factor <= 1 and not self.replication_prefixes:
+            return None
+        if replicas is not None and replicas <= 1:
+            return None
+        groups = {}
+        for key in keys:
+            node_urls = tuple(self._get_replica_nodes(consistency_hash, key, replicas))
+            groups.setdefault(node_urls, []).append(key)
+        if all(len(node_urls) == 1 for node_urls in groups):
+            return None
+        return groups
+
     @classmethod
-    def _redis_from_url(cls, node_url: str):
+    def _expand_replicas(cls, replica_groups: dict):
+        """
+        把按副本节点分组的key 展开为 每个节点上需要写入的key
+        :param replica_groups: 见 _locate_replicas
+        :return: key:节点url val:key list
+        """
+        groups = {}
+        for node_urls, keys in replica_groups.items():
+            for node_url in node_urls:
+                groups.setdefault(node_url, []).extend(keys)
+        return groups
+
+    def _replica_write_result(self, node_results: dict):
+        """
+        合并写入多个副本的结果;部分副本写入失败只记录日志,全部失败时抛出异常
+        :param node_results: key:节点url val:执行结果或异常对象
+        :return: 写入成功的副本中第一个结果
+        """
+        errors = {node_url: result for node_url, result in node_results.items() if isinstance(result, Exception)}
+        if len(errors) == len(node_results):
+            error = next(iter(errors.values()))
+            if isinstance(error, CircuitOpenException):
+                return self._circuit_miss(error, None)
+            raise error
+        for node_url, error in errors.items():
+            log.warning(f'写入副本失败,node_url:{node_url},error:{error!r}')
+        return next(result for result in node_results.values() if not isinstance(result, Exception))
+
+    def _plan_read(self, consistency_hash, keys: list, replicas=None):
+        """
+        获取 get_many 在各节点上读取的key;有副本的key按副本节点分组
+        :param consistency_hash:
+        :param keys: 添加前缀后的key list
+        :param replicas: 副本数量,为None时根据key前缀和配置获取
+        :return: key:节点url(有副本时为副本节点的tuple) val:key list
+        """
+        return self._locate_replicas(consistency_hash, keys, replicas) or \
+            self._route_hash(consistency_hash).locate_many(keys)
+
+    def _plan_write(self, consistency_hash, keys: list, replicas=None):
+        """
+        获取 set_many,delete_many 在各节点上写入/删除的key;key有多个副本时包括所有副本节点
+        :param consistency_hash:
+        :param keys: 添加前缀后的key list
+        :param replicas: 副本数量,为None时根据key前缀和配置获取
+        :return: (groups, replicated) groups: key:节点url val:key list; replicated:是否有key有多个副本
+        """
+        replica_groups = self._locate_replicas(consistency_hash, keys, replicas)
+        if replica_groups is None:
+            return self._route_hash(consistency_hash).locate_many(keys), False
+        return self._expand_replicas(replica_groups), True
+
+    def _near_lookup(self, keys: list):
+        """
+        get_many 先读取本地缓存
+        :param keys: 添加前缀后的key list
+        :return: (token, near_values, miss_keys) token:读取前 near_cache.token() 的返回值,没有开启本地缓存时为None;
+                 near_values: key:本地缓存命中的key val:还原后的对象; miss_keys:需要从redis读取的key list(去重)
+        """
+        near_cache = self.near_cache
+        token = None
+        near_values = {}
+        if near_cache is not None:
+            token = near_cache.token()
+            for key in keys:
+                found, value = near_cache.get(near_key(key))
+                if found:
+                    near_values[key] = value
+        return token, near_values, list(dict.fromkeys(key for key in keys if key not in near_values))
+
+    def _merge_get_many(self, keys: list, groups: dict, node_values: dict, near_values: dict, token, pttls: dict):
+        """
+        合并 get_many 各节点的结果,开启本地缓存时写入本地缓存
+        :param keys: 添加前缀后的key list
+        :param groups: 见 _plan_read
+        :param node_values: key:节点url val:MGET的结果
+        :param near_values: 见 _near_lookup
+        :param token: 见 _near_lookup
+        :param pttls: key:从redis读取的key val:剩余过期时间(毫秒)
+        :return: 按keys顺序的还原后的对象list
+        """
+        values = {}
+        for node_url, node_keys in groups.items():
+            values.update(zip(node_keys, node_values[node_url]))
+        if self.near_cache is None:
+            return [load_object(values[key]) for key in keys]
+        near_values.update(self._near_fill(token, values, pttls))
+        return [near_values[key] for key in keys]
+
+    def _set_pipeline(self, pipe, node_names: list, names: dict, mapping: dict, timeout, timeouts: dict):
+        """
+        在pipeline中添加 set_many 在节点上的SET/SETEX命令,同步和异步的pipeline共用
+        :param pipe:
+        :param node_names: 节点上需要写入的key(添加前缀后)list
+        :param names: key:添加前缀后的key val:mapping中的key
+        :param mapping: 见 set_many
+        :param timeout: 见 set_many
+        :param timeouts: 见 set_many
+        :return:
+        """
+        for name in node_names:
+            key = names[name]
+            dump = dump_object(mapping[key])
+            _timeout = normalize_timeout(timeouts.get(key, timeout), self.default_timeout)
+            if _timeout == -1:
+                pipe.set(name, dump)
+            else:
+                pipe.setex(name, _timeout, dump)
+        return pipe
+
+    @classmethod
+    def _merge_set(cls, names: dict, groups: dict, node_results: dict):
+        """
+        合并 set_many 各节点的结果
+        :param names: key:添加前缀后的key val:mapping中的key
+        :param groups: 见 _plan_write
+        :param node_results: key:节点url val:pipeline的结果list
+        :return: key:mapping中的key val:是否设置成功(有副本时任一副本写入成功即为成功)
+        """
+        result = {}
+        for node_url, node_names in groups.items():
+            for name, node_result in zip(node_names, node_results[node_url]):
+                result[names[name]] = result.get(names[name]) or node_result is True
+        return result
+
+    @classmethod
+    def _delete_chunks(cls, node_keys: list, replicated):
+        """
+        把节点上需要删除的key拆分为多条命令的参数
+        :param node_keys:
+        :param replicated: 有副本时每条命令只删除一个key,以便按key合并各副本的结果
+        :return: 每条命令删除的key list
+        """
+        # 每条命令最多携带的key数量,避免单条命令过大
+        chunk_size = 1 if replicated else 1000
+        return [node_keys[i:i + chunk_size] for i in range(0, len(node_keys), chunk_size)]
+
+    @classmethod
+    def _merge_delete(cls, groups: dict, node_results: dict, replicated):
+        """
+        合并 delete_many 各节点的结果
+        :param groups: 见 _plan_write
+        :param node_results: key:节点url val:每条命令删除的数量list
+        :param replicated:
+        :return: 删除的key的数量;有副本时任一副本删除成功即计为删除
+        """
+        if not replicated:
+            return sum(sum(results) for results in node_results.values())
+        deleted = set()
+        for node_url, node_keys in groups.items():
+            deleted.update(key for key, count in zip(node_keys, node_results[node_url]) if count)
+        return len(deleted)
+
+    def _read_nodes(self, node_url: str):
+        """
+        获取执行只读命令的节点顺序:节点有只读副本时轮流从某个副本开始,依次为其他副本,最后为主节点
+        :param node_url: 主节点url
+        :return:
+        """
+        read_replicas = self.hash_ring.read_replicas
+        if not self.read_from_replicas or not read_replicas:
+            return [node_url]
+        urls = read_replicas.get(node_url)
+        if not urls:
+            return [node_url]
+        start = next(self._read_counter) % len(urls)
+        return urls[start:] + urls[:start] + [node_url]
+
+    def _is_bounded(self, key, bounded, replicas=None):
+        """
+        key是否使用有界负载定位节点;开启了有界负载,调用方要求(memoize,cached),并且key只有1个副本
+        :param key: 添加前缀后的key
+        :param bounded:
+        :param replicas:
+        :return:
+        """
+        return bool(bounded) and self.bounded_load_epsilon is not None and self._get_replicas(key, replicas) == 1
+
+    def _bounded_nodes(self, consistency_hash, key):
+        """
+        获取key有界负载的候选节点,第一个为未过载的节点
+        :param consistency_hash:
+        :param key: 添加前缀后的key
+        :return:
+        """
+        return self._route_hash(consistency_hash).get_bounded_nodes(
+            key, self.node_loads.loads(), self.bounded_load_epsilon, self.bounded_load_max_spill,
+            self.bounded_load_min_capacity
+        )
+
+    def _near_fill(self, token, raw_values: dict, pttls: dict, loader=load_object):
+        """
+        把从redis读取的数据还原为对象,并写入本地缓存;本地过期时间不超过redis中的剩余过期时间
+        :param token: 读取redis前 near_cache.token() 的返回值
+        :param raw_values: key:添加前缀后的key val:redis中的二进制数据
+        :param pttls: key:添加前缀后的key val:PTTL的结果(毫秒),不在其中的key不写入本地缓存
+        :param loader: 把二进制数据还原为对象的函数
+        :return: key:添加前缀后的key val:还原后的对象
+        """
+        values = {}
+        for key, raw in raw_values.items():
+            value = values[key] = loader(raw)
+            pttl = pttls.get(key)
+            if raw is None or pttl is None or pttl == -2:
+                continue
+            self.near_cache.set(near_key(key), value, len(raw), None if pttl < 0 else pttl / 1000, token)
+        return values
+
+    def _near_keys(self, keys: list):
+        """
+        获取写入/删除后需要清除本地缓存的key;只开启了memoize版本号的本地缓存时,只有版本号的key
+        :param keys: 添加前缀后的key list
+        :return: 没有开启本地缓存时返回空list
+        """
+        if self.near_cache is not None:
+            return [near_key(key) for key in keys]
+        if self.near_cache_channel is not None:
+            return [key for key in map(near_key, keys) if key.endswith(memvname(''))]
+        return []
+
+    def _circuit_miss(self, error: CircuitOpenException, miss_value):
+        """
+        处理熔断中的调用;fail_mode 为 miss 时返回 miss_value(视为缓存未命中),否则抛出异常
+        :param error:
+        :param miss_value:
+        :return:
+        """
+        if self.circuit_breakers.fail_mode == 'miss':
+            log.debug('节点熔断中,视为缓存未命中,node_url:%s', error.node_url)
+            return miss_value
+        raise error
+
+    def _node_call(self, node_url: str, func, *args, **kwargs):
+        """
+        执行 _node_call_flow,见 DistributedPipeline
+        :return: 同步客户端返回func的返回值,异步客户端返回awaitable
+        """
+        return self._run(self._node_call_flow(node_url, func, *args, **kwargs))
+
+    def _node_call_flow(self, node_url: str, func, *args, **kwargs):
+        """
+        经过节点的熔断器执行 func;节点熔断中时抛出 CircuitOpenException,不执行 func
+        连接错误/超时记为失败,其他情况(包括命令错误)说明节点可用,记为成功
+        :param node_url:
+        :param func: 节点redis对象的方法
+        :return: func的返回值
+        """
+        breaker = self.circuit_breakers.get(node_url)
+        if breaker is not None:
+            breaker.before_call()
+        start = time.monotonic()
+        try:
+            result = yield Call(func, *args, **kwargs)
+        except (ConnectionError, TimeoutError):
+            if breaker is not None:
+                breaker.record_failure()
+            raise
+        except Exception:
+            if breaker is not None:
+                breaker.record_success()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        if self.hedge_percentile:
+            self.latency_tracker.record(node_url, time.monotonic() - start)
+        if self.bounded_load_epsilon is not None:
+            self.node_loads.record(node_url)
+        return result
+
+    def _node_command_flow(self, node_url: str, *args, **options):
+        """
+        经过节点的熔断器,在节点上执行命令
+        :param node_url:
+        :param args: 命令参数,第一个为命令名
+        :param options:
+        :return:
+        """
+        return (yield from self._node_call_flow(node_url, self._redis_from_url(node_url).execute_command, *args, **options))
+
+    def _node_url_flow(self, key):
+        """
+        获取key所在的主节点url
+        :param key: 添加前缀后的key
+        :return:
+        """
+        return self._route_hash((yield Call('get_hash_ring'))).get_node(key)
+
+    def _read_flow(self, node_url: str, func, primary=False):
+        """
+        执行只读操作 func(node_url);节点有只读副本时发送到副本,副本不可用时依次尝试其他副本和主节点
+        :param node_url: 主节点url
+        :param func: 读操作,参数为节点url,返回流程
+        :param primary: 是否只从主节点读取;需要立即读到其他进程写入的数据时使用(如memoize的版本号,重新计算锁的轮询,
+                        本地缓存的填充),只读副本有复制延迟
+        :return:
+        """
+        node_urls = [node_url] if primary else self._read_nodes(node_url)
+        if len(node_urls) == 1:
+            return (yield from func(node_url))
+        return (yield Call('_hedged_call', node_urls, Flow(func)))
+
+    def _primary_read_flow(self, key, *args):
+        """
+        在key所在的主节点上执行读命令(如GET,EXISTS),不发送到只读副本
+        :param key: 添加前缀后的key
+        :param args: 命令参数,第一个为命令名
+        :return:
+        """
+        node_url = yield from self._node_url_flow(key)
+        try:
+            return (yield from self._node_command_flow(node_url, *args))
+        except CircuitOpenException as e:
+            return self._circuit_miss(e, miss_result(args))
+
+    def _replica_execute_flow(self, node_urls: list, *args):
+        """
+        在key的所有副本节点上并发执行写命令(如SET,DEL)
+        :param node_urls: 副本所在的节点list
+        :param args: 命令参数,第一个为命令名
+        :return: 见 _replica_write_result
+        """
+
+        def node_execute(node_url, _):
+            try:
+                return (yield from self._node_command_flow(node_url, *args))
+            except (ConnectionError, TimeoutError, CircuitOpenException) as e:
+                return e
+
+        try:
+            return self._replica_write_result((yield Call('_fan_out', Flow(node_execute), dict.fromkeys(node_urls))))
+        finally:
+            yield from self._near_invalidate_flow(args[1:2])
+
+    def _replica_read_flow(self, node_urls: list, *args):
+        """
+        按顺序在副本节点上执行读命令(如GET),节点不可用时读取下一个副本
+        :param node_urls: 副本所在的节点list,第一个为主节点
+        :param args: 命令参数,第一个为命令名
+        :return:
+        """
+        try:
+            return (yield Call(
+                '_hedged_call', node_urls, Flow(lambda node_url: self._node_command_flow(node_url, *args))
+            ))
+        except CircuitOpenException as e:
+            return self._circuit_miss(e, miss_result(args))
+
+    def _bounded_read_flow(self, node_urls: list, *args, primary=False):
+        """
+        依次在有界负载的候选节点上执行读命令(如GET,EXISTS),返回第一个找到数据的结果;节点不可用时读取下一个候选节点
+        :param node_urls: 候选节点list,第一个为当前未过载的节点
+        :param args: 命令参数,第一个为命令名
+        :param primary: 是否只从主节点读取,见 _read_flow
+        :return: 所有候选节点都没有数据时返回最后一个结果
+        """
+        result = error = None
+        for node_url in node_urls:
+            try:
+                result = yield from self._read_flow(
+                    node_url, lambda url: self._node_command_flow(url, *args), primary
+                )
+            except (ConnectionError, TimeoutError, CircuitOpenException) as e:
+                error = e
+                continue
+            if result:
+                return result
+        if error is not None and not result:
+            if isinstance(error, CircuitOpenException):
+                return self._circuit_miss(error, miss_result(args))
+            raise error
+        return result
+
+    def _bounded_write_flow(self, node_urls: list, *args):
+        """
+        在有界负载选中的节点上执行写命令,并删除其他候选节点上可能存在的旧数据
+        :param node_urls: 候选节点list,第一个为选中的节点
+        :param args: 命令参数,第一个为命令名,第二个为key
+        :return: 选中节点上的执行结果
         """
-        通过url获取redis对象
+
+        def node_execute(node_url, node_args):
+            try:
+                return (yield from self._node_command_flow(node_url, *node_args))
+            except (ConnectionError, TimeoutError, CircuitOpenException) as e:
+                if node_url == node_urls[0]:
+                    raise
+                # 删除旧数据失败只记录日志
+                log.warning(f'删除有界负载候选节点上的旧数据失败,node_url:{node_url},error:{e!r}')
+                return 0
+
+        groups = {node_url: ('DEL', args[1]) for node_url in node_urls[1:]}
+        groups[node_urls[0]] = args
+        try:
+            return (yield Call('_fan_out', Flow(node_execute), groups))[node_urls[0]]
+        finally:
+            yield from self._near_invalidate_flow(args[1:2])
+
+    def _bounded_delete_flow(self, node_urls: list, key):
+        """
+        在有界负载的所有候选节点上删除key
+        :param node_urls: 候选节点list
+        :param key:
+        :return: 删除的key的数量
+        """
+
+        def node_execute(node_url, _):
+            try:
+                return (yield from self._node_command_flow(node_url, 'DEL', key))
+            except (ConnectionError, TimeoutError, CircuitOpenException) as e:
+                return e
+
+        node_results = yield Call('_fan_out', Flow(node_execute), dict.fromkeys(node_urls))
+        yield from self._near_invalidate_flow([key])
+        self._replica_write_result(node_results)
+        return sum(result for result in node_results.values() if not isinstance(result, Exception))
+
+    def _near_invalidate(self, keys: list):
+        """
+        执行 _near_invalidate_flow,见 DistributedPipeline
+        :return: 同步客户端返回None,异步客户端返回awaitable
+        """
+        return self._run(self._near_invalidate_flow(keys))
+
+    def _near_invalidate_flow(self, keys: list):
+        """
+        写入/删除key后清除本进程的本地缓存,并在key所在的节点上广播清除消息,其他进程订阅后清除各自的本地缓存
+        广播失败只记录日志,其他进程的本地缓存最多在 DIS_NEAR_CACHE_TTL 后过期
+        :param keys: 添加前缀后的key list
+        :return:
+        """
+        keys = self._near_keys(keys)
+        if not keys:
+            return
+        for cache in (self.near_cache, self.version_cache):
+            if cache is not None:
+                cache.delete_many(keys)
+
+        def publish(node_url, node_keys):
+            try:
+                client = self._redis_from_url(node_url)
+                yield from self._node_call_flow(node_url, client.publish, self.near_cache_channel, json.dumps(node_keys))
+            except (RedisError, CircuitOpenException) as e:
+                log.warning(f'广播本地缓存清除消息失败,node_url:{node_url},error:{e!r}')
+
+        groups = self._route_hash((yield Call('get_hash_ring'))).locate_many(keys)
+        yield Call('_fan_out', Flow(publish), groups)
+
+    def _near_get_flow(self, key, loader=load_object):
+        """
+        先读取本地缓存,未命中时在一个pipeline中读取数据和剩余过期时间,并写入本地缓存
+        :param key: 添加前缀后的key
+        :param loader: 把二进制数据还原为对象的函数
+        :return: 还原后的对象
+        """
+        found, value = self.near_cache.get(near_key(key))
+        if found:
+            return value
+        token = self.near_cache.token()
+
+        def node_get(node_url):
+            pipe = self._redis_from_url(node_url).pipeline(transaction=False)
+            pipe.get(key)
+            pipe.pttl(key)
+            return (yield from self._node_call_flow(node_url, pipe.execute))
+
+        try:
+            # 从主节点读取,从只读副本读取的旧数据写入本地缓存后,在本地过期前不会再被清除
+            node_url = yield from self._node_url_flow(key)
+            raw, pttl = yield from self._read_flow(node_url, node_get, primary=True)
+        except CircuitOpenException as e:
+            return self._circuit_miss(e, None)
+        return self._near_fill(token, {key: raw}, {key: pttl}, loader)[key]
+
+    def _route_command(self, readonly, *args, **options):
+        """
+        执行 _route_command_flow
+        :return: 同步客户端返回命令的结果,异步客户端返回awaitable
+        """
+        return self._run(self._route_command_flow(readonly, *args, **options))
+
+    def _execute_command_flow(self, *args, **options):
+        """
+        execute_command 的流程,见 BaseRedis.execute_command
+        :param args:
+        :param options:
+        :return:
+        """
+        readonly = is_readonly(args)
+        if readonly or self.near_cache_channel is None:
+            return (yield from self._route_command_flow(readonly, *args, **options))
+        # 写命令执行后清除key的本地缓存(执行失败时也清除,命令可能已经在节点上执行)
+        try:
+            return (yield from self._route_command_flow(readonly, *args, **options))
+        finally:
+            yield from self._near_invalidate_flow(command_keys(args))
+
+    def _route_command_flow(self, readonly, *args, **options):
+        """
+        定位节点并执行命令,见 BaseRedis.execute_command
+        :param readonly: 是否为只读命令
+        :param args:
+        :param options:
+        :return:
+        """
+        # 通过key获取对应的节点url
+        plan, merge = plan_command(self._route_hash((yield Call('get_hash_ring'))), args)
+        command_name = args[0]
+        if merge is not None:
+            log.debug('node_url:%s,key:%s,command_name:%s', list(plan), args[1], command_name)
+
+            def node_execute(node_url, node_args):
+                def node_call(url):
+                    return self._node_command_flow(url, *node_args, **options)
+
+                try:
+                    if readonly:
+                        return (yield from self._read_flow(node_url, node_call))
+                    return (yield from node_call(node_url))
+                except CircuitOpenException as e:
+                    return self._circuit_miss(e, miss_result(node_args))
+
+            return merge((yield Call('_fan_out', Flow(node_execute), plan)))
+        node_url = next(iter(plan))
+        log.debug('node_url:%s,key:%s,command_name:%s', node_url, args[1], command_name)
+
+        def node_call(url):
+            return self._node_call_flow(url, self._execute_on_node, url, *args, **options)
+
+        try:
+            if readonly:
+                return (yield from self._read_flow(node_url, node_call))
+            return (yield from node_call(node_url))
+        except CircuitOpenException as e:
+            return self._circuit_miss(e, miss_result(args))
+
+    def _node_obj_flow(self, key: str or int, use_prefix=False):
+        """
+        get_redis_node_obj 的流程
+        :param key:
+        :param use_prefix:
+        :return: 节点的redis对象
+        """
+        if not isinstance(key, (str, int)):
+            raise TypeError
+
+        key = self._use_prefix(key, use_prefix)
+        return self._redis_from_url((yield from self._node_url_flow(key)))
+
+    def _cache_set_flow(self, name, value, timeout=None, use_prefix=False, replicas=None, bounded=False, soft_timeout=None):
+        """
+        cache_set 的流程,见 DistributedRedisSdk.cache_set
+        :return:
+        """
+        if timeout and not isinstance(timeout, int):
+            raise TypeError
+        dump = dump_object(value, None if soft_timeout is None else time.time() + soft_timeout)
+        name = self._use_prefix(name, use_prefix)
+        timeout = normalize_timeout(timeout, self.default_timeout)
+        args = ('SET', name, dump) if timeout == -1 else ('SETEX', name, timeout, dump)
+
+        if self._is_bounded(name, bounded, replicas):
+            node_urls = self._bounded_nodes((yield Call('get_hash_ring')), name)
+            return (yield from self._bounded_write_flow(node_urls, *args))
+
+        replicas = self._get_replicas(name, replicas)
+        if replicas > 1:
+            node_urls = self._get_replica_nodes((yield Call('get_hash_ring')), name, replicas)
+            return (yield from self._replica_execute_flow(node_urls, *args))
+
+        # 通过 execute_command 定位节点,经过节点的熔断器
+        return (yield Call('execute_command', *args))
+
+    def _cache_read_flow(self, key, command, replicas=None, bounded=False, primary=False):
+        """
+        在redis中读取缓存key(GET,EXISTS),按照有界负载,副本,只读副本的规则选择节点;cache_get,cache_get_entry,has 共用
+        :param key: 添加前缀后的key
+        :param command: 命令名
+        :param replicas: 副本数量,为None时根据key前缀和配置获取
+        :param bounded: 是否使用有界负载定位节点
+        :param primary: 是否只从主节点读取
+        :return: 命令的结果
+        """
+        if self._is_bounded(key, bounded, replicas):
+            node_urls = self._bounded_nodes((yield Call('get_hash_ring')), key)
+            return (yield from self._bounded_read_flow(node_urls, command, key, primary=primary))
+        replicas = self._get_replicas(key, replicas)
+        if replicas > 1:
+            node_urls = self._get_replica_nodes((yield Call('get_hash_ring')), key, replicas)
+            return (yield from self._replica_read_flow(node_urls, command, key))
+        if primary:
+            return (yield from self._primary_read_flow(key, command, key))
+        return (yield Call('execute_command', command, key))
+
+    def _cache_get_flow(self, key, use_prefix=False, replicas=None, bounded=False, primary=False, soft_expiry=False):
+        """
+        cache_get 的流程,见 DistributedRedisSdk.cache_get
+        :return: 还原后的对象
+        """
+        key = self._use_prefix(key, use_prefix)
+        loader = load_entry_object if soft_expiry else load_object
+        if self.near_cache is not None and not self._is_bounded(key, bounded, replicas) and \
+                self._get_replicas(key, replicas) == 1:
+            return (yield from self._near_get_flow(key, loader))
+        return loader((yield from self._cache_read_flow(key, 'GET', replicas, bounded, primary)))
+
+    def _cache_get_entry_flow(self, key, use_prefix=False, replicas=None, bounded=False, primary=False):
+        """
+        cache_get_entry 的流程,见 DistributedRedisSdk.cache_get_entry
+        :return: (对象, 软过期时间戳)
+        """
+        key = self._use_prefix(key, use_prefix)
+        return load_entry((yield from self._cache_read_flow(key, 'GET', replicas, bounded, primary)))
+
+    def _has_flow(self, key, use_prefix=False, replicas=None, bounded=False, primary=False):
+        """
+        has 的流程,见 DistributedRedisSdk.has
+        :return:
+        """
+        key = self._use_prefix(key, use_prefix)
+        return (yield from self._cache_read_flow(key, 'EXISTS', replicas, bounded, primary))
+
+    def _cache_delete_flow(self, key, use_prefix=False, replicas=None, bounded=False):
+        """
+        cache_delete 的流程,见 DistributedRedisSdk.cache_delete
+        :return:
+        """
+        key = self._use_prefix(key, use_prefix)
+        if self._is_bounded(key, bounded, replicas):
+            node_urls = self._bounded_nodes((yield Call('get_hash_ring')), key)
+            return (yield from self._bounded_delete_flow(node_urls, key))
+        replicas = self._get_replicas(key, replicas)
+        if replicas > 1:
+            node_urls = self._get_replica_nodes((yield Call('get_hash_ring')), key, replicas)
+            return (yield from self._replica_execute_flow(node_urls, 'DEL', key))
+        return (yield Call('execute_command', 'DEL', key))
+
+    def _recompute_lock_acquire(self, key):
+        """
+        在缓存key所在的节点(不考虑有界负载,各进程定位到同一节点)上获取重新计算锁:SET NX PX
+        :param key: 添加前缀后的缓存key
+        :return: 获取成功时返回锁的值(释放锁时使用),否则返回None;异步客户端返回awaitable
+        """
+        return self._run(self._recompute_lock_acquire_flow(key))
+
+    def _recompute_lock_acquire_flow(self, key):
+        """
+        _recompute_lock_acquire 的流程
+        :param key: 添加前缀后的缓存key
+        :return:
+        """
+        node_url = yield from self._node_url_flow(key)
+        token = uuid.uuid4().hex
+        acquired = yield from self._node_call_flow(
+            node_url, self._redis_from_url(node_url).set, key + RECOMPUTE_LOCK_SUFFIX, token,
+            nx=True, px=int(self.recompute_lock_timeout * 1000),
+        )
+        return token if acquired else None
+
+    def _recompute_lock_release(self, key, token):
+        """
+        释放重新计算锁,锁的值与自己写入的值相同时才删除;失败时只记录日志,锁在过期后释放
+        :param key: 添加前缀后的缓存key
+        :param token: _recompute_lock_acquire 的返回值
+        :return: 异步客户端返回awaitable
+        """
+        return self._run(self._recompute_lock_release_flow(key, token))
+
+    def _recompute_lock_release_flow(self, key, token):
+        """
+        _recompute_lock_release 的流程
+        :param key: 添加前缀后的缓存key
+        :param token:
+        :return:
+        """
+        try:
+            node_url = yield from self._node_url_flow(key)
+            yield from self._node_call_flow(
+                node_url, self._redis_from_url(node_url).eval, RECOMPUTE_UNLOCK_SCRIPT, 1,
+                key + RECOMPUTE_LOCK_SUFFIX, token,
+            )
+        except (RedisError, CircuitOpenException) as e:
+            log.warning(f'释放重新计算锁失败,锁在过期后释放,key:{key},error:{e!r}')
+
+    def _get_many_flow(self, keys: list, use_prefix=False, replicas=None, primary=False):
+        """
+        get_many 的流程,见 DistributedRedisSdk.get_many
+        :return:
+        """
+        if not isinstance(keys, list):
+            raise TypeError
+        keys = self._use_prefix(keys, use_prefix)
+        if not keys:
+            return []
+
+        near_cache = self.near_cache
+        token, near_values, miss_keys = self._near_lookup(keys)
+        if not miss_keys:
+            return [near_values[key] for key in keys]
+        # 开启本地缓存时从主节点读取,见 _near_get_flow
+        primary = primary or near_cache is not None
+        # key:从redis读取的key val:剩余过期时间(毫秒)
+        pttls = {}
+
+        def node_mget(node_url, node_keys):
+            client = self._redis_from_url(node_url)
+            if near_cache is None:
+                return (yield from self._node_call_flow(node_url, client.mget, node_keys))
+            # 开启本地缓存时,同一个pipeline中获取剩余过期时间,作为本地缓存过期时间的上限
+            pipe = client.pipeline(transaction=False)
+            pipe.mget(node_keys)
+            for key in node_keys:
+                pipe.pttl(key)
+            node_result = yield from self._node_call_flow(node_url, pipe.execute)
+            pttls.update(zip(node_keys, node_result[1:]))
+            return node_result[0]
+
+        def mget(node_url, node_keys):
+            def node_flow(url):
+                return node_mget(url, node_keys)
+
+            try:
+                if isinstance(node_url, tuple):
+                    # 副本节点分组
+                    return (yield Call('_hedged_call', list(node_url), Flow(node_flow)))
+                return (yield from self._read_flow(node_url, node_flow, primary))
+            except CircuitOpenException as e:
+                return self._circuit_miss(e, [None] * len(node_keys))
+
+        groups = self._plan_read((yield Call('get_hash_ring')), miss_keys, replicas)
+        node_values = yield Call('_fan_out', Flow(mget), groups)
+        return self._merge_get_many(keys, groups, node_values, near_values, token, pttls)
+
+    def _set_many_flow(self, mapping: dict, timeout=None, use_prefix=False, timeouts: dict = None, replicas=None):
+        """
+        set_many 的流程,见 DistributedRedisSdk.set_many
+        :return:
+        """
+        if not isinstance(mapping, dict):
+            raise TypeError
+        if timeouts is not None and not isinstance(timeouts, dict):
+            raise TypeError
+        timeouts = timeouts or {}
+        for _timeout in [timeout, *timeouts.values()]:
+            if _timeout and not isinstance(_timeout, int):
+                raise TypeError
+
+        # key:添加前缀后的key val:mapping中的key
+        names = {self._use_prefix(key, use_prefix): key for key in mapping}
+
+        groups, replicated = self._plan_write((yield Call('get_hash_ring')), list(names), replicas)
+
+        def pipeline_set(node_url, node_names):
+            pipe = self._set_pipeline(
+                self._redis_from_url(node_url).pipeline(transaction=False), node_names, names, mapping, timeout, timeouts
+            )
+            try:
+                return (yield from self._node_call_flow(node_url, pipe.execute, raise_on_error=False))
+            except CircuitOpenException as e:
+                if replicated:
+                    return [False] * len(node_names)
+                return self._circuit_miss(e, [False] * len(node_names))
+            except (ConnectionError, TimeoutError) as e:
+                if not replicated:
+                    raise
+                # 部分副本写入失败只记录日志
+                log.warning(f'写入副本失败,node_url:{node_url},error:{e!r}')
+                return [False] * len(node_names)
+
+        try:
+            node_results = yield Call('_fan_out', Flow(pipeline_set), groups)
+        finally:
+            yield from self._near_invalidate_flow(list(names))
+        return self._merge_set(names, groups, node_results)
+
+    def _delete_many_flow(self, keys: list, use_prefix=False):
+        """
+        delete_many 的流程,见 DistributedRedisSdk.delete_many
+        :return:
+        """
+        if not isinstance(keys, list):
+            raise TypeError
+        keys = self._use_prefix(keys, use_prefix)
+        if not keys:
+            return 0
+
+        groups, replicated = self._plan_write((yield Call('get_hash_ring')), keys)
+
+        def pipeline_delete(node_url, chunks, command):
+            pipe = self._redis_from_url(node_url).pipeline(transaction=False)
+            for chunk in chunks:
+                pipe.execute_command(command, *chunk)
+            return (yield from self._node_call_flow(node_url, pipe.execute))
+
+        def unlink(node_url, node_keys):
+            chunks = self._delete_chunks(node_keys, replicated)
+            try:
+                return (yield from pipeline_delete(node_url, chunks, 'UNLINK'))
+            except ResponseError:
+                # redis 4.0以下版本没有UNLINK命令
+                return (yield from pipeline_delete(node_url, chunks, 'DEL'))
+            except CircuitOpenException as e:
+                return self._circuit_miss(e, [0] * len(chunks))
+
+        try:
+            return self._merge_delete(groups, (yield Call('_fan_out', Flow(unlink), groups)), replicated)
+        finally:
+            yield from self._near_invalidate_flow(keys)
+
+
+class BaseRedis(RedisFlowMixin, Redis):
+    """
+    redis基类
+    1.对 execute_command进行二次开发
+    2.扩充些 供 子类或内部使用的 方法
+    3.同步执行 RedisFlowMixin 的流程:IO直接调用,多节点操作通过线程池并发执行
+    """
+
+    def __init__(self, ):
+        super(BaseRedis, self).__init__()
+        self.key_prefix = k_prefix
+        self.manager_redis_obj = None
+        # 本地缓存的hash环快照,请求路径上不访问 manager redis
+        self.hash_ring = HashRingSnapshot()
+        # 每个节点一个长期复用的连接池,hash环增删节点时关闭已移除节点的连接池
+        self.node_pool = NodePoolRegistry()
+        self.hash_ring.node_listeners.append(self.node_pool.sync_nodes)
+        # 每个节点一个熔断器,节点连续失败后快速失败
+        self.circuit_breakers = CircuitBreakerRegistry()
+        self.hash_ring.node_listeners.append(self.circuit_breakers.sync_nodes)
+        # 缓存的默认副本数量,以及 key:key前缀 val:副本数量 的dict
+        self.replication_factor = 1
+        self.replication_prefixes = {}
+        # 节点延迟统计,以及对冲读的等待时间(延迟的百分位,为None时不对冲)和等待时间下限(秒)
+        self.latency_tracker = LatencyTracker()
+        self.hash_ring.node_listeners.append(self.latency_tracker.sync_nodes)
+        self.hedge_percentile = None
+        self.hedge_min_delay = 0.005
+        self._hedge_executor = None
+        # 有界负载:节点最近的请求次数,允许超过平均负载的比例(为None时不开启),以及最多溢出到之后的几个节点
+        self.node_loads = NodeLoadTracker()
+        self.hash_ring.node_listeners.append(self.node_loads.sync_nodes)
+        self.bounded_load_epsilon = None
+        self.bounded_load_max_spill = 2
+        self.bounded_load_min_capacity = 100
+        # 是否把只读命令分摊到节点的只读副本,以及轮流选择副本用的计数器
+        self.read_from_replicas = True
+        self._read_counter = itertools.count()
+        # 进程内的本地缓存(为None时不开启),memoize版本号的本地缓存(为None时不开启),
+        # 清除消息的 pub/sub 频道名,以及订阅清除消息的对象
+        self.near_cache = None
+        self.version_cache = None
+        self.near_cache_channel = None
+        self.near_cache_subscriber = None
+        # 多节点操作并发执行的线程数,<=1 时按节点顺序串行执行
+        self.fan_out_workers = 8
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # try_times_default 装饰的方法使用的重试策略
+        self.retry_policy = RetryPolicy()
+
+    def _run(self, flow):
+        """
+        同步执行流程,流程中 Call 的方法名为本对象的同名方法,见 utils.flow
+        :param flow:
+        :return: 流程的返回值
+        """
+        return run_flow(flow, functools.partial(getattr, self))
+
+    def _redis_from_url(self, node_url: str):
+        """
+        通过url获取redis对象(从连接池注册表中获取,同一节点复用同一个连接池)
         注意:此处获取的redis对象是直接从redis包导入的,可以进行任何操作,不会对 execute_command进行修改
         :param node_url:
         :return:
         """
-        return redis.from_url(node_url)
+        return self.node_pool.get_client(node_url)
+
+    def get_hash_ring(self):
+        """
+        获取本地快照中的一致性hash对象,快照到期时才会访问 manager redis
+        :return:
+        """
+        return self.hash_ring.get(self.manager_redis_obj)
+
+    def refresh_hash_ring(self):
+        """
+        忽略刷新间隔和版本号,立即从 manager redis 重新拉取hash环
+        :return:
+        """
+        self.hash_ring.refresh(self.manager_redis_obj, force=True)
+        return self.hash_ring.hash_map
 
     def _get_all_node_url(self):
         """
         获取所有node redis的真实url
         :return:
         """
-        hash_map = get_hash_ring_map(self.manager_redis_obj)
-        return set(hash_map.values())
+        return set(self.get_hash_ring().ring.values())
+
+    def _hedged_call(self, node_urls: list, func):
+        """
+        对冲读:先在第一个节点上执行 func(node_url),超过此节点最近延迟的百分位(hedge_percentile)仍未返回时,
+        在下一个节点上再执行一次,返回先成功的结果;节点不可用时立即尝试下一个节点
+        没有开启对冲读时按顺序尝试,节点不可用时尝试下一个节点
+        :param node_urls: 可以执行此读操作的节点list,第一个为主节点
+        :param func: 读操作,参数为节点url
+        :return:
+        """
+        errors = (ConnectionError, TimeoutError, CircuitOpenException)
+        error = None
+        if not self.hedge_percentile or len(node_urls) < 2:
+            for node_url in node_urls:
+                try:
+                    return func(node_url)
+                except errors as e:
+                    error = e
+            raise error
+
+        executor = self._get_hedge_executor()
+        candidates = iter(node_urls)
+        primary = next(candidates)
+        pending = {executor.submit(func, primary): primary}
+        delay = self.latency_tracker.hedge_delay(primary, self.hedge_percentile, self.hedge_min_delay)
+        while pending:
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                # 超过等待时间仍未返回,在下一个节点上发出对冲请求,之后不再限时
+                delay = None
+                node_url = next(candidates, None)
+                if node_url is not None:
+                    self.latency_tracker.hedged += 1
+                    pending[executor.submit(func, node_url)] = node_url
+                continue
+            for future in done:
+                node_url = pending.pop(future)
+                try:
+                    result = future.result()
+                except errors as e:
+                    # 节点不可用,立即尝试下一个节点
+                    error = e
+                    next_url = next(candidates, None)
+                    if next_url is not None:
+                        pending[executor.submit(func, next_url)] = next_url
+                    continue
+                if node_url != primary:
+                    self.latency_tracker.hedge_wins += 1
+                return result
+        raise error
+
+    def _near_clear(self):
+        """
+        清空本进程的本地缓存,并在所有节点上广播清空消息
+        :return:
+        """
+        if self.near_cache is None and self.version_cache is None:
+            return
+        for cache in (self.near_cache, self.version_cache):
+            if cache is not None:
+                cache.clear()
+
+        def publish(node_url, _):
+            try:
+                self._node_call(node_url, self._redis_from_url(node_url).publish, self.near_cache_channel, CLEAR_ALL)
+            except (RedisError, CircuitOpenException) as e:
+                log.warning(f'广播本地缓存清空消息失败,node_url:{node_url},error:{e!r}')
+
+        self._fan_out(publish, dict.fromkeys(self._get_all_node_url()))
+
+    def _get_executor(self):
+        """
+        获取多节点并发执行用的线程池,第一次使用时创建
+        :return:
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.fan_out_workers, thread_name_prefix='DistributedRedisSdk'
+                    )
+        return self._executor
+
+    def _get_hedge_executor(self):
+        """
+        获取对冲读用的线程池,第一次使用时创建;与 _fan_out 的线程池分开,避免多节点操作中的对冲读互相等待
+        :return:
+        """
+        if self._hedge_executor is None:
+            with self._executor_lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(
+                        max_workers=max(self.fan_out_workers, 1) * 4, thread_name_prefix='DistributedRedisSdkHedge'
+                    )
+        return self._hedge_executor
+
+    def _fan_out(self, func, groups: dict):
+        """
+        对每个节点执行 func(node_url, node_args),多个节点时并发执行
+        :param func:
+        :param groups: key:节点url val:传给func的参数
+        :return: key:节点url val:func的返回值
+        """
+        if len(groups) <= 1 or self.fan_out_workers <= 1:
+            return {node_url: func(node_url, node_args) for node_url, node_args in groups.items()}
+
+        executor = self._get_executor()
+        futures = {node_url: executor.submit(func, node_url, node_args) for node_url, node_args in groups.items()}
+        return {node_url: future.result() for node_url, future in futures.items()}
 
     def get_redis_node_obj(self, key: str or int, use_prefix=False):
         """
@@ -72,13 +1132,7 @@ class BaseRedis(Redis):
         :param use_prefix:默认不使用添加key的前缀
         :return:
         """
-        if not isinstance(key, (str, int)):
-            raise TypeError
-
-        hash_map = get_hash_ring_map(self.manager_redis_obj)
-        key = self._use_prefix(key, use_prefix)
-        node_url = ConsistencyHash(hash_map).get_node(key)
-        return self._redis_from_url(node_url)
+        return self._run(self._node_obj_flow(key, use_prefix))
 
     def _cache_obj(self, key, cache_obj):
         """
@@ -91,6 +1145,14 @@ class BaseRedis(Redis):
             raise LookupError('cache_obj必须是Redis对象')
         return cache_obj
 
+    def _plan_command(self, args):
+        """
+        校验命令是否能分配到节点,并获取命令在哪些节点上执行,见 plan_command
+        :param args: execute_command的参数,第一个为命令名
+        :return: (plan, merge)
+        """
+        return plan_command(self._route_hash(self.get_hash_ring()), args)
+
     @try_times_default
     def execute_command(self, *args, **options):
         """
@@ -105,48 +1167,24 @@ class BaseRedis(Redis):
         警告:
         1.Redis的有些命令函数(如:client_id) 不需要 key,所以在调用此函数时会存在 参数不足2个的情况,针对此情况 直接Raise错误
         2.Redis的有些命令函数 的第一个参数不是 key,即使分配到了节点上也是错误的结果,这种也不能使用
+        3.多key命令(MGET,MSET,DEL,UNLINK,EXISTS,TOUCH)的key分布在多个节点上时,按节点拆分后并发执行,再合并结果
         :param args:
         :param options:
         :return:
         """
-        # 某些命令 不能分配到节点,此处进行校验
-        # 判断参数长度不能小于2个(如果小于,说明肯定没有key)
-        if len(args) < 2:
-            raise Exception('此分布式redis对象不支持使用此方法,因为没有key,无法定位到具体redis节点,'
-                            '请使用 get_redis_obj() 函数获取具体节点对象进行后续操作')
+        return self._run(self._execute_command_flow(*args, **options))
 
-        # 通过 command_name 找到对应的函数名,然后找到对应参数
+    def _execute_on_node(self, node_url, *args, **options):
+        """
+        在节点上执行命令,与 Redis.execute_command 原来的操作相同
+        :param node_url:
+        :param args:
+        :param options:
+        :return:
+        """
         command_name = args[0]
-        func_name = get_func_name(command_name)
-        command_func = getattr(Redis, func_name)
-        func_params = command_func.__code__.co_varnames
-        # 第二个参数 进行校验,command_name不在指定的list中
-        allow_command_list = ['touch']
-        if func_params[1] not in ['key', 'keys', 'name', 'names', 'src'] and func_name not in allow_command_list:
-            raise Exception('此分布式redis对象不支持使用此方法,因为没有key或name,无法定位到具体redis节点,'
-                            '请使用 get_redis_obj() 函数获取具体节点对象进行后续操作')
-
-        # 某些命令不能找到对应节点
-        not_allowed_command_list = ['config_set']
-        if command_name in not_allowed_command_list:
-            raise Exception('此分布式redis对象不支持使用此方法,无法定位到具体redis节点,'
-                            '请使用 get_redis_obj() 函数获取具体节点对象进行后续操作')
-
-        # 获取 执行的redis命令
-        # 获取操作的 key
-        key = args[1]
-        if not isinstance(key, (int, str)):
-            raise TypeError
-        if isinstance(key, int):
-            key = str(key)
-
-        # 通过key获取对应的节点url
-        hash_map = get_hash_ring_map(self.manager_redis_obj)
-        node_url = ConsistencyHash(hash_map).get_node(key)
-        log.info(f'node_url:{node_url},key:{key},command_name:{command_name}')
-
-        # 通过节点url获取redis对象的 连接池
-        pool = ConnectionPool.from_url(node_url)
+        # 通过节点url获取redis对象的 连接池(长期复用)
+        pool = self.node_pool.get_pool(node_url)
         conn = self.connection or pool.get_connection(command_name, **options)
         try:
             conn.send_command(*args)
@@ -161,6 +1199,20 @@ class BaseRedis(Redis):
             if not self.connection:
                 pool.release(conn)
 
+    def pipeline(self, transaction=False, shard_hint=None):
+        """
+        获取分布式pipeline对象,命令按照与 execute_command 相同的规则定位节点,
+        execute()时每个节点发送一个原生pipeline,结果按命令调用的顺序返回
+        注意:命令分布在多个节点上,不支持事务
+        :param transaction:
+        :param shard_hint:
+        :return:
+        """
+        if transaction:
+            raise Exception('此分布式redis对象的pipeline不支持事务,因为命令会分布在多个redis节点上,'
+                            '请使用 get_redis_node_obj() 函数获取具体节点对象进行后续操作')
+        return DistributedPipeline(self)
+
     def _bypass_cache(self, unless, f, *args, **kwargs):
         """Determines whether or not to bypass the cache by calling unless().
         Supports both unless() that takes in arguments and unless()
@@ -11,3 +11,11 @@ Usage:
 class InvalidConfigException(Exception):
     """配置错误"""
     pass
+
+
+class CircuitOpenException(Exception):
+    """节点熔断中,调用直接失败;不会重试"""
+
+    def __init__(self, node_url):
+        super(CircuitOpenException, self).__init__(f'节点熔断中,node_url:{node_url}')
+        self.node_url = node_url
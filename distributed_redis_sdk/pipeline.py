@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 12:20'
+
+Usage:
+分布式pipeline
+命令按照与 execute_command 相同的规则定位到节点后先记录下来,
+execute()时每个节点发送一个原生的redis pipeline(多个节点时并发执行),结果按命令调用的顺序返回
+"""
+from redis import Redis
+from redis.exceptions import RedisError
+
+from .exception import CircuitOpenException
+from .utils import miss_result, is_readonly, command_keys
+
+
+class DistributedPipeline(Redis):
+    """
+    分布式pipeline类
+
+    Usage:
+    >>> pipe = DistributedRedisSdk().pipeline()
+    >>> pipe.set('a', 1).get('a').incr('b')
+    >>> pipe.execute()
+    >>> [True, b'1', 1]
+    """
+
+    def __init__(self, sdk):  # pylint:disable=super-init-not-called
+        """
+        与redis包的Pipeline一样,不调用Redis.__init__,不创建新的连接池
+        :param sdk: DistributedRedisSdk对象
+        """
+        self.sdk = sdk
+        self.connection_pool = sdk.connection_pool
+        self.connection = None
+        self.response_callbacks = sdk.response_callbacks
+        # 记录的命令list,元素为 (执行计划, 合并结果的函数, 命令选项),见 BaseRedis._plan_command
+        self.command_stack = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.reset()
+
+    def __len__(self):
+        return len(self.command_stack)
+
+    def __bool__(self):
+        return True
+
+    def reset(self):
+        """
+        清空记录的命令
+        :return:
+        """
+        self.command_stack = []
+
+    def execute_command(self, *args, **options):
+        """
+        定位命令所在的节点并记录,不执行
+        :param args:
+        :param options:
+        :return:
+        """
+        plan, merge = self.sdk._plan_command(args)  # pylint:disable=protected-access
+        self.command_stack.append((plan, merge, options))
+        return self
+
+    def execute(self, raise_on_error=False):
+        """
+        每个节点发送一个原生pipeline,多个节点时并发执行
+        :param raise_on_error: 为True时有命令报错则抛出第一个错误;默认为False,报错命令的结果为对应的异常对象
+        :return: 按命令调用顺序排列的结果list
+        """
+        stack = self.command_stack
+        self.reset()
+        if not stack:
+            return []
+
+        # key:节点url val:此节点上执行的 (命令在stack中的下标, 命令参数) list
+        groups = {}
+        for i, (plan, _, _) in enumerate(stack):
+            for node_url, node_args in plan.items():
+                groups.setdefault(node_url, []).append((i, node_args))
+
+        def pipeline_execute(node_url, node_commands):
+            try:
+                pipe = self.sdk._redis_from_url(node_url).pipeline(transaction=False)  # pylint:disable=protected-access
+                for i, node_args in node_commands:
+                    pipe.execute_command(*node_args, **stack[i][2])
+                return self.sdk._node_call(node_url, pipe.execute, raise_on_error=False)  # pylint:disable=protected-access
+            except CircuitOpenException as e:
+                # 节点熔断中,视为缓存未命中时返回命令的空结果,否则结果为此异常
+                if self.sdk.circuit_breakers.fail_mode == 'miss':
+                    return [miss_result(node_args) for _, node_args in node_commands]
+                return [e] * len(node_commands)
+            except RedisError as e:
+                # 节点不可用时,此节点上的命令结果都是此异常
+                return [e] * len(node_commands)
+
+        node_results = self.sdk._fan_out(pipeline_execute, groups)  # pylint:disable=protected-access
+        if self.sdk.near_cache is not None:
+            # 清除写命令操作的key的本地缓存
+            keys = [
+                key for node_commands in groups.values() for _, node_args in node_commands
+                if not is_readonly(node_args) for key in command_keys(node_args)
+            ]
+            self.sdk._near_invalidate(keys)  # pylint:disable=protected-access
+
+        # 每条命令在各个节点上的结果 key:节点url val:结果
+        command_results = [{} for _ in stack]
+        for node_url, node_commands in groups.items():
+            for (i, _), result in zip(node_commands, node_results[node_url]):
+                command_results[i][node_url] = result
+
+        results = []
+        for (_, merge, _), node_result in zip(stack, command_results):
+            errors = [result for result in node_result.values() if isinstance(result, Exception)]
+            if errors:
+                results.append(errors[0])
+            elif merge is None:
+                results.append(next(iter(node_result.values())))
+            else:
+                results.append(merge(node_result))
+
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
@@ -9,6 +9,8 @@ Usage:
 """
 # 一致性hash算法
 from .consistency_hash import *
+# redis命令表
+from .command import *
 # 常量
 from .constant import *
 # 装饰器
@@ -17,3 +19,21 @@ from .decorator import *
 from .redis_action import *
 # 格式转换
 from .transform import *
+# hash环快照
+from .hash_ring import *
+# node redis 连接池注册表
+from .node_pool import *
+# node redis 熔断器
+from .circuit_breaker import *
+# node redis 延迟统计
+from .latency import *
+# node redis 负载统计
+from .node_load import *
+# 定位节点使用的hash函数
+from .hashers import *
+# 本地缓存
+from .near_cache import *
+# 进程内的单飞
+from .single_flight import *
+# 同步和异步客户端共用的控制流程
+from .flow import *
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 15:45'
+
+Usage:
+node redis 熔断器
+节点连续失败达到阈值后熔断(open),冷却时间内对此节点的调用直接失败,不再等待连接超时和重试;
+冷却时间到后进入半开(half_open)状态,只放行一个探测请求,成功则恢复(closed),失败则重新熔断
+"""
+import threading
+import time
+
+from ..exception import CircuitOpenException
+from ..log_obj import log
+
+# 熔断器状态
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker(object):
+    """单个节点的熔断器类"""
+
+    def __init__(self, node_url, failure_threshold=5, cooldown=10):
+        """
+
+        :param node_url:
+        :param failure_threshold: 连续失败多少次后熔断
+        :param cooldown: 熔断后的冷却时间(秒),之后放行一个探测请求
+        """
+        self.node_url = node_url
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.open_until = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        调用节点前检查,熔断中则抛出 CircuitOpenException
+        :return:
+        """
+        if self.state == CIRCUIT_CLOSED:
+            return
+        with self._lock:
+            if self.state == CIRCUIT_OPEN and time.monotonic() >= self.open_until:
+                # 冷却时间到,当前请求作为探测请求放行,其他请求继续快速失败
+                self.state = CIRCUIT_HALF_OPEN
+                log.info(f'节点熔断冷却结束,放行探测请求,node_url:{self.node_url}')
+                return
+        if self.state != CIRCUIT_CLOSED:
+            raise CircuitOpenException(self.node_url)
+
+    def record_success(self):
+        """
+        记录调用成功
+        :return:
+        """
+        if self.state == CIRCUIT_CLOSED and not self.failures:
+            return
+        with self._lock:
+            if self.state != CIRCUIT_CLOSED:
+                log.info(f'节点已恢复,node_url:{self.node_url}')
+            self.state = CIRCUIT_CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """
+        记录调用失败(连接错误/超时),连续失败达到阈值或探测请求失败时熔断
+        :return:
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != CIRCUIT_OPEN:
+                    log.warning(f'节点连续失败{self.failures}次,熔断{self.cooldown}秒,node_url:{self.node_url}')
+                self.state = CIRCUIT_OPEN
+                self.open_until = time.monotonic() + self.cooldown
+
+
+class CircuitBreakerRegistry(object):
+    """所有节点的熔断器注册表类"""
+
+    def __init__(self, failure_threshold=5, cooldown=10, fail_mode='raise', failover=False):
+        """
+
+        :param failure_threshold: 连续失败多少次后熔断,值为0或None时不熔断
+        :param cooldown: 熔断后的冷却时间(秒)
+        :param fail_mode: 熔断中的调用如何处理;raise:抛出 CircuitOpenException;miss:视为缓存未命中,返回空结果
+        :param failover: 是否把熔断节点上的key定位到环上顺时针方向的下一个可用节点
+        """
+        if fail_mode not in ('raise', 'miss'):
+            raise ValueError('fail_mode 只能是 raise 或 miss')
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.fail_mode = fail_mode
+        self.failover = failover
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, node_url: str):
+        """
+        获取节点的熔断器,不存在时创建;不熔断时返回None
+        :param node_url:
+        :return:
+        """
+        if not self.failure_threshold:
+            return None
+        breaker = self._breakers.get(node_url)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(node_url)
+                if breaker is None:
+                    breaker = CircuitBreaker(node_url, self.failure_threshold, self.cooldown)
+                    self._breakers[node_url] = breaker
+        return breaker
+
+    def is_available(self, node_url: str):
+        """
+        节点是否可以接收请求;熔断中(冷却时间未到)或正在探测的节点不可用
+        :param node_url:
+        :return:
+        """
+        breaker = self._breakers.get(node_url)
+        if breaker is None or breaker.state == CIRCUIT_CLOSED:
+            return True
+        return breaker.state == CIRCUIT_OPEN and time.monotonic() >= breaker.open_until
+
+    def has_unavailable(self):
+        """
+        是否有不可用的节点
+        :return:
+        """
+        return any(breaker.state != CIRCUIT_CLOSED for breaker in list(self._breakers.values()))
+
+    def sync_nodes(self, node_urls):
+        """
+        hash环节点变化时调用,删除已经移除节点的熔断器
+        :param node_urls: 当前hash环中所有的真实节点
+        :return:
+        """
+        with self._lock:
+            for node_url in set(self._breakers) - set(node_urls):
+                self._breakers.pop(node_url)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 13:02'
+
+Usage:
+redis命令表
+import时根据Redis类的命令函数一次性生成 命令名 到 路由信息 的dict,execute_command时只需查一次dict
+多key命令的key在参数中的位置,以及按节点拆分后各节点结果的合并方式
+"""
+import inspect
+from collections import namedtuple
+
+from redis import Redis
+
+from .redis_action import get_func_name
+
+# 多key命令 key:命令名 val:(相邻两个key在参数中的间隔, 多个节点结果的合并方式)
+# 合并方式: list:按key的顺序合并为list; sum:求和; all:全部成功才成功
+MULTI_KEY_COMMANDS = {
+    'MGET': (1, 'list'),
+    'DEL': (1, 'sum'),
+    'UNLINK': (1, 'sum'),
+    'EXISTS': (1, 'sum'),
+    'TOUCH': (1, 'sum'),
+    'MSET': (2, 'all'),
+}
+
+# 只读命令,节点有只读副本时可以发送到副本执行
+READ_ONLY_COMMANDS = frozenset((
+    'GET', 'MGET', 'EXISTS', 'STRLEN', 'GETRANGE', 'SUBSTR', 'GETBIT', 'BITCOUNT', 'BITPOS', 'TTL', 'PTTL', 'TYPE',
+    'DUMP', 'HGET', 'HMGET', 'HGETALL', 'HEXISTS', 'HKEYS', 'HVALS', 'HLEN', 'HSTRLEN', 'HSCAN', 'LRANGE', 'LINDEX',
+    'LLEN', 'LPOS', 'SCARD', 'SISMEMBER', 'SMISMEMBER', 'SMEMBERS', 'SRANDMEMBER', 'SSCAN', 'ZCARD', 'ZCOUNT',
+    'ZLEXCOUNT', 'ZRANGE', 'ZRANGEBYSCORE', 'ZRANGEBYLEX', 'ZREVRANGE', 'ZREVRANGEBYSCORE', 'ZREVRANGEBYLEX', 'ZRANK',
+    'ZREVRANK', 'ZSCORE', 'ZMSCORE', 'ZSCAN', 'PFCOUNT', 'GEOPOS', 'GEODIST', 'GEOHASH', 'XLEN', 'XRANGE', 'XREVRANGE',
+))
+
+# 命令函数的第二个参数(第一个为self)为以下名称时,说明第一个参数是key,可以定位到节点
+KEY_PARAM_NAMES = ('key', 'keys', 'name', 'names', 'src')
+# 第一个参数不是以上名称,但也能定位到节点的命令函数
+ALLOW_FUNC_NAMES = ('touch', 'mset')
+# 不能定位到节点的命令函数
+NOT_ALLOWED_FUNC_NAMES = ('config_set',)
+
+# 命令的路由信息
+# routable:能否定位到节点; key_step:多key命令相邻两个key在参数中的间隔,单key命令为None; merge_type:多key命令结果的合并方式
+# readonly:是否为只读命令
+CommandSpec = namedtuple('CommandSpec', ['routable', 'key_step', 'merge_type', 'readonly'])
+
+
+def get_command_spec(command_name):
+    """
+    通过分析Redis类中命令函数的参数,获取命令的路由信息
+    注意:此函数较慢,只在生成命令表时使用,请使用 COMMAND_TABLE 查询
+    :param command_name: 命令名,如 SET, DEL, ACL LOAD
+    :return: 没有对应命令函数时返回None
+    """
+    func_name = get_func_name(command_name)
+    command_func = getattr(Redis, func_name, None)
+    code = getattr(command_func, '__code__', None)
+    if code is None:
+        return None
+
+    func_params = code.co_varnames
+    routable = (len(func_params) > 1 and func_params[1] in KEY_PARAM_NAMES) or func_name in ALLOW_FUNC_NAMES
+    if func_name in NOT_ALLOWED_FUNC_NAMES:
+        routable = False
+    key_step, merge_type = MULTI_KEY_COMMANDS.get(command_name.upper(), (None, None))
+    return CommandSpec(routable, key_step, merge_type, command_name.upper() in READ_ONLY_COMMANDS)
+
+
+def _build_command_table():
+    """
+    生成命令表 key:命令名(大写和小写两种写法) val:路由信息
+    :return:
+    """
+    table = {}
+    for func_name, _ in inspect.getmembers(Redis, inspect.isfunction):
+        if func_name.startswith('_'):
+            continue
+        command_names = {func_name.upper(), func_name.upper().replace('_', ' ')}
+        if func_name == 'delete':
+            command_names.add('DEL')
+        for command_name in command_names:
+            spec = get_command_spec(command_name)
+            if spec is not None and get_func_name(command_name) == func_name:
+                table[command_name] = spec
+                table[command_name.lower()] = spec
+    return table
+
+
+# 命令表 key:命令名 val:CommandSpec;只在import时生成,之后不再修改
+COMMAND_TABLE = _build_command_table()
+
+
+def split_multi_key_command(consistency_hash, args, step, merge_type):
+    """
+    把多key命令按key所在的节点拆分为多条命令
+    :param consistency_hash: 一致性hash对象
+    :param args: execute_command的参数,第一个为命令名
+    :param step: 相邻两个key在参数中的间隔(如MSET为2)
+    :param merge_type: 多个节点结果的合并方式
+    :return: (plan, merge)
+             plan: key:节点url val:在此节点执行的命令参数
+             merge: 把 key:节点url val:节点执行结果 的dict 合并为最终结果的函数
+
+    Usage:
+    >>> plan, merge = split_multi_key_command(consistency_hash, ('MGET', 'a', 'b', 'c'), 1, 'list')
+    >>> plan
+    >>> {'redis://127.0.0.1:6379/1': ('MGET', 'a', 'c'), 'redis://127.0.0.1:6380/1': ('MGET', 'b')}
+    >>> merge({'redis://127.0.0.1:6379/1': [b'1', b'3'], 'redis://127.0.0.1:6380/1': [b'2']})
+    >>> [b'1', b'2', b'3']
+    """
+    command_name = args[0]
+    keys = args[1::step]
+    # key:key val:紧跟在key后面的参数(如MSET的value)
+    key_args = {args[i]: args[i + 1:i + step] for i in range(1, len(args), step)}
+
+    plan = {}
+    for node_url, node_keys in consistency_hash.locate_many(keys).items():
+        node_args = [command_name]
+        for key in node_keys:
+            node_args.append(key)
+            node_args.extend(key_args[key])
+        plan[node_url] = tuple(node_args)
+
+    def merge(node_results):
+        if merge_type == 'list':
+            values = {}
+            for node_url, node_args in plan.items():
+                values.update(zip(node_args[1:], node_results[node_url]))
+            return [values[key] for key in keys]
+        if merge_type == 'sum':
+            return sum(node_results.values())
+        return all(node_results.values())
+
+    return plan, merge
+
+
+def plan_command(consistency_hash, args):
+    """
+    校验命令是否能分配到节点,并获取命令在哪些节点上执行
+    多key命令(如MGET,DEL)的key分布在多个节点上时,按节点拆分为多条命令
+    :param consistency_hash: 一致性hash对象
+    :param args: execute_command的参数,第一个为命令名
+    :return: (plan, merge)
+             plan: key:节点url val:在此节点执行的命令参数
+             merge: 合并多个节点结果的函数,命令只在一个节点执行时为None
+    """
+    # 某些命令 不能分配到节点,此处进行校验
+    # 判断参数长度不能小于2个(如果小于,说明肯定没有key)
+    if len(args) < 2:
+        raise Exception('此分布式redis对象不支持使用此方法,因为没有key,无法定位到具体redis节点,'
+                        '请使用 get_redis_obj() 函数获取具体节点对象进行后续操作')
+
+    # 从import时生成的命令表中获取路由信息
+    command_name = args[0]
+    spec = COMMAND_TABLE.get(command_name)
+    if spec is None:
+        spec = COMMAND_TABLE.get(str(command_name).upper())
+    if spec is None or not spec.routable:
+        raise Exception('此分布式redis对象不支持使用此方法,因为没有key或name,无法定位到具体redis节点,'
+                        '请使用 get_redis_obj() 函数获取具体节点对象进行后续操作')
+
+    # 获取操作的 key
+    key = args[1]
+    if not isinstance(key, (int, str)):
+        raise TypeError
+
+    if spec.key_step and len(args) > 1 + spec.key_step:
+        for item in args[1::spec.key_step]:
+            if not isinstance(item, (int, str)):
+                raise TypeError
+        plan, merge = split_multi_key_command(consistency_hash, args, spec.key_step, spec.merge_type)
+        if len(plan) > 1:
+            return plan, merge
+    return {consistency_hash.get_node(key): args}, None
+
+
+def is_readonly(args):
+    """
+    是否为只读命令
+    :param args: 命令参数,第一个为命令名
+    :return:
+    """
+    spec = COMMAND_TABLE.get(args[0]) or COMMAND_TABLE.get(str(args[0]).upper())
+    return bool(spec and spec.readonly)
+
+
+def command_keys(args):
+    """
+    获取命令操作的key
+    :param args: 命令参数,第一个为命令名
+    :return: 多key命令(如DEL,MSET)为所有key,其他命令为第一个参数
+    """
+    spec = COMMAND_TABLE.get(args[0]) or COMMAND_TABLE.get(str(args[0]).upper())
+    if spec and spec.key_step:
+        return list(args[1::spec.key_step])
+    return list(args[1:2])
+
+
+def miss_result(args):
+    """
+    节点熔断并且视为缓存未命中时,命令在此节点上的结果
+    :param args: 命令参数,第一个为命令名
+    :return: MGET:每个key都为None;DEL等求和的命令:0;MSET:False;其他命令:None
+    """
+    spec = COMMAND_TABLE.get(args[0]) or COMMAND_TABLE.get(str(args[0]).upper())
+    merge_type = spec.merge_type if spec else None
+    if merge_type == 'list':
+        return [None] * (len(args) - 1)
+    if merge_type == 'sum':
+        return 0
+    if merge_type == 'all':
+        return False
+    return None
@@ -7,20 +7,51 @@ create time '2020/7/22 14:31'
 Usage:
 
 """
+import math
+from array import array
+from bisect import bisect_right
+from itertools import islice
 
-from zlib import crc32
+from .hashers import get_hasher, fmix32
 
 
 class ConsistencyHash(object):
     """一致性hash类"""
-    def __init__(self, ring: dict):
+    def __init__(self, ring: dict, hasher=None):
         """
 
         :param ring: key:虚拟节点的hash值 val:真实节点
+        :param hasher: 计算key的hash值的函数名(如 crc32,blake2b,fnv1a,murmur3)或函数,默认crc32;同一集群的客户端需使用相同的设置
         """
+        self.hasher = get_hasher(hasher)
         self.ring = ring or {}
-        self.sorted_keys = list(ring.keys())  # 排序之后的虚拟节点的hash值list
-        self.sorted_keys.sort()
+        # 按数值排序的虚拟节点hash值list,以及下标一一对应的真实节点list
+        items = sorted((int(nodehash), node) for nodehash, node in self.ring.items())
+        self.sorted_keys = [nodehash for nodehash, _ in items]
+        self.nodes = [node for _, node in items]
+        # 不重复的真实节点
+        self.node_set = frozenset(self.nodes)
+
+    def hash_key(self, key):
+        """
+        计算key的hash值
+        :param key:
+        :return:
+        """
+        if not isinstance(key, str):
+            key = str(key)
+        return self.hasher(bytes(key, encoding="utf8"))
+
+    def get_index(self, keyhash):
+        """
+        获取hash值在环上顺时针方向第一个虚拟节点的下标
+        :param keyhash:
+        :return:
+        """
+        i = bisect_right(self.sorted_keys, keyhash)
+        if i == len(self.sorted_keys):
+            return 0
+        return i
 
     def get_node(self, key):
         """
@@ -28,15 +59,349 @@ class ConsistencyHash(object):
         :param key:
         :return:
         """
-        bkey = bytes(key, encoding="utf8")
-        keyhash = abs(crc32(bkey))
-        i = 0
-        for nodehash in self.sorted_keys:
-            nodehash = int(nodehash)
-            i += 1
-            if keyhash < nodehash:
-                return self.ring[str(nodehash)]
+        return self.nodes[self.get_index(self.hash_key(key))]
+
+    def iter_nodes(self, key):
+        """
+        从key所在的node开始,沿环顺时针依次获取不重复的真实节点
+        :param key:
+        :return: 真实节点的生成器,第一个为 get_node(key)
+        """
+        node = self.get_node(key)
+        yield node
+        seen = {node}
+        count = len(self.nodes)
+        start = self.get_index(self.hash_key(key))
+        for offset in range(1, count):
+            node = self.nodes[(start + offset) % count]
+            if node not in seen:
+                seen.add(node)
+                yield node
+
+    def get_nodes(self, key, n):
+        """
+        获取key的n个副本所在的node:key所在的node 以及环上顺时针方向的 n-1 个不重复的真实节点
+        :param key:
+        :param n: 副本数量,超过真实节点数量时返回所有真实节点
+        :return: 真实节点list,第一个为 get_node(key)
+        """
+        return list(islice(self.iter_nodes(key), n))
+
+    def get_bounded_nodes(self, key, loads: dict, epsilon, max_spill=2, min_capacity=0):
+        """
+        有界负载(consistent hashing with bounded loads):获取key的候选节点,第一个为未过载的节点
+        候选节点固定为 key所在的node 以及环上顺时针方向的 max_spill 个不重复的真实节点,读取时依次查找即可找到数据;
+        节点的负载加1后超过 (1+epsilon) * 平均负载 时视为过载,溢出到下一个候选节点;所有候选节点都过载时使用key所在的node
+        :param key:
+        :param loads: key:真实节点 val:节点最近的负载(如请求次数)
+        :param epsilon: 允许超过平均负载的比例,如0.25
+        :param max_spill: 最多溢出到key所在的node之后的几个节点
+        :param min_capacity: 节点容量的下限,负载不超过此值时不溢出,避免请求很少时的统计波动导致溢出
+        :return: 候选节点list,第一个为选中的节点,其余按环上的顺序排列
+
+        Usage:
+        >>> ConsistencyHash(ring).get_bounded_nodes('a', {'node_a': 100, 'node_b': 10, 'node_c': 10}, 0.25)
+        >>> ['node_c', 'node_a', 'node_b']
+        """
+        candidates = self.get_nodes(key, max_spill + 1)
+        if len(candidates) < 2:
+            return candidates
+        total = sum(loads.get(node, 0) for node in self.node_set)
+        capacity = max(math.ceil((1 + epsilon) * (total + 1) / len(self.node_set)), min_capacity)
+        for i, node in enumerate(candidates):
+            if loads.get(node, 0) + 1 <= capacity:
+                return [node] + candidates[:i] + candidates[i + 1:]
+        return candidates
+
+    def locate_many(self, keys):
+        """
+        批量定位key所在的node,按node分组
+        :param keys:
+        :return: key:真实节点 val:落在此节点上的key list(保持输入顺序)
+
+        Usage:
+        >>> ConsistencyHash(ring).locate_many(['a', 'b', 'c'])
+        >>> {'redis://127.0.0.1:6379/1': ['a', 'c'], 'redis://127.0.0.1:6380/1': ['b']}
+        """
+        hash_key = self.hash_key
+        get_index = self.get_index
+        nodes = self.nodes
+        groups = {}
+        for key in keys:
+            node = nodes[get_index(hash_key(key))]
+            if node in groups:
+                groups[node].append(key)
             else:
-                continue
-        if i == len(self.sorted_keys):
-            return self.ring[self.sorted_keys[0]]
+                groups[node] = [key]
+        return groups
+
+
+class SlotConsistencyHash(ConsistencyHash):
+    """
+    槽位表一致性hash类
+    根据hash环预先计算出固定数量的槽位,每个槽位对应hash空间中连续的一段,存储此段起点所属真实节点的下标;
+    定位key时只需 一次hash + 一次数组下标访问,与虚拟节点数量无关
+    注意:槽位内跨越虚拟节点边界的少量key会与 ConsistencyHash 定位到不同节点,同一集群的客户端需使用相同的定位方式
+    """
+
+    def __init__(self, ring: dict, slots=65536, hasher=None):
+        """
+
+        :param ring: key:虚拟节点的hash值 val:真实节点
+        :param slots: 槽位数量
+        :param hasher: 计算key的hash值的函数名或函数,默认crc32
+        """
+        super(SlotConsistencyHash, self).__init__(ring, hasher)
+        self.slots = slots
+        # 去重后的真实节点list,槽位表中存储的是此list的下标
+        self.node_urls = sorted(set(self.nodes))
+        if len(self.node_urls) > 65535:
+            raise ValueError('槽位表最多支持65535个真实节点')
+        node_index = {node: i for i, node in enumerate(self.node_urls)}
+        typecode = 'B' if len(self.node_urls) <= 256 else 'H'
+
+        self.slot_table = array(typecode)
+        if self.nodes:
+            self.slot_table.extend(
+                # 槽位slot对应的hash区间起点为 ceil(slot * 2**32 / slots)
+                node_index[self.nodes[self.get_index(-(-(slot << 32) // slots))]]
+                for slot in range(slots)
+            )
+
+    def get_slot(self, key):
+        """
+        获取key所在的槽位
+        :param key:
+        :return:
+        """
+        return (self.hash_key(key) * self.slots) >> 32
+
+    def get_node(self, key):
+        """
+        获取槽位表对应的node
+        :param key:
+        :return:
+        """
+        return self.node_urls[self.slot_table[self.get_slot(key)]]
+
+    def locate_many(self, keys):
+        """
+        批量定位key所在的node,按node分组
+        :param keys:
+        :return: key:真实节点 val:落在此节点上的key list(保持输入顺序)
+        """
+        hash_key = self.hash_key
+        slots = self.slots
+        slot_table = self.slot_table
+        groups = [None] * len(self.node_urls)
+        for key in keys:
+            index = slot_table[(hash_key(key) * slots) >> 32]
+            if groups[index] is None:
+                groups[index] = [key]
+            else:
+                groups[index].append(key)
+        return {self.node_urls[index]: group for index, group in enumerate(groups) if group is not None}
+
+
+class _NodeListConsistencyHash(ConsistencyHash):
+    """
+    只使用真实节点list(不使用虚拟节点的位置)定位节点的一致性hash基类
+    真实节点按url排序,所有客户端得到的顺序相同
+    """
+
+    def __init__(self, ring: dict, hasher=None):
+        """
+
+        :param ring: key:虚拟节点的hash值 val:真实节点
+        :param hasher: 计算key的hash值的函数名或函数,默认crc32
+        """
+        super(_NodeListConsistencyHash, self).__init__(ring, hasher)
+        self.node_urls = sorted(self.node_set)
+
+    def locate_many(self, keys):
+        """
+        批量定位key所在的node,按node分组
+        :param keys:
+        :return: key:真实节点 val:落在此节点上的key list(保持输入顺序)
+        """
+        get_node = self.get_node
+        groups = {}
+        for key in keys:
+            node = get_node(key)
+            if node in groups:
+                groups[node].append(key)
+            else:
+                groups[node] = [key]
+        return groups
+
+
+class JumpConsistencyHash(_NodeListConsistencyHash):
+    """
+    jump consistent hash(Lamping & Veach)
+    不需要虚拟节点,内存占用为O(1),key在节点间分布均匀;
+    注意:只有新增的节点排在最后(按url排序)时才是最少迁移,删除或中间插入节点时迁移的key较多,适合节点很少变化的集群
+    """
+
+    @staticmethod
+    def jump(keyhash, buckets):
+        """
+        把hash值映射到 [0, buckets) 中的一个桶
+        :param keyhash:
+        :param buckets: 桶(真实节点)的数量
+        :return:
+        """
+        key = keyhash & 0xFFFFFFFFFFFFFFFF
+        bucket, j = -1, 0
+        while j < buckets:
+            bucket = j
+            key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+            j = int((bucket + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+        return bucket
+
+    def get_node(self, key):
+        """
+        获取key对应的node
+        :param key:
+        :return:
+        """
+        return self.node_urls[self.jump(self.hash_key(key), len(self.node_urls))]
+
+    def iter_nodes(self, key):
+        """
+        从key所在的node开始,按节点list的顺序依次获取其他真实节点
+        :param key:
+        :return:
+        """
+        node_urls = self.node_urls
+        if not node_urls:
+            return
+        start = self.jump(self.hash_key(key), len(node_urls))
+        for offset in range(len(node_urls)):
+            yield node_urls[(start + offset) % len(node_urls)]
+
+
+class RendezvousConsistencyHash(_NodeListConsistencyHash):
+    """
+    rendezvous hash(最高随机权重,HRW)
+    key对每个真实节点计算权重,权重最大的节点即为key所在的node;增删节点时只迁移此节点上的key,
+    定位一个key的耗时与真实节点数量成正比,适合真实节点较少的集群
+    """
+
+    def __init__(self, ring: dict, hasher=None):
+        """
+
+        :param ring: key:虚拟节点的hash值 val:真实节点
+        :param hasher: 计算key的hash值的函数名或函数,默认crc32
+        """
+        super(RendezvousConsistencyHash, self).__init__(ring, hasher)
+        # (真实节点的hash值, 真实节点) list,计算权重时与key的hash值混合
+        self.node_seeds = [(self.hasher(bytes(node, encoding="utf8")), node) for node in self.node_urls]
+
+    def get_node(self, key):
+        """
+        获取权重最大的node
+        :param key:
+        :return:
+        """
+        keyhash = self.hash_key(key)
+        best_node, best_weight = None, -1
+        for seed, node in self.node_seeds:
+            weight = fmix32(keyhash ^ seed)
+            if weight > best_weight:
+                best_node, best_weight = node, weight
+        return best_node
+
+    def iter_nodes(self, key):
+        """
+        按权重从大到小依次获取真实节点
+        :param key:
+        :return:
+        """
+        keyhash = self.hash_key(key)
+        weights = sorted(((fmix32(keyhash ^ seed), node) for seed, node in self.node_seeds), reverse=True)
+        for _, node in weights:
+            yield node
+
+
+# key:定位算法名(配置 DIS_RING_ALGORITHM 的值) val:一致性hash类
+ALGORITHMS = {
+    'ring': ConsistencyHash,
+    'jump': JumpConsistencyHash,
+    'rendezvous': RendezvousConsistencyHash,
+}
+
+
+def make_consistency_hash(ring: dict, algorithm='ring', hasher=None, slots=None):
+    """
+    根据配置生成一致性hash对象
+    :param ring: key:虚拟节点的hash值 val:真实节点
+    :param algorithm: 定位算法,ring:hash环(默认);jump:jump consistent hash;rendezvous:最高随机权重
+    :param hasher: 计算key的hash值的函数名或函数,默认crc32
+    :param slots: 槽位数量,只对 ring 算法起作用,设置时使用槽位表定位节点
+    :return:
+    """
+    algorithm = algorithm or 'ring'
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f'定位算法只能是 {", ".join(ALGORITHMS)} 之一')
+    if algorithm == 'ring' and slots:
+        return SlotConsistencyHash(ring, slots, hasher)
+    return ALGORITHMS[algorithm](ring, hasher)
+
+
+class FailoverConsistencyHash(object):
+    """
+    故障转移一致性hash类
+    key所在的node不可用时,定位到环上顺时针方向下一个可用的真实节点,不可用节点上的key分散到其后继节点上;
+    其他属性和方法与被包装的一致性hash对象相同
+    """
+
+    def __init__(self, consistency_hash, is_available):
+        """
+
+        :param consistency_hash: ConsistencyHash 或 SlotConsistencyHash 对象
+        :param is_available: 判断真实节点是否可用的函数
+        """
+        self.consistency_hash = consistency_hash
+        self.is_available = is_available
+
+    def __getattr__(self, name):
+        return getattr(self.consistency_hash, name)
+
+    def get_node(self, key):
+        """
+        获取key所在的可用node;所有节点都不可用时返回原来的node
+        :param key:
+        :return:
+        """
+        for node in self.consistency_hash.iter_nodes(key):
+            if self.is_available(node):
+                return node
+        return self.consistency_hash.get_node(key)
+
+    def get_bounded_nodes(self, key, loads: dict, epsilon, max_spill=2, min_capacity=0):
+        """
+        有界负载的候选节点,不可用的节点排在最后
+        :param key:
+        :param loads:
+        :param epsilon:
+        :param max_spill:
+        :param min_capacity:
+        :return:
+        """
+        candidates = self.consistency_hash.get_bounded_nodes(key, loads, epsilon, max_spill, min_capacity)
+        return sorted(candidates, key=lambda node: not self.is_available(node))
+
+    def locate_many(self, keys):
+        """
+        批量定位key所在的可用node,按node分组
+        :param keys:
+        :return: key:真实节点 val:落在此节点上的key list(保持输入顺序)
+        """
+        groups = self.consistency_hash.locate_many(keys)
+        if all(self.is_available(node) for node in groups):
+            return groups
+
+        groups = {}
+        for key in keys:
+            groups.setdefault(self.get_node(key), []).append(key)
+        return groups
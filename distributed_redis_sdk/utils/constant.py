@@ -11,6 +11,17 @@ Usage:
 
 # key:虚拟节点的hash值 到 val:真实节点的映射 dict;redis数据结构为:hash
 HASH_RING_MAP = 'HASH_RING_MAP'
+# hash环的版本号(epoch),manager端每次修改 HASH_RING_MAP 后需要更新此值;redis数据结构为:string
+HASH_RING_VERSION = 'HASH_RING_VERSION'
+# key:真实节点(主节点) 到 val:此节点的只读副本url(多个用英文逗号分隔) 的映射 dict,可以不设置;redis数据结构为:hash
+# 修改后同样需要更新 HASH_RING_VERSION
+HASH_RING_REPLICAS = 'HASH_RING_REPLICAS'
+# 本地缓存清除消息的 pub/sub 频道名前缀,完整频道名为 前缀:DIS_CACHE_PREFIX;消息为json格式的key list,或 * (清空所有)
+NEAR_CACHE_CHANNEL = 'DIS_NEAR_CACHE_INVALIDATE'
+# memoize,cached 重新计算锁的key后缀,完整的key为 缓存key + 后缀;锁写在缓存key所在的节点上
+RECOMPUTE_LOCK_SUFFIX = ':recompute_lock'
+# 释放重新计算锁的lua脚本,锁的值与自己写入的值相同时才删除(锁过期后可能已被其他进程获取)
+RECOMPUTE_UNLOCK_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
 
 # manager redis配置信息
 # manager redis ip地址
@@ -25,3 +36,80 @@ k_redis_db = 'DIS_MANAGER_REDIS_DB'
 k_prefix = 'DIS_CACHE_PREFIX'
 # 缓存默认过期时间,可以不设置,默认300s
 k_default_timeout = 'DIS_CACHE_DEFAULT_TIMEOUT'
+# 本地hash环快照的刷新间隔(秒),可以不设置,默认5s;到期后先比较版本号,版本号变化时才重新拉取 HASH_RING_MAP
+k_ring_refresh_interval = 'DIS_RING_REFRESH_INTERVAL'
+# 槽位表的槽位数量,可以不设置;设置(如65536)后使用固定大小的槽位表定位节点,不设置则在hash环上二分查找
+k_ring_slots = 'DIS_RING_SLOTS'
+# 定位节点的算法,可以不设置,默认ring;ring:hash环(使用 HASH_RING_MAP 中虚拟节点的位置);jump:jump consistent hash;rendezvous:最高随机权重(HRW)
+k_ring_algorithm = 'DIS_RING_ALGORITHM'
+# 计算key的hash值的函数,可以不设置,默认crc32;可选 crc32,blake2b,fnv1a,murmur3;同一集群的客户端需使用相同的设置
+k_ring_hasher = 'DIS_RING_HASHER'
+# 每个node redis连接池的最大连接数,可以不设置;设置后连接用完时阻塞等待空闲连接
+k_node_max_connections = 'DIS_NODE_MAX_CONNECTIONS'
+# 连接池满时等待空闲连接的超时时间(秒),可以不设置,不设置时一直等待
+k_node_pool_timeout = 'DIS_NODE_POOL_TIMEOUT'
+# 连接node redis的超时时间(秒),可以不设置
+k_node_connect_timeout = 'DIS_NODE_CONNECT_TIMEOUT'
+# node redis读写的超时时间(秒),可以不设置
+k_node_socket_timeout = 'DIS_NODE_SOCKET_TIMEOUT'
+# 多节点操作(如get_many)并发执行的线程数,可以不设置,默认8;设置为0或1时按节点顺序串行执行
+k_fan_out_workers = 'DIS_FAN_OUT_WORKERS'
+# redis连接错误/超时时的最多执行次数(包括第一次),可以不设置,默认3;命令错误(ResponseError)不重试
+k_retry_max_attempts = 'DIS_RETRY_MAX_ATTEMPTS'
+# 第一次重试前的等待时间(秒),之后每次翻倍并加随机抖动,可以不设置,默认0.05s
+k_retry_base_delay = 'DIS_RETRY_BASE_DELAY'
+# 单次重试等待时间的上限(秒),可以不设置,默认1s
+k_retry_max_delay = 'DIS_RETRY_MAX_DELAY'
+# 一次调用(包括所有重试)的截止时间(秒),可以不设置,默认3s;等待后会超过截止时间则不再重试
+k_retry_deadline = 'DIS_RETRY_DEADLINE'
+# 节点连续失败(连接错误/超时)多少次后熔断,可以不设置,默认5;设置为0时不熔断
+k_circuit_failure_threshold = 'DIS_CIRCUIT_FAILURE_THRESHOLD'
+# 节点熔断后的冷却时间(秒),可以不设置,默认10s;之后放行一个探测请求,成功则恢复
+k_circuit_cooldown = 'DIS_CIRCUIT_COOLDOWN'
+# 熔断中的调用如何处理,可以不设置,默认raise;raise:抛出 CircuitOpenException;miss:视为缓存未命中,返回空结果
+k_circuit_fail_mode = 'DIS_CIRCUIT_FAIL_MODE'
+# 是否开启故障转移,可以不设置,默认不开启;开启后熔断节点上的key定位到hash环上顺时针方向的下一个可用节点
+k_circuit_failover = 'DIS_CIRCUIT_FAILOVER'
+# 缓存的默认副本数量,可以不设置,默认1;大于1时 cache_set 同时写入hash环上顺时针方向的多个不重复节点,cache_get 主节点不可用时读取其他副本
+k_replication_factor = 'DIS_REPLICATION_FACTOR'
+# 按key前缀设置副本数量的dict,可以不设置;如 {'BEI:user:': 2},多个前缀匹配时使用最长的前缀
+k_replication_prefixes = 'DIS_REPLICATION_PREFIXES'
+# 对冲读的等待时间:节点最近请求耗时的百分位(如95),可以不设置,不设置时不对冲;有副本的读操作超过此时间未返回时,向下一个副本发出相同的请求,使用先返回的结果
+k_hedge_percentile = 'DIS_HEDGE_PERCENTILE'
+# 对冲读等待时间的下限(秒),可以不设置,默认0.005s;节点的样本不足时也使用此值
+k_hedge_min_delay = 'DIS_HEDGE_MIN_DELAY'
+# 是否把只读命令(如GET,MGET,EXISTS,HGETALL)分摊到节点的只读副本(HASH_RING_REPLICAS),可以不设置,默认开启;关闭后所有命令都发送到主节点
+# memoize,cached 的缓存(包括版本号和重新计算锁的轮询),本地缓存的填充总是从主节点读取
+k_read_from_replicas = 'DIS_READ_FROM_REPLICAS'
+# 有界负载一致性hash:允许节点超过平均负载的比例(如0.25),可以不设置,不设置时不开启;开启后 memoize,cached 的缓存在key所在的节点过载时写入环上的后继节点
+k_bounded_load_epsilon = 'DIS_BOUNDED_LOAD_EPSILON'
+# 有界负载最多溢出到key所在的节点之后的几个节点,可以不设置,默认2;读取时最多依次查找这些节点
+k_bounded_load_max_spill = 'DIS_BOUNDED_LOAD_MAX_SPILL'
+# 有界负载节点容量的下限,节点最近的请求次数不超过此值时不溢出,可以不设置,默认100
+k_bounded_load_min_capacity = 'DIS_BOUNDED_LOAD_MIN_CAPACITY'
+# 统计节点负载的时间窗口(秒),可以不设置,默认1s;节点的负载为最近两个窗口的请求次数
+k_bounded_load_window = 'DIS_BOUNDED_LOAD_WINDOW'
+# 本地缓存(L1)最多缓存的条目数量,可以不设置,不设置时不开启本地缓存;开启后 cache_get,get_many,memoize,cached 先读取进程内的缓存
+k_near_cache_max_entries = 'DIS_NEAR_CACHE_MAX_ENTRIES'
+# 本地缓存最多缓存的总字节数(序列化后的大小),可以不设置,不设置时只按条目数量淘汰
+k_near_cache_max_bytes = 'DIS_NEAR_CACHE_MAX_BYTES'
+# 本地缓存的过期时间(秒),可以不设置,默认5s;不超过redis中的剩余过期时间
+k_near_cache_ttl = 'DIS_NEAR_CACHE_TTL'
+# memoize版本号在进程内缓存的时间(秒,如5),可以不设置,不设置时不开启,每次调用都从redis读取版本号
+# 开启后每个进程启动后台线程订阅清除消息(与本地缓存相同)
+# delete_memoized 等修改版本号时广播清除消息,其他进程立即清除;此时间只影响没有收到清除消息的情况
+k_memoize_version_ttl = 'DIS_MEMOIZE_VERSION_TTL'
+# memoize,cached 是否默认开启进程内的单飞,可以不设置,默认不开启;装饰器的 single_flight 参数优先
+# 开启后缓存未命中时,同一个缓存key并发的调用只有一个执行被装饰的函数,其他调用等待并使用它的结果
+k_single_flight = 'DIS_SINGLE_FLIGHT'
+# 单飞中等待正在执行的调用的最长时间(秒),可以不设置,默认5s;超时后自己执行被装饰的函数
+k_single_flight_timeout = 'DIS_SINGLE_FLIGHT_TIMEOUT'
+# memoize,cached 是否默认开启跨进程的重新计算锁,可以不设置,默认不开启;装饰器的 recompute_lock 参数优先
+# 开启后缓存写入软过期时间,软过期后只有抢到锁(数据所在节点上的 SET NX PX)的进程重新计算,其他进程返回旧数据或等待
+k_recompute_lock = 'DIS_RECOMPUTE_LOCK'
+# 软过期之后旧数据仍可读取的时间(秒),可以不设置,默认60s;redis中的过期时间为 缓存时间 + 此时间
+k_stale_ttl = 'DIS_STALE_TTL'
+# 重新计算锁的过期时间(秒),可以不设置,默认10s;应大于被装饰函数的执行时间,持有锁的进程异常退出时锁在此时间后释放
+k_recompute_lock_timeout = 'DIS_RECOMPUTE_LOCK_TIMEOUT'
+# 没有旧数据时,没抢到锁的调用等待新数据的最长时间(秒),可以不设置,默认3s;超时后自己执行被装饰的函数
+k_recompute_wait = 'DIS_RECOMPUTE_WAIT'
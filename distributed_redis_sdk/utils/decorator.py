@@ -7,62 +7,222 @@ create time '2020/7/21 19:03'
 Usage:
 
 """
+import asyncio
+import contextvars
+import random
+import threading
 import time
 from functools import wraps
 
 from redis import RedisError
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 
+from ..log_obj import log
 
-def try_times(repeat_times, sleep_time):
+# 记录当前线程是否已经处于重试中,嵌套的重试装饰器不再重试,只由最外层重试
+_retry_local = threading.local()
+# 记录当前协程是否已经处于重试中(同一线程中的协程不能使用threading.local;asyncio 创建的子任务会复制此值)
+_retry_async_active = contextvars.ContextVar('retry_async_active', default=False)
+
+
+class RetryPolicy(object):
     """
-    针对 redis相关错误,重试给定次数(并且重试之间睡眠给定时间)
-    :param repeat_times: 重试次数
-    :param sleep_time: 间隔时间
-    :return:
+    重试策略类:指数退避 + 随机抖动 + 整体截止时间 + 可重试错误分类
+
+    Usage:
+    >>> policy = RetryPolicy(max_attempts=3, base_delay=0.05, deadline=2)
+    >>> @policy
+    >>> def execute():
+    >>>     ...
+    >>> policy.call(redis_obj.get, 'a')
+    >>> await policy.call_async(async_redis_obj.get, 'a')
     """
 
-    def wrap(f):
+    def __init__(
+            self,
+            max_attempts=3,
+            base_delay=0.05,
+            max_delay=1,
+            deadline=3,
+            jitter=0.5,
+            retryable_errors=(RedisConnectionError, RedisTimeoutError),
+    ):
         """
 
+        :param max_attempts: 最多执行次数(包括第一次)
+        :param base_delay: 第一次重试前的等待时间(秒),之后每次翻倍
+        :param max_delay: 单次等待时间的上限(秒)
+        :param deadline: 从第一次执行开始计算的整体截止时间(秒),等待后会超过截止时间则不再重试;为None时不限制
+        :param jitter: 随机抖动比例(0~1),实际等待时间在 [delay*(1-jitter), delay] 之间随机,避免多个进程同时重试
+        :param retryable_errors: 可以重试的异常类型;其他异常(如 ResponseError 命令错误)直接抛出
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.jitter = jitter
+        self.retryable_errors = retryable_errors
+
+    def is_retryable(self, error):
+        """
+        异常是否可以重试
+        :param error:
+        :return:
+        """
+        return isinstance(error, self.retryable_errors)
+
+    def get_delay(self, attempt):
+        """
+        获取第 attempt 次执行失败后的等待时间
+        :param attempt: 已经执行的次数,从1开始
+        :return:
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(delay * (1 - self.jitter), delay)
+        return delay
+
+    def _retry_delay(self, f, attempt, error, deadline_at):
+        """
+        第 attempt 次执行失败后,获取重试前的等待时间
+        :param f:
+        :param attempt: 已经执行的次数,从1开始
+        :param error: 执行抛出的异常
+        :param deadline_at: 整体截止时间(time.monotonic()),为None时不限制
+        :return: 不能重试时返回None
+        """
+        if not self.is_retryable(error):
+            return None
+        if attempt >= self.max_attempts:
+            log.warning(f'{f.__name__} 执行{attempt}次均失败,然后报错,error:{error!r}')
+            return None
+        delay = self.get_delay(attempt)
+        if deadline_at is not None and time.monotonic() + delay >= deadline_at:
+            log.warning(f'{f.__name__} 执行{attempt}次失败,已到截止时间,然后报错,error:{error!r}')
+            return None
+        log.warning(f'{f.__name__} 第{attempt}次执行失败,{delay:.3f}秒后重试,error:{error!r}')
+        return delay
+
+    def call(self, f, *args, **kwargs):
+        """
+        按照重试策略执行函数
+        已经处于重试中的嵌套调用只执行一次,失败时由最外层统一重试,避免重试次数和等待时间成倍增加
+        注意:截止时间只决定是否继续重试,单次执行的耗时由socket超时时间控制
+        :param f:
+        :param args:
+        :param kwargs:
+        :return:
+        """
+        if getattr(_retry_local, 'active', False):
+            return f(*args, **kwargs)
+
+        _retry_local.active = True
+        try:
+            deadline_at = None if self.deadline is None else time.monotonic() + self.deadline
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    return f(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(f, attempt, e, deadline_at)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+        finally:
+            _retry_local.active = False
+
+    async def call_async(self, f, *args, **kwargs):
+        """
+        call 的异步版,f为异步函数;等待时不阻塞事件循环
         :param f:
+        :param args:
+        :param kwargs:
         :return:
+        """
+        if _retry_async_active.get():
+            return await f(*args, **kwargs)
+
+        token = _retry_async_active.set(True)
+        try:
+            deadline_at = None if self.deadline is None else time.monotonic() + self.deadline
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    return await f(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(f, attempt, e, deadline_at)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+        finally:
+            _retry_async_active.reset(token)
 
-        Usage:
-        >>> @try_times(2, 0.1)
-        >>> def execute():
-        >>>     try:
-        >>>         4 / 0
-        >>>     except Exception as _:
-        >>>         raise
-        >>> execute()
+    def __call__(self, f):
+        """
+        作为装饰器使用
+        :param f:
+        :return:
         """
 
         @wraps(f)
         def decorator(*args, **kwargs):
-            """
-            内部装饰器
-            :param args:
-            :param kwargs:
-            :return:
-            """
-            for _ in range(repeat_times):
-                try:
-                    func_return = f(*args, **kwargs)
-                    return func_return
-                except RedisError as __:
-                    if _ + 1 != repeat_times:
-                        print(f'重试{_ + 1}次')
-                        time.sleep(sleep_time)
-                    else:
-                        print(f'重试{_ + 1}次,然后报错')
-                        raise
-                except Exception as __:  # pylint:disable=try-except-raise
-                    raise
+            return self.call(f, *args, **kwargs)
 
         return decorator
 
-    return wrap
 
+def try_times(repeat_times, sleep_time):
+    """
+    针对 redis相关错误,重试给定次数(并且重试之间睡眠给定时间)
+    兼容旧的用法:所有 RedisError 都重试,等待时间固定,没有截止时间
+    :param repeat_times: 重试次数
+    :param sleep_time: 间隔时间
+    :return:
+
+    Usage:
+    >>> @try_times(2, 0.1)
+    >>> def execute():
+    >>>     try:
+    >>>         4 / 0
+    >>>     except Exception as _:
+    >>>         raise
+    >>> execute()
+    """
+    return RetryPolicy(
+        max_attempts=repeat_times,
+        base_delay=sleep_time,
+        max_delay=sleep_time,
+        deadline=None,
+        jitter=0,
+        retryable_errors=(RedisError,),
+    )
+
+
+# 默认重试策略,对象没有 retry_policy 属性时使用
+default_retry_policy = RetryPolicy()
+
+
+def try_times_default(f):
+    """
+    默认参数,不想在使用时加括号
+    使用第一个参数(如 DistributedRedisSdk对象)的 retry_policy 属性进行重试,没有时使用 default_retry_policy
+    f为异步函数时使用 RetryPolicy.call_async
+    :param f:
+    :return:
+    """
+    if asyncio.iscoroutinefunction(f):
+        @wraps(f)
+        async def async_decorator(*args, **kwargs):
+            policy = getattr(args[0], 'retry_policy', None) if args else None
+            return await (policy or default_retry_policy).call_async(f, *args, **kwargs)
+
+        return async_decorator
+
+    @wraps(f)
+    def decorator(*args, **kwargs):
+        policy = getattr(args[0], 'retry_policy', None) if args else None
+        return (policy or default_retry_policy).call(f, *args, **kwargs)
 
-# 默认参数,不想在使用时加括号
-try_times_default = try_times(3, 5)
+    return decorator
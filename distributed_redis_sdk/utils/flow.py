@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 23:10'
+
+Usage:
+同步和异步客户端共用的控制流程
+流程是生成器函数,需要IO时 yield Call/Sleep,由执行者完成后把结果(或异常)送回生成器:
+run_flow 直接调用,run_flow_async 调用后 await 返回的 awaitable;
+所以定位节点,熔断,副本,有界负载,memoize,cached 等逻辑只写一份,同步版和异步版只有IO不同
+
+>>> def get_flow(self, key):
+...     node_url = self._route_hash((yield Call('get_hash_ring'))).get_node(key)
+...     return (yield Call(self._redis_from_url(node_url).get, key))
+>>> run_flow(get_flow(sdk, 'a'), functools.partial(getattr, sdk))
+>>> await run_flow_async(get_flow(async_sdk, 'a'), functools.partial(getattr, async_sdk))
+"""
+import asyncio
+import inspect
+import time
+
+
+class Call(object):
+    """
+    流程中的一次调用
+    func为方法名时调用执行者的同名方法(同步版为同步客户端的方法,异步版为异步客户端的方法),否则直接调用
+    参数中的 Flow 转换为执行子流程的函数
+    """
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+
+class Sleep(object):
+    """流程中的等待,同步版为 time.sleep,异步版为 asyncio.sleep"""
+    __slots__ = ('seconds',)
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+
+class Flow(object):
+    """
+    作为 Call 的参数传递的子流程(如 _fan_out,_hedged_call 中每个节点的操作)
+    同步版转换为返回结果的函数,异步版转换为返回awaitable的函数
+    """
+    __slots__ = ('factory',)
+
+    def __init__(self, factory):
+        """
+
+        :param factory: 返回流程(生成器)的函数,参数与转换后的函数相同
+        """
+        self.factory = factory
+
+
+def _invoke(op: Call, resolve, wrap):
+    """
+    执行 Call
+    :param op:
+    :param resolve: 通过方法名获取方法的函数
+    :param wrap: 把子流程的 factory 转换为函数的函数
+    :return:
+    """
+    func = op.func
+    if isinstance(func, str):
+        func = resolve(func)
+    args = op.args
+    if any(type(arg) is Flow for arg in args):  # pylint:disable=unidiomatic-typecheck
+        args = [wrap(arg.factory) if type(arg) is Flow else arg for arg in args]  # pylint:disable=unidiomatic-typecheck
+    return func(*args, **op.kwargs)
+
+
+def run_flow(flow, resolve):
+    """
+    同步执行流程
+    :param flow: 流程(生成器)
+    :param resolve: 通过方法名获取方法的函数,如 functools.partial(getattr, 同步客户端)
+    :return: 流程的返回值
+    """
+
+    def wrap(factory):
+        return lambda *args, **kwargs: run_flow(factory(*args, **kwargs), resolve)
+
+    value = error = None
+    while True:
+        try:
+            op = flow.send(value) if error is None else flow.throw(error)
+        except StopIteration as e:
+            return e.value
+        value = error = None
+        try:
+            if type(op) is Sleep:  # pylint:disable=unidiomatic-typecheck
+                time.sleep(op.seconds)
+            else:
+                value = _invoke(op, resolve, wrap)
+        except BaseException as e:  # pylint:disable=broad-except
+            # 异常送回流程,由流程处理或继续抛出
+            error = e
+
+
+async def run_flow_async(flow, resolve):
+    """
+    异步执行流程,Call 返回awaitable时 await 后把结果送回流程
+    :param flow: 流程(生成器)
+    :param resolve: 通过方法名获取方法的函数,如 functools.partial(getattr, 异步客户端)
+    :return: 流程的返回值
+    """
+
+    def wrap(factory):
+        return lambda *args, **kwargs: run_flow_async(factory(*args, **kwargs), resolve)
+
+    value = error = None
+    while True:
+        try:
+            op = flow.send(value) if error is None else flow.throw(error)
+        except StopIteration as e:
+            return e.value
+        value = error = None
+        try:
+            if type(op) is Sleep:  # pylint:disable=unidiomatic-typecheck
+                await asyncio.sleep(op.seconds)
+            else:
+                value = _invoke(op, resolve, wrap)
+                if inspect.isawaitable(value):
+                    value = await value
+        except BaseException as e:  # pylint:disable=broad-except
+            # 包括 asyncio.CancelledError,流程中的 finally 与普通协程一样执行
+            error = e
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 10:12'
+
+Usage:
+本地缓存的hash环快照
+请求路径上直接使用快照,不访问 manager redis;
+快照过期后先获取版本号,版本号变化(或manager端没有版本号)时才重新拉取 HASH_RING_MAP
+"""
+import threading
+import time
+
+from .consistency_hash import ConsistencyHash, make_consistency_hash
+from .redis_action import get_hash_ring_map, get_hash_ring_version, get_read_replicas
+from ..log_obj import log
+
+
+class HashRingSnapshot(object):
+    """hash环快照类"""
+
+    def __init__(self, refresh_interval=5, slots=None, algorithm='ring', hasher=None):
+        """
+
+        :param refresh_interval: 快照刷新间隔(秒)
+        :param slots: 槽位数量,设置时使用槽位表定位节点,否则在hash环上二分查找
+        :param algorithm: 定位算法,见 make_consistency_hash
+        :param hasher: 计算key的hash值的函数名或函数,默认crc32
+        """
+        self.refresh_interval = refresh_interval
+        self.slots = slots
+        self.algorithm = algorithm
+        self.hasher = hasher
+        self.version = None
+        self.hash_map = {}
+        # key:真实节点(主节点) val:此节点的只读副本url list
+        self.read_replicas = {}
+        self.consistency_hash = ConsistencyHash({})
+        self.expire_at = 0
+        # 真实节点(包括只读副本)增删时的回调函数list,参数为当前所有真实节点的set
+        self.node_listeners = []
+        self._lock = threading.Lock()
+
+    def is_expired(self):
+        """
+        快照是否到了刷新时间
+        :return:
+        """
+        return time.monotonic() >= self.expire_at
+
+    def all_nodes(self):
+        """
+        获取所有真实节点,包括只读副本
+        :return:
+        """
+        nodes = set(self.hash_map.values())
+        for urls in self.read_replicas.values():
+            nodes.update(urls)
+        return nodes
+
+    def load(self, hash_map: dict, version=None, read_replicas: dict = None):
+        """
+        用新的map替换快照
+        :param hash_map: key:虚拟节点的hash值 val:真实节点
+        :param version: hash环版本号
+        :param read_replicas: key:真实节点 val:此节点的只读副本url list
+        :return:
+        """
+        old_nodes = self.all_nodes()
+        # 先生成好新的对象再替换,读线程拿到的永远是完整的hash环
+        self.consistency_hash = make_consistency_hash(hash_map, self.algorithm, self.hasher, self.slots)
+        self.hash_map = hash_map
+        self.read_replicas = read_replicas or {}
+        self.version = version
+        log.info(f'hash环快照已更新,version:{version},虚拟节点数:{len(hash_map)},只读副本数:'
+                 f'{sum(len(urls) for urls in self.read_replicas.values())}')
+
+        new_nodes = self.all_nodes()
+        if new_nodes != old_nodes:
+            for listener in self.node_listeners:
+                listener(new_nodes)
+
+    def should_load(self, version, force=False):
+        """
+        根据 manager redis 中的版本号判断是否需要重新拉取 HASH_RING_MAP
+        :param version:
+        :param force: 是否忽略版本号,强制重新拉取
+        :return:
+        """
+        return force or version is None or version != self.version or not self.hash_map
+
+    def delay(self):
+        """
+        推迟到下个刷新周期再刷新
+        :return:
+        """
+        self.expire_at = time.monotonic() + self.refresh_interval
+
+    def refresh(self, manager_redis_obj, force=False):
+        """
+        从 manager redis 刷新快照
+        :param manager_redis_obj:
+        :param force: 是否忽略版本号,强制重新拉取
+        :return:
+        """
+        version = get_hash_ring_version(manager_redis_obj)
+        if self.should_load(version, force):
+            self.load(get_hash_ring_map(manager_redis_obj), version, get_read_replicas(manager_redis_obj))
+        self.delay()
+
+    def get(self, manager_redis_obj):
+        """
+        获取当前的一致性hash对象,过期时进行刷新
+        :param manager_redis_obj:
+        :return:
+        """
+        if not self.is_expired():
+            return self.consistency_hash
+
+        # 已有快照时,其他线程正在刷新则直接使用旧快照,不阻塞请求
+        if not self._lock.acquire(blocking=not self.hash_map):
+            return self.consistency_hash
+        try:
+            if self.is_expired():
+                try:
+                    self.refresh(manager_redis_obj)
+                except Exception:
+                    if not self.hash_map:
+                        raise
+                    # manager redis 不可用时继续使用旧快照,等下个周期再刷新
+                    log.exception('刷新hash环快照失败,继续使用旧快照')
+                    self.delay()
+        finally:
+            self._lock.release()
+        return self.consistency_hash
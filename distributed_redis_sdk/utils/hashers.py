@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 18:20'
+
+Usage:
+定位节点使用的hash函数
+所有hash函数的参数为bytes,返回值为32位无符号整数(与hash环的取值范围 0 ~ 2**32-1 相同)
+
+>>> get_hasher('fnv1a')(b'test')
+>>> 2949673445
+"""
+from hashlib import blake2b
+from zlib import crc32
+
+try:
+    import mmh3
+except ImportError:
+    mmh3 = None
+
+_MASK_32 = 0xFFFFFFFF
+
+
+def crc32_hash(data: bytes):
+    """
+    crc32,默认的hash函数,与 manager端生成虚拟节点hash值的算法相同
+    :param data:
+    :return:
+    """
+    return crc32(data)
+
+
+def blake2b_hash(data: bytes):
+    """
+    blake2b 截取前4个字节,分布均匀,使用标准库的C实现
+    :param data:
+    :return:
+    """
+    return int.from_bytes(blake2b(data, digest_size=4).digest(), 'big')
+
+
+def fnv1a_hash(data: bytes):
+    """
+    32位 FNV-1a
+    :param data:
+    :return:
+    """
+    value = 0x811C9DC5
+    for byte in data:
+        value = ((value ^ byte) * 0x01000193) & _MASK_32
+    return value
+
+
+def fmix32(value: int):
+    """
+    murmur3 的32位最终混合函数,使输入的每一位都影响输出的每一位
+    :param value:
+    :return:
+    """
+    value ^= value >> 16
+    value = (value * 0x85EBCA6B) & _MASK_32
+    value ^= value >> 13
+    value = (value * 0xC2B2AE35) & _MASK_32
+    value ^= value >> 16
+    return value
+
+
+def _murmur3_32(data: bytes, seed=0):
+    """
+    纯python实现的32位 murmur3(x86_32),结果与 mmh3.hash(data, seed, signed=False) 相同
+    :param data:
+    :param seed:
+    :return:
+    """
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    value = seed
+    length = len(data)
+    tail_index = length & ~3
+    for i in range(0, tail_index, 4):
+        k = int.from_bytes(data[i:i + 4], 'little')
+        k = (k * c1) & _MASK_32
+        k = ((k << 15) | (k >> 17)) & _MASK_32
+        k = (k * c2) & _MASK_32
+        value ^= k
+        value = ((value << 13) | (value >> 19)) & _MASK_32
+        value = (value * 5 + 0xE6546B64) & _MASK_32
+
+    tail = data[tail_index:]
+    if tail:
+        k = int.from_bytes(tail, 'little')
+        k = (k * c1) & _MASK_32
+        k = ((k << 15) | (k >> 17)) & _MASK_32
+        k = (k * c2) & _MASK_32
+        value ^= k
+    return fmix32(value ^ length)
+
+
+def murmur3_hash(data: bytes):
+    """
+    32位 murmur3;安装了 mmh3 包时使用其C实现,否则使用纯python实现
+    :param data:
+    :return:
+    """
+    if mmh3 is not None:
+        return mmh3.hash(data, 0, False)
+    return _murmur3_32(data)
+
+
+# key:hash函数名(配置 DIS_RING_HASHER 的值) val:hash函数
+HASHERS = {
+    'crc32': crc32_hash,
+    'blake2b': blake2b_hash,
+    'fnv1a': fnv1a_hash,
+    'murmur3': murmur3_hash,
+}
+
+
+def get_hasher(hasher=None):
+    """
+    获取hash函数
+    :param hasher: hash函数名,或参数为bytes返回32位无符号整数的函数;为None时使用crc32
+    :return:
+    """
+    if hasher is None:
+        return crc32_hash
+    if callable(hasher):
+        return hasher
+    if hasher not in HASHERS:
+        raise ValueError(f'hash函数只能是 {", ".join(HASHERS)} 之一')
+    return HASHERS[hasher]
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 16:40'
+
+Usage:
+node redis 延迟统计
+记录每个节点最近一段时间的请求耗时,计算给定百分位的延迟(如p95),作为对冲读(hedged read)的等待时间
+"""
+import threading
+from collections import deque
+
+
+class LatencyTracker(object):
+    """节点延迟统计类"""
+
+    def __init__(self, window=1000, min_samples=20, refresh_every=50):
+        """
+
+        :param window: 每个节点保留最近多少次请求的耗时
+        :param min_samples: 样本数量少于此值时不计算百分位
+        :param refresh_every: 每记录多少次重新计算一次百分位,其余时间使用缓存的结果
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        # key:节点url val:最近的耗时(秒)
+        self._samples = {}
+        # key:节点url val:记录的总次数
+        self._counts = {}
+        # key:(节点url, 百分位) val:(百分位延迟, 计算时的记录次数)
+        self._cache = {}
+        # 发出的对冲请求次数,以及对冲请求先返回的次数
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, node_url: str, seconds: float):
+        """
+        记录一次请求的耗时
+        :param node_url:
+        :param seconds:
+        :return:
+        """
+        with self._lock:
+            samples = self._samples.get(node_url)
+            if samples is None:
+                samples = self._samples[node_url] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[node_url] = self._counts.get(node_url, 0) + 1
+
+    def percentile(self, node_url: str, percentile):
+        """
+        获取节点最近请求耗时的百分位值
+        :param node_url:
+        :param percentile: 百分位,如95
+        :return: 样本不足时返回None
+        """
+        count = self._counts.get(node_url, 0)
+        cached = self._cache.get((node_url, percentile))
+        if cached is not None and count - cached[1] < self.refresh_every:
+            return cached[0]
+
+        with self._lock:
+            samples = self._samples.get(node_url)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * percentile / 100))]
+        self._cache[(node_url, percentile)] = (value, count)
+        return value
+
+    def hedge_delay(self, node_url: str, percentile, min_delay):
+        """
+        获取对冲读的等待时间:节点延迟的百分位值,不小于 min_delay
+        :param node_url:
+        :param percentile:
+        :param min_delay:
+        :return:
+        """
+        value = self.percentile(node_url, percentile)
+        return min_delay if value is None else max(value, min_delay)
+
+    def sync_nodes(self, node_urls):
+        """
+        hash环节点变化时调用,删除已经移除节点的统计
+        :param node_urls: 当前hash环中所有的真实节点
+        :return:
+        """
+        with self._lock:
+            for node_url in set(self._samples) - set(node_urls):
+                self._samples.pop(node_url, None)
+                self._counts.pop(node_url, None)
+            self._cache = {}
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 19:10'
+
+Usage:
+进程内的本地缓存(L1 near cache)
+缓存 cache_get/get_many 读取并还原后的对象(以及memoize的版本号),命中时不访问redis也不反序列化;
+按LRU淘汰,可以限制条目数量和总字节数(序列化后的大小),本地过期时间不超过redis中的剩余过期时间;
+通过SDK写入/删除key时清除本进程的缓存,并在节点的 pub/sub 频道上广播,其他进程订阅后清除各自的缓存
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from ..log_obj import log
+
+# 广播的消息为此值时,清空所有本地缓存(如 clear())
+CLEAR_ALL = '*'
+
+
+def near_key(key):
+    """
+    本地缓存中使用的key,与广播消息中的key相同(str)
+    :param key:
+    :return:
+    """
+    return key.decode() if isinstance(key, bytes) else str(key)
+
+
+class NearCache(object):
+    """进程内的本地缓存类"""
+
+    def __init__(self, max_entries=10000, max_bytes=None, ttl=5):
+        """
+
+        :param max_entries: 最多缓存的条目数量,为None时不限制
+        :param max_bytes: 最多缓存的总字节数(序列化后的大小),为None时不限制
+        :param ttl: 本地过期时间(秒),不超过redis中的剩余过期时间
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key:缓存key val:(对象, 过期时间, 字节数);按访问顺序排列,最久未访问的在最前
+        self._data = OrderedDict()
+        self.bytes = 0
+        # 命中,未命中,淘汰的次数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 清除缓存的次数;读取redis前后此值变化时,读到的可能是旧数据,不写入本地缓存
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        获取本地缓存的对象
+        :param key:
+        :return: (是否命中, 对象)
+        """
+        entry = self._data.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                pass
+            self.hits += 1
+            return True, entry[0]
+        if entry is not None:
+            self.delete_many([key])
+        self.misses += 1
+        return False, None
+
+    def token(self):
+        """
+        读取redis前获取,写入本地缓存时传入,期间有清除操作则不写入
+        :return:
+        """
+        return self._invalidations
+
+    def set(self, key, value, size: int, remote_ttl=None, token=None):
+        """
+        写入本地缓存
+        :param key:
+        :param value: 还原后的对象
+        :param size: 序列化后的字节数
+        :param remote_ttl: redis中的剩余过期时间(秒),为None或<0时表示永久
+        :param token: 读取redis前 token() 的返回值
+        :return:
+        """
+        ttl = self.ttl if remote_ttl is None or remote_ttl < 0 else min(self.ttl, remote_ttl)
+        if ttl <= 0 or (self.max_bytes and size > self.max_bytes):
+            return
+        with self._lock:
+            if token is not None and token != self._invalidations:
+                return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._data[key] = (value, time.monotonic() + ttl, size)
+            self.bytes += size
+            while self._data and ((self.max_entries and len(self._data) > self.max_entries) or
+                                  (self.max_bytes and self.bytes > self.max_bytes)):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def delete_many(self, keys):
+        """
+        清除本地缓存
+        :param keys:
+        :return:
+        """
+        with self._lock:
+            self._invalidations += 1
+            for key in keys:
+                entry = self._data.pop(key, None)
+                if entry is not None:
+                    self.bytes -= entry[2]
+
+    def clear(self):
+        """
+        清空本地缓存
+        :return:
+        """
+        with self._lock:
+            self._invalidations += 1
+            self._data.clear()
+            self.bytes = 0
+
+    def invalidate_message(self, data):
+        """
+        处理其他进程广播的清除消息
+        :param data: json格式的key list,或 CLEAR_ALL
+        :return:
+        """
+        data = data.decode() if isinstance(data, bytes) else data
+        if data == CLEAR_ALL:
+            self.clear()
+        else:
+            self.delete_many(json.loads(data))
+
+    def stats(self):
+        """
+        获取统计信息
+        :return:
+        """
+        return {
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            'entries': len(self._data), 'bytes': self.bytes,
+        }
+
+
+class NearCacheSubscriber(object):
+    """
+    本地缓存清除消息的订阅类
+    每个节点一个后台线程订阅清除频道;连接断开期间可能错过消息,所以重新订阅前清空本地缓存
+    """
+
+    def __init__(self, near_caches: list, channel: str, redis_from_url):
+        """
+
+        :param near_caches: 收到清除消息时需要清除的本地缓存list
+        :param channel: 清除消息的频道名
+        :param redis_from_url: 根据节点url获取redis对象的函数
+        """
+        self.near_caches = near_caches
+        self.channel = channel
+        self.redis_from_url = redis_from_url
+        # key:节点url val:停止订阅线程的Event
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def sync_nodes(self, node_urls):
+        """
+        hash环节点变化时调用,订阅新增的节点,停止订阅已经移除的节点
+        :param node_urls: 当前hash环中所有的真实节点
+        :return:
+        """
+        with self._lock:
+            for node_url in set(self._threads) - set(node_urls):
+                self._threads.pop(node_url).set()
+            for node_url in set(node_urls) - set(self._threads):
+                stop = threading.Event()
+                self._threads[node_url] = stop
+                threading.Thread(
+                    target=self._listen, args=(node_url, stop), name='DistributedRedisSdkNearCache', daemon=True
+                ).start()
+
+    def _invalidate(self, data=CLEAR_ALL):
+        """
+        清除所有本地缓存
+        :param data: 清除消息,默认清空
+        :return:
+        """
+        for near_cache in self.near_caches:
+            near_cache.invalidate_message(data)
+
+    def _listen(self, node_url, stop):
+        """
+        订阅节点的清除频道,直到 stop 被设置
+        :param node_url:
+        :param stop:
+        :return:
+        """
+        while not stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis_from_url(node_url).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self._invalidate()
+                while not stop.is_set():
+                    message = pubsub.get_message(timeout=1)
+                    if message and message.get('type') == 'message':
+                        self._invalidate(message['data'])
+            except Exception as e:
+                log.warning(f'订阅本地缓存清除频道失败,1秒后重试,node_url:{node_url},error:{e!r}')
+                self._invalidate()
+                stop.wait(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:  # pylint:disable=broad-except
+                        pass
+
+    def close(self):
+        """
+        停止所有订阅线程
+        :return:
+        """
+        self.sync_nodes([])
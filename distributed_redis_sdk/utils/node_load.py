@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 17:30'
+
+Usage:
+node redis 负载统计
+记录每个节点最近的请求次数(当前时间窗口 + 上一个时间窗口),作为有界负载一致性hash(bounded loads)判断节点是否过载的依据
+"""
+import threading
+import time
+
+
+class NodeLoadTracker(object):
+    """节点负载统计类"""
+
+    def __init__(self, window=1):
+        """
+
+        :param window: 时间窗口(秒),节点的负载为当前窗口和上一个窗口的请求次数之和
+        """
+        self.window = window
+        # key:节点url val:当前窗口的请求次数
+        self._counts = {}
+        # key:节点url val:上一个窗口的请求次数
+        self._previous = {}
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        """
+        当前窗口结束时切换到下一个窗口;超过两个窗口没有切换时,上一个窗口的统计也已过期
+        :return:
+        """
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return
+        self._previous = self._counts if elapsed < self.window * 2 else {}
+        self._counts = {}
+        self._window_start = now
+
+    def record(self, node_url: str):
+        """
+        记录一次请求
+        :param node_url:
+        :return:
+        """
+        with self._lock:
+            self._roll()
+            self._counts[node_url] = self._counts.get(node_url, 0) + 1
+
+    def loads(self):
+        """
+        获取所有节点最近的请求次数
+        :return: key:节点url val:请求次数
+        """
+        with self._lock:
+            self._roll()
+            loads = dict(self._previous)
+            for node_url, count in self._counts.items():
+                loads[node_url] = loads.get(node_url, 0) + count
+        return loads
+
+    def sync_nodes(self, node_urls):
+        """
+        hash环节点变化时调用,删除已经移除节点的统计
+        :param node_urls: 当前hash环中所有的真实节点
+        :return:
+        """
+        with self._lock:
+            for node_url in set(self._counts) - set(node_urls):
+                self._counts.pop(node_url, None)
+            for node_url in set(self._previous) - set(node_urls):
+                self._previous.pop(node_url, None)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 11:05'
+
+Usage:
+node redis 连接池注册表
+每个node redis url 对应一个长期复用的连接池和redis对象,只在hash环增删节点时才关闭对应连接池
+"""
+import threading
+
+from redis import BlockingConnectionPool, ConnectionPool, Redis
+
+from ..log_obj import log
+
+
+class NodePoolRegistry(object):
+    """node redis 连接池注册表类"""
+
+    def __init__(self, max_connections=None, socket_connect_timeout=None, socket_timeout=None, pool_timeout=None):
+        """
+
+        :param max_connections: 每个节点连接池的最大连接数,不设置时不限制;设置后连接用完时阻塞等待 pool_timeout 秒
+        :param socket_connect_timeout: 建立连接的超时时间(秒)
+        :param socket_timeout: 读写的超时时间(秒)
+        :param pool_timeout: 连接池满时等待空闲连接的超时时间(秒)
+        """
+        self.max_connections = max_connections
+        self.socket_connect_timeout = socket_connect_timeout
+        self.socket_timeout = socket_timeout
+        self.pool_timeout = pool_timeout
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _create_pool(self, node_url: str):
+        """
+        创建节点的连接池
+        :param node_url:
+        :return:
+        """
+        kwargs = {
+            'socket_connect_timeout': self.socket_connect_timeout,
+            'socket_timeout': self.socket_timeout,
+        }
+        if self.max_connections:
+            return BlockingConnectionPool.from_url(
+                node_url, max_connections=self.max_connections, timeout=self.pool_timeout, **kwargs
+            )
+        return ConnectionPool.from_url(node_url, **kwargs)
+
+    def get_client(self, node_url: str):
+        """
+        获取节点的redis对象,不存在时创建
+        注意:此处获取的redis对象是直接从redis包导入的,可以进行任何操作,不会对 execute_command进行修改
+        :param node_url:
+        :return:
+        """
+        client = self._clients.get(node_url)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(node_url)
+                if client is None:
+                    client = Redis(connection_pool=self._create_pool(node_url))
+                    self._clients[node_url] = client
+        return client
+
+    def get_pool(self, node_url: str):
+        """
+        获取节点的连接池
+        :param node_url:
+        :return:
+        """
+        return self.get_client(node_url).connection_pool
+
+    def sync_nodes(self, node_urls):
+        """
+        hash环节点变化时调用,关闭已经移除节点的连接池
+        :param node_urls: 当前hash环中所有的真实节点
+        :return:
+        """
+        with self._lock:
+            removed = set(self._clients) - set(node_urls)
+            for node_url in removed:
+                self._clients.pop(node_url).connection_pool.disconnect()
+                log.info(f'节点已从hash环移除,关闭连接池,node_url:{node_url}')
+
+    def disconnect(self):
+        """
+        关闭所有节点的连接池
+        :return:
+        """
+        with self._lock:
+            for client in self._clients.values():
+                client.connection_pool.disconnect()
+            self._clients = {}
@@ -10,7 +10,7 @@ Usage:
 
 from redis import Redis
 
-from .constant import HASH_RING_MAP
+from .constant import HASH_RING_MAP, HASH_RING_VERSION, HASH_RING_REPLICAS
 from .decorator import try_times_default
 from .transform import byte2str
 
@@ -60,6 +60,45 @@ def get_hash_ring_map(redis_obj):
     return new_dict
 
 
+def format_read_replicas(_dict: dict):
+    """
+    格式化manager redis中 HASH_RING_REPLICAS 的数据
+    :param _dict: key:主节点url val:只读副本url,多个用英文逗号分隔
+    :return: key:主节点url val:只读副本url list
+
+    Usage:
+    >>> format_read_replicas({b'redis://127.0.0.1:6379/1': b'redis://127.0.0.1:6389/1,redis://127.0.0.1:6399/1'})
+    >>> {'redis://127.0.0.1:6379/1': ['redis://127.0.0.1:6389/1', 'redis://127.0.0.1:6399/1']}
+    """
+    new_dict = {}
+    for k, v in _dict.items():
+        urls = [url.strip() for url in byte2str(v).split(',') if url.strip()]
+        if urls:
+            new_dict[byte2str(k)] = urls
+    return new_dict
+
+
+@try_times_default
+def get_read_replicas(redis_obj):
+    """
+    获取manager redis中每个节点的只读副本
+    :return: key:主节点url val:只读副本url list;manager端没有设置时返回空dict
+    """
+    return format_read_replicas(redis_obj.hgetall(HASH_RING_REPLICAS))
+
+
+@try_times_default
+def get_hash_ring_version(redis_obj):
+    """
+    获取manager redis中hash环的版本号
+    :return: 版本号字符串;manager端没有设置版本号时返回None
+    """
+    version = redis_obj.get(HASH_RING_VERSION)
+    if version is None:
+        return None
+    return byte2str(version)
+
+
 def get_redis_obj(*args, **kwargs):
     """
     获取 操作redis的对象
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 21:40'
+
+Usage:
+进程内的单飞(single-flight)
+同一个key同时只有一个调用执行,其他并发的调用等待它的结果(等待有上限,超时后自己执行);
+memoize,cached 缓存未命中时用缓存key合并并发的调用,热点缓存过期时只有一个线程/协程执行被装饰的函数
+"""
+import asyncio
+import threading
+
+
+class _Call(object):
+    """正在执行的同步调用"""
+    __slots__ = ('event', 'result', 'error', 'finished')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        # 是否正常结束(返回结果或抛出 Exception);被 BaseException(如 KeyboardInterrupt)中断时为False
+        self.finished = False
+
+
+class SingleFlight(object):
+    """
+    单飞类,同步调用按线程合并,异步调用按事件循环合并
+
+    Usage:
+    >>> single_flight = SingleFlight(timeout=5)
+    >>> single_flight.do('key', lambda: load_from_db())
+    >>> await single_flight.do_async('key', lambda: async_load_from_db())
+    """
+
+    def __init__(self, timeout=5):
+        """
+
+        :param timeout: 等待正在执行的调用的最长时间(秒),超时后自己执行
+        """
+        self.timeout = timeout
+        # key:key val:正在执行的同步调用
+        self._calls = {}
+        # key:(事件循环, key) val:正在执行的异步调用的Future
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        # 自己执行的次数,使用其他调用结果(被合并)的次数,等待超时后自己执行的次数
+        self._leaders = 0
+        self._coalesced = 0
+        self._timeouts = 0
+
+    def do(self, key, fn):
+        """
+        执行fn;同一个key已经有调用在执行时,等待并返回它的结果(包括抛出的异常)
+        执行的调用没有正常结束(被 BaseException 中断)时,等待的调用自己执行
+        :param key:
+        :param fn: 没有参数的函数
+        :return: fn的返回值
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+
+        if not leader:
+            if not call.event.wait(self.timeout):
+                with self._lock:
+                    self._timeouts += 1
+                return fn()
+            if not call.finished:
+                return fn()
+            with self._lock:
+                self._coalesced += 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            call.finished = True
+            return call.result
+        except Exception as e:
+            call.error = e
+            call.finished = True
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.event.set()
+
+    async def do_async(self, key, fn):
+        """
+        do 的异步版,只合并同一个事件循环中的调用
+        :param key:
+        :param fn: 没有参数,返回awaitable对象的函数
+        :return: fn返回的awaitable对象的结果
+        """
+        loop = asyncio.get_event_loop()
+        flight_key = (loop, key)
+        with self._lock:
+            future = self._async_calls.get(flight_key)
+            leader = future is None
+            if leader:
+                future = self._async_calls[flight_key] = loop.create_future()
+                self._leaders += 1
+
+        if not leader:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                if not future.done():
+                    with self._lock:
+                        self._timeouts += 1
+                    return await fn()
+                # 执行的协程抛出的 TimeoutError
+                with self._lock:
+                    self._coalesced += 1
+                raise
+            except asyncio.CancelledError:
+                # 执行的协程被取消(或被 BaseException 中断)时自己执行;否则是当前协程被取消
+                if not future.cancelled():
+                    raise
+                return await fn()
+            except Exception:
+                # 与同步版相同,使用执行的协程抛出的异常也计为被合并
+                with self._lock:
+                    self._coalesced += 1
+                raise
+            with self._lock:
+                self._coalesced += 1
+            return result
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # 标记异常已被获取,没有等待的调用时不打印 "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                if self._async_calls.get(flight_key) is future:
+                    del self._async_calls[flight_key]
+            if not future.done():
+                future.cancel()
+
+    def stats(self):
+        """
+        获取统计信息
+        :return: leaders:自己执行的次数 coalesced:被合并(使用其他调用结果)的次数 timeouts:等待超时后自己执行的次数
+                 in_flight:正在执行的调用数量
+        """
+        with self._lock:
+            return {
+                'leaders': self._leaders,
+                'coalesced': self._coalesced,
+                'timeouts': self._timeouts,
+                'in_flight': len(self._calls) + len(self._async_calls),
+            }
@@ -12,7 +12,9 @@ import base64
 import inspect
 import pickle
 import string
+import struct
 import uuid
+from collections import OrderedDict
 
 
 def str2byte(_str):
@@ -33,6 +35,20 @@ def byte2str(_bytes):
     return str(_bytes, encoding="utf-8")
 
 
+def merge_config(app_config, *configs):
+    """
+    合并配置,后面的配置覆盖前面的配置
+    :param app_config: 基础配置,如 Flask app.config
+    :param configs: 值为None时跳过
+    :return:
+    """
+    basic_config = dict(app_config)
+    for config in configs:
+        if config:
+            basic_config.update(config)
+    return basic_config
+
+
 def normalize_timeout(timeout, default_timeout):
     """
     过滤缓存的过期时间
@@ -47,10 +63,18 @@ def normalize_timeout(timeout, default_timeout):
     return timeout
 
 
-def dump_object(value):
+# 带软过期时间的数据的开头:标记 + 8字节的软过期时间戳(大端double)
+SOFT_EXPIRY_MARK = b"~"
+SOFT_EXPIRY_HEADER_LEN = 9
+
+
+def dump_object(value, soft_expire_at=None):
     """Dumps an object into a string for redis.  By default it serializes
     integers as regular string and pickle dumps everything else.
+    soft_expire_at不为None时,在数据前添加软过期时间(unix时间戳),需要通过 load_entry 读取
     """
+    if soft_expire_at is not None:
+        return SOFT_EXPIRY_MARK + struct.pack(">d", soft_expire_at) + dump_object(value)
     t = type(value)
     if t == int:
         return str(value).encode("ascii")
@@ -75,6 +99,26 @@ def load_object(value):
         return value
 
 
+def load_entry(value):
+    """
+    还原数据,并获取 dump_object 写入的软过期时间
+    :param value: redis中的二进制数据,可以为None
+    :return: (对象, 软过期时间戳) 没有软过期时间时为None
+    """
+    if value is not None and value.startswith(SOFT_EXPIRY_MARK) and len(value) > SOFT_EXPIRY_HEADER_LEN:
+        return load_object(value[SOFT_EXPIRY_HEADER_LEN:]), struct.unpack(">d", value[1:SOFT_EXPIRY_HEADER_LEN])[0]
+    return load_object(value), None
+
+
+def load_entry_object(value):
+    """
+    还原 dump_object 写入的数据,有软过期时间时忽略软过期时间;memoize,cached 关闭重新计算锁时读取缓存使用
+    :param value: redis中的二进制数据,可以为None
+    :return:
+    """
+    return load_entry(value)[0]
+
+
 def iteritems_wrapper(mappingorseq):
     """Wrapper for efficient iteration over mappings represented by dicts
     or sequences::
@@ -218,3 +262,87 @@ def function_namespace(f, args=None):
         ins = None
 
     return ns, ins
+
+
+def compile_function_namespace(f):
+    """
+    预先分析函数,生成计算 function_namespace(f, args) 的函数;
+    命名空间字符串只生成一次,调用时只有实例方法需要根据 args[0] 计算实例的标识
+    :param f: memoize装饰的函数
+    :return: 参数为函数调用时的args,返回值与 function_namespace(f, args) 相同
+    """
+    m_args = get_arg_names(f)
+    if (not hasattr(f, "__qualname__") or getattr(f, "__self__", None) is not None or
+            (m_args and m_args[0] == "cls")):
+        # 绑定方法,类方法等少见的情况,每次调用时重新分析
+        return lambda args=None: function_namespace(f, args)
+
+    name = ".".join((f.__module__, f.__qualname__))
+    ns = name.translate(*null_control)
+    if not (m_args and m_args[0] == "self"):
+        return lambda args=None: (ns, None)
+
+    # translate 按字符替换,可以只替换实例标识,再与替换过的前缀拼接
+    ins_prefix = (name + ".").translate(*null_control)
+
+    def namespace(args=None):
+        instance_token = get_id(args[0]) if args else None
+        if not instance_token:
+            return ns, None
+        return ns, ins_prefix + instance_token.translate(*null_control)
+
+    return namespace
+
+
+def compile_kwargs_to_args(f):
+    """
+    预先分析函数签名,生成把调用时的参数转换为缓存key参数的函数:
+    按签名把关键字参数放到对应的位置上,未传的参数使用默认值(默认值为假时为None),self/cls使用实例的标识,
+    其余的关键字参数按名称排序
+    :param f: memoize装饰的函数
+    :return: 参数为 (args, kwargs),返回 (tuple, OrderedDict)
+    """
+    arg_names = get_arg_names(f)
+    args_len = len(arg_names)
+    parameters = list(inspect.signature(f).parameters.values())
+    # 与 get_arg_default(f, i) 相同,按所有参数中的位置获取默认值;是否为假在调用时判断(默认值可能是可变对象)
+    defaults = tuple(
+        None if parameter.default is inspect.Parameter.empty else parameter.default
+        for parameter in parameters[:args_len]
+    )
+    bind_self = bool(arg_names) and arg_names[0] in ("self", "cls")
+    # 会放到对应位置上的关键字参数名
+    positional_names = frozenset(arg_names[1:] if bind_self else arg_names)
+
+    def kwargs_to_args(args, kwargs):
+        if not kwargs:
+            # 没有关键字参数时,参数的位置与调用时相同
+            new_args = tuple(args)
+            if len(args) < args_len:
+                new_args += tuple(default or None for default in defaults[len(args):])
+            if bind_self:
+                new_args = (get_id(args[0]),) + new_args[1:]
+            return new_args, OrderedDict()
+
+        new_args = []
+        arg_num = 0
+        for i, arg_name in enumerate(arg_names):
+            if i == 0 and bind_self:
+                arg = get_id(args[0])
+                arg_num += 1
+            elif arg_name in kwargs:
+                arg = kwargs[arg_name]
+            elif arg_num < len(args):
+                arg = args[arg_num]
+                arg_num += 1
+            else:
+                arg = defaults[i] or None
+                arg_num += 1
+            new_args.append(arg)
+        new_args.extend(args[args_len:])
+        return (
+            tuple(new_args),
+            OrderedDict(sorted((k, v) for k, v in kwargs.items() if k not in positional_names)),
+        )
+
+    return kwargs_to_args
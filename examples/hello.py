@@ -42,6 +42,18 @@ def api_execute(key, val):
     return json_resp(redis.get(key))
 
 
+@app.route("/api/pipeline/<string:key>/<string:val>")
+def api_pipeline(key, val):
+    """
+    测试 pipeline 函数
+    :return:
+    """
+    pipe = redis.pipeline()
+    pipe.set(key, val).get(key).delete(key).get(key)
+    result = [byte2str(item) if isinstance(item, bytes) else item for item in pipe.execute()]
+    return json_resp(result)
+
+
 @app.route("/api/set_many")
 def api_set_many():
     """
@@ -54,8 +66,11 @@ def api_set_many():
     if timeout:
         timeout = int(timeout)
     use_prefix = bool(int(parmas.get('use_prefix')))
+    timeouts = parmas.get('timeouts')
+    if timeouts:
+        timeouts = json.loads(timeouts)
 
-    result = redis.set_many(mapping, timeout, use_prefix)
+    result = redis.set_many(mapping, timeout, use_prefix, timeouts)
     return json_resp(result)
 
 
@@ -23,13 +23,12 @@ package_data = {
 }
 
 requires = [
-    'redis==3.5.3',
     'click==7.1.2',
     'Flask==1.1.2',
     'itsdangerous==1.1.0',
     'Jinja2==2.11.2',
     'MarkupSafe==1.1.1',
-    'redis==3.5.3',
+    'redis==4.6.0',
     'Werkzeug==1.0.1',
 ]
 
@@ -52,7 +51,7 @@ setup(
     data_files=file_data,
     include_package_data=True,
     package_data=package_data,
-    python_requires=">=3.0, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*",
+    python_requires=">=3.7",
     install_requires=requires,
     zip_safe=False,
     classifiers=[
@@ -61,10 +60,11 @@ setup(
         'Natural Language :: English',
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
         'Programming Language :: Python :: Implementation :: CPython',
         'Programming Language :: Python :: Implementation :: PyPy'
     ],
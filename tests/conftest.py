@@ -7,6 +7,7 @@ create time '2020/7/22 14:31'
 Usage:
 
 """
+import asyncio
 import json
 import random
 from datetime import datetime
@@ -29,6 +30,7 @@ class Config(object):
     DIS_MANAGER_REDIS_PASSWORD = ''
     DIS_MANAGER_REDIS_DB = '13'
     DIS_CACHE_PREFIX = 'BEI:'
+    DIS_REPLICATION_PREFIXES = {'BEI:replicated:': 2}
 
 
 app.config.from_object(Config)
@@ -55,6 +57,18 @@ def api_execute(key, val):
     return json_resp(result)
 
 
+@app.route("/api/pipeline/<string:key>/<string:val>")
+def api_pipeline(key, val):
+    """
+    测试 pipeline 函数
+    :return:
+    """
+    pipe = redis.pipeline()
+    pipe.set(key, val).get(key).delete(key).get(key)
+    result = [byte2str(item) if isinstance(item, bytes) else item for item in pipe.execute()]
+    return json_resp(result)
+
+
 @app.route("/api/set_many")
 def api_set_many():
     """
@@ -67,8 +81,11 @@ def api_set_many():
     if timeout:
         timeout = int(timeout)
     use_prefix = bool(int(parmas.get('use_prefix')))
+    timeouts = parmas.get('timeouts')
+    if timeouts:
+        timeouts = json.loads(timeouts)
 
-    result = redis.set_many(mapping, timeout, use_prefix)
+    result = redis.set_many(mapping, timeout, use_prefix, timeouts)
     return json_resp(result)
 
 
@@ -138,6 +155,19 @@ def api_delete_many():
     return json_resp(redis.delete_many(keys, use_prefix))
 
 
+@app.route("/api/delete_many/replicated/<string:key>")
+def api_delete_many_replicated(key):
+    """
+    测试 delete_many 删除有副本的key,返回删除数量和删除后各副本节点上的数据
+    :return:
+    """
+    redis.cache_set(f'replicated:{key}', 1, use_prefix=True)
+    result = redis.delete_many([f'replicated:{key}'], use_prefix=True)
+    full_key = f'BEI:replicated:{key}'
+    node_urls = redis._get_replica_nodes(redis.get_hash_ring(), full_key)
+    return json_resp([result, [redis._redis_from_url(node_url).get(full_key) for node_url in node_urls]])
+
+
 @app.route("/api/clear/<int:use_prefix>")
 def api_clear(use_prefix):
     """
@@ -199,6 +229,81 @@ def memoize(a, b):
     return json_resp(str(_add(a, b)))
 
 
+@redis.memoize(1)
+async def _add_async(a, b):
+    """
+    测试异步函数缓存 的装饰器
+    :param a:
+    :param b:
+    :return:
+    """
+    return a + b + random.randrange(0, 1000)
+
+
+@app.route("/api/memoize_async/<int:a>/<int:b>")
+def memoize_async(a, b):
+    """
+    测试异步函数缓存 的装饰器
+    :param a:
+    :param b:
+    :return:
+    """
+    return json_resp(str(asyncio.run(_add_async(a, b))))
+
+
+@redis.memoize(1, recompute_lock=True)
+def _add_stale(a, b):
+    """
+    测试 开启重新计算锁的函数缓存
+    :param a:
+    :param b:
+    :return:
+    """
+    return a + b + random.randrange(0, 1000)
+
+
+@app.route("/api/memoize_stale/<int:a>/<int:b>")
+def memoize_stale(a, b):
+    """
+    测试 开启重新计算锁的函数缓存
+    :param a:
+    :param b:
+    :return:
+    """
+    return json_resp(str(_add_stale(a, b)))
+
+
+@app.route("/api/memoize_stale/lock/<int:a>/<int:b>")
+def memoize_stale_lock(a, b):
+    """
+    测试 其他进程持有重新计算锁
+    :param a:
+    :param b:
+    :return:
+    """
+    cache_key = redis._use_prefix(_add_stale.make_cache_key(_add_stale.uncached, a, b), True)
+    return json_resp(redis._recompute_lock_acquire(cache_key) is not None)
+
+
+@app.route("/api/memoize/empty_replica/<int:a>/<int:b>")
+def memoize_empty_replica(a, b):
+    """
+    测试 节点的只读副本(HASH_RING_REPLICAS)没有数据时,memoize 仍然可以命中缓存
+    :param a:
+    :param b:
+    :return:
+    """
+    hash_ring = redis.hash_ring
+    read_replicas = hash_ring.read_replicas
+    # 使用 manager redis 中没有数据的db作为所有节点的只读副本
+    empty_replica = f'redis://{Config.DIS_MANAGER_REDIS_HOST}:{Config.DIS_MANAGER_REDIS_PORT}/14'
+    hash_ring.read_replicas = {node_url: [empty_replica] for node_url in redis._get_all_node_url()}
+    try:
+        return json_resp([str(_add(a, b)), str(_add(a, b))])
+    finally:
+        hash_ring.read_replicas = read_replicas
+
+
 @app.route("/api/memoize/delete")
 def delete_cache():
     """
@@ -210,6 +315,16 @@ def delete_cache():
     return json_resp(result)
 
 
+@app.route("/api/memoize/reset")
+def reset_cache():
+    """
+    测试 重置函数的版本号,函数的所有缓存失效
+    :return:
+    """
+    result = redis.delete_memoized(_add)
+    return json_resp(result)
+
+
 @pytest.fixture
 def client():
     """ 构建测试用例
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 22:30'
+
+Usage:
+异步客户端的测试,节点和 manager redis 使用 fakeredis 的异步连接,不需要真实的redis
+需要安装 fakeredis>=2.0(见 requirements.txt)
+"""
+import asyncio
+import random
+from zlib import crc32
+
+import pytest
+from flask import Flask
+
+from distributed_redis_sdk import DistributedRedisSdk
+from distributed_redis_sdk.async_sdk import AsyncDistributedRedisSdk, AsyncNodePoolRegistry, aioredis
+from distributed_redis_sdk.utils import HASH_RING_MAP
+
+fakeredis = pytest.importorskip('fakeredis')
+fake_aioredis = pytest.importorskip('fakeredis.aioredis')
+if aioredis is None:
+    pytest.skip('不能使用 redis.asyncio', allow_module_level=True)
+
+NODES = ['redis://127.0.0.1:7001/0', 'redis://127.0.0.1:7002/0', 'redis://127.0.0.1:7003/0']
+CONFIG = {'DIS_CACHE_PREFIX': 'ASYNC:', 'DIS_REPLICATION_PREFIXES': {'ASYNC:replicated:': 2}}
+
+
+class FakeNodePoolRegistry(AsyncNodePoolRegistry):
+    """
+    每个节点连接到各自的 fakeredis 服务
+    """
+
+    def __init__(self, servers: dict):
+        super(FakeNodePoolRegistry, self).__init__()
+        self.servers = servers
+
+    def _create_pool(self, node_url: str):
+        return aioredis.ConnectionPool(connection_class=fake_aioredis.FakeConnection, server=self.servers[node_url])
+
+
+async def make_client(servers: dict, config=None):
+    """
+    创建连接到 fakeredis 的异步客户端,hash环中有3个节点
+    """
+    client = AsyncDistributedRedisSdk(config=dict(CONFIG, **(config or {})))
+    client.node_pool = FakeNodePoolRegistry(servers)
+    client.manager_redis_obj = fake_aioredis.FakeRedis(server=fakeredis.FakeServer())
+    for node_url in NODES:
+        for i in range(8):
+            await client.manager_redis_obj.hset(HASH_RING_MAP, str(crc32(f'{node_url}#{i}'.encode())), node_url)
+    return client
+
+
+def run(main, config=None):
+    """
+    在新的事件循环中执行 main(client, servers)
+    """
+    servers = {node_url: fakeredis.FakeServer() for node_url in NODES}
+
+    async def wrapper():
+        return await main(await make_client(servers, config), servers)
+
+    return asyncio.run(wrapper())
+
+
+class TestAsync:
+
+    def test_get_set(self):
+        """ 测试 get,set 定位到节点
+        """
+
+        async def main(client, servers):
+            assert await client.set('async_a', 1)
+            assert await client.get('async_a') == b'1'
+            node_url = (await client.get_hash_ring()).get_node('async_a')
+            assert await client.node_pool.get_client(node_url).get('async_a') == b'1'
+            assert await client.cache_set('async_b', {'x': 1}, 10, use_prefix=True)
+            return await client.cache_get('async_b', use_prefix=True)
+
+        assert run(main) == {'x': 1}
+
+    def test_get_many(self):
+        """ 测试 set_many,get_many 按节点分组后合并结果,结果按输入的顺序返回
+        """
+        keys = [f'async_many_{i}' for i in range(20)]
+
+        async def main(client, servers):
+            assert await client.set_many({key: i for i, key in enumerate(keys)}, 10) == dict.fromkeys(keys, True)
+            return await client.get_many(keys + ['async_none'])
+
+        assert run(main) == list(range(20)) + [None]
+
+    def test_delete_many(self):
+        """ 测试 delete_many 删除多个节点上的key,有副本的key删除所有副本节点上的数据
+        """
+
+        async def main(client, servers):
+            await client.set_many({'async_c': 1, 'async_d': 2}, 10)
+            await client.cache_set('replicated:e', 1, use_prefix=True)
+            node_urls = (await client.get_hash_ring()).get_nodes('ASYNC:replicated:e', 2)
+            assert [await client.node_pool.get_client(url).exists('ASYNC:replicated:e') for url in node_urls] == [1, 1]
+            deleted = await client.delete_many(['async_c', 'async_d', 'async_none'])
+            deleted += await client.delete_many(['replicated:e'], use_prefix=True)
+            exists = [await client.node_pool.get_client(url).exists('ASYNC:replicated:e') for url in node_urls]
+            return deleted, exists, await client.get_many(['async_c', 'async_d'])
+
+        assert run(main) == (3, [0, 0], [None, None])
+
+    def test_retry(self):
+        """ 测试 异步客户端使用与同步版相同的重试策略
+        """
+        calls = []
+
+        async def main(client, servers):
+            execute = client._execute_on_node
+
+            async def flaky(node_url, *args, **options):
+                calls.append(1)
+                if len(calls) == 1:
+                    raise aioredis.ConnectionError('connection reset')
+                return await execute(node_url, *args, **options)
+
+            client._execute_on_node = flaky
+            return await client.set('async_f', 1)
+
+        assert run(main, {'DIS_RETRY_BASE_DELAY': 0.01})
+        assert len(calls) == 2
+
+    def test_memoize(self):
+        """ 测试 异步函数的 memoize 通过异步客户端读写缓存,第二次调用命中
+        """
+        app = Flask(__name__)
+        # 同步版 sdk 初始化时连接 manager redis,与其他测试使用相同的配置;缓存读写走注入的异步客户端
+        app.config.update(DIS_MANAGER_REDIS_HOST='127.0.0.1', DIS_MANAGER_REDIS_PORT='6379', DIS_MANAGER_REDIS_DB='13',
+                          DIS_CACHE_PREFIX='ASYNC:')
+        sdk = DistributedRedisSdk(app)
+        calls = []
+
+        @sdk.memoize(10)
+        async def add(a, b):
+            calls.append(1)
+            return a + b + random.random()
+
+        async def main(client, servers):
+            sdk._async_clients[asyncio.get_event_loop()] = client
+            return [await add(1, 2), await add(1, 2)]
+
+        first, second = run(main)
+        assert first == second
+        assert len(calls) == 1
+
+    def test_recompute_lock(self):
+        """ 测试 异步函数开启重新计算锁:其他进程持有锁时返回旧数据,锁释放后并发调用只重新计算一次;
+        没有旧数据时等待,持有锁的进程释放锁后自己计算
+        """
+        app = Flask(__name__)
+        app.config.update(DIS_MANAGER_REDIS_HOST='127.0.0.1', DIS_MANAGER_REDIS_PORT='6379', DIS_MANAGER_REDIS_DB='13',
+                          DIS_CACHE_PREFIX='ASYNC:')
+        sdk = DistributedRedisSdk(app)
+        calls = []
+
+        @sdk.memoize(1, recompute_lock=True)
+        async def add(a, b):
+            calls.append(1)
+            await asyncio.sleep(0.2)
+            return len(calls)
+
+        async def main(client, servers):
+            sdk._async_clients[asyncio.get_event_loop()] = client
+            first = await add(1, 2)
+            # 睡眠1.1s后 软过期
+            await asyncio.sleep(1.1)
+            key = sdk._use_prefix(await add.make_cache_key_async(add.uncached, 1, 2), True)
+            token = await client._recompute_lock_acquire(key)
+            held = await add(1, 2)
+            await client._recompute_lock_release(key, token)
+            results = await asyncio.gather(*[add(1, 2) for _ in range(5)])
+
+            key = sdk._use_prefix(await add.make_cache_key_async(add.uncached, 3, 4), True)
+            token = await client._recompute_lock_acquire(key)
+
+            async def release():
+                await asyncio.sleep(0.2)
+                await client._recompute_lock_release(key, token)
+
+            waited = (await asyncio.gather(add(3, 4), release()))[0]
+            return first, held, results, waited
+
+        first, held, results, waited = run(main)
+        assert (first, held) == (1, 1)
+        assert set(results) == {1, 2}
+        assert waited == 3
+        assert len(calls) == 3
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 15:45'
+
+Usage:
+
+"""
+import time
+
+import pytest
+
+from distributed_redis_sdk.exception import CircuitOpenException
+from distributed_redis_sdk.utils import CircuitBreaker, CIRCUIT_CLOSED, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN, miss_result
+
+
+class TestCircuitBreaker:
+
+    def test_open(self):
+        """ 测试 连续失败达到阈值后熔断,快速失败
+        """
+        breaker = CircuitBreaker('node_a', failure_threshold=2, cooldown=10)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+        with pytest.raises(CircuitOpenException):
+            breaker.before_call()
+
+    def test_success_reset(self):
+        """ 测试 成功后重新计算连续失败次数
+        """
+        breaker = CircuitBreaker('node_a', failure_threshold=2, cooldown=10)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_CLOSED
+
+    def test_half_open(self):
+        """ 测试 冷却时间到后只放行一个探测请求,探测成功则恢复,失败则重新熔断
+        """
+        breaker = CircuitBreaker('node_a', failure_threshold=1, cooldown=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        assert breaker.state == CIRCUIT_HALF_OPEN
+        with pytest.raises(CircuitOpenException):
+            breaker.before_call()
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+
+        time.sleep(0.02)
+        breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CIRCUIT_CLOSED
+        breaker.before_call()
+
+    def test_miss_result(self):
+        """ 测试 视为缓存未命中时命令的结果
+        """
+        assert miss_result(('GET', 'a')) is None
+        assert miss_result(('MGET', 'a', 'b')) == [None, None]
+        assert miss_result(('DEL', 'a', 'b')) == 0
+        assert miss_result(('MSET', 'a', 1)) is False
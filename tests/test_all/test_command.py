@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 13:02'
+
+Usage:
+
+"""
+from distributed_redis_sdk.utils import ConsistencyHash, split_multi_key_command, COMMAND_TABLE, get_command_spec, \
+    is_readonly, command_keys
+
+ring = {'100': 'node_a', '2000000000': 'node_b', '30000': 'node_c'}
+
+
+class TestCommandTable:
+
+    def test_spec(self):
+        """ 测试 命令表中的路由信息
+        """
+        assert COMMAND_TABLE['GET'].routable
+        assert COMMAND_TABLE['get'] is COMMAND_TABLE['GET']
+        assert COMMAND_TABLE['TOUCH'].routable
+        assert not COMMAND_TABLE['CONFIG SET'].routable
+        assert not COMMAND_TABLE['PING'].routable
+        assert COMMAND_TABLE['DEL'] == (True, 1, 'sum', False)
+        assert COMMAND_TABLE['MSET'] == (True, 2, 'all', False)
+
+    def test_readonly(self):
+        """ 测试 只读命令
+        """
+        assert is_readonly(('GET', 'a'))
+        assert is_readonly(('mget', 'a', 'b'))
+        assert is_readonly(('HGETALL', 'a'))
+        assert not is_readonly(('SET', 'a', 1))
+        assert not is_readonly(('DEL', 'a'))
+
+    def test_command_keys(self):
+        """ 测试 命令操作的key
+        """
+        assert command_keys(('SET', 'a', 1)) == ['a']
+        assert command_keys(('DEL', 'a', 'b')) == ['a', 'b']
+        assert command_keys(('MSET', 'a', 1, 'b', 2)) == ['a', 'b']
+        assert command_keys(('HSET', 'h', 'f', 1)) == ['h']
+
+    def test_same_as_introspection(self):
+        """ 测试 命令表与分析命令函数的结果一致
+        """
+        for command_name, spec in COMMAND_TABLE.items():
+            if command_name.isupper():
+                assert get_command_spec(command_name) == spec
+
+
+class TestSplitMultiKeyCommand:
+
+    def test_mget(self):
+        """ 测试 MGET按节点拆分后,结果按key的顺序合并
+        """
+        consistency_hash = ConsistencyHash(ring)
+        keys = [f'key_{i}' for i in range(20)]
+        plan, merge = split_multi_key_command(consistency_hash, ('MGET', *keys), 1, 'list')
+        assert len(plan) > 1
+        node_results = {node_url: [key.upper() for key in node_args[1:]] for node_url, node_args in plan.items()}
+        assert merge(node_results) == [key.upper() for key in keys]
+
+    def test_mset(self):
+        """ 测试 MSET按节点拆分时 key和value一起拆分
+        """
+        consistency_hash = ConsistencyHash(ring)
+        args = ['MSET']
+        for i in range(20):
+            args.extend([f'key_{i}', i])
+        plan, merge = split_multi_key_command(consistency_hash, tuple(args), 2, 'all')
+        for node_url, node_args in plan.items():
+            assert node_args[0] == 'MSET'
+            for key, value in zip(node_args[1::2], node_args[2::2]):
+                assert key == f'key_{value}'
+                assert consistency_hash.get_node(key) == node_url
+        assert merge({node_url: True for node_url in plan}) is True
+
+    def test_sum(self):
+        """ 测试 DEL等命令的结果求和
+        """
+        consistency_hash = ConsistencyHash(ring)
+        keys = [f'key_{i}' for i in range(20)]
+        plan, merge = split_multi_key_command(consistency_hash, ('DEL', *keys), 1, 'sum')
+        assert merge({node_url: len(node_args) - 1 for node_url, node_args in plan.items()}) == 20
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 10:40'
+
+Usage:
+
+"""
+from zlib import crc32
+
+from distributed_redis_sdk.utils import ConsistencyHash, SlotConsistencyHash, FailoverConsistencyHash, \
+    JumpConsistencyHash, RendezvousConsistencyHash, make_consistency_hash
+
+ring = {'100': 'node_a', '2000000000': 'node_b', '30000': 'node_c'}
+
+
+class TestConsistencyHash:
+
+    def test_numeric_order(self):
+        """ 测试 虚拟节点按数值排序(而不是按字符串排序)
+        """
+        consistency_hash = ConsistencyHash(ring)
+        assert consistency_hash.sorted_keys == [100, 30000, 2000000000]
+        assert consistency_hash.nodes == ['node_a', 'node_c', 'node_b']
+
+    def test_get_node(self):
+        """ 测试 顺时针找到第一个虚拟节点,超过最大值时回到环的起点
+        """
+        consistency_hash = ConsistencyHash(ring)
+        assert consistency_hash.get_index(99) == 0
+        assert consistency_hash.get_index(100) == 1
+        assert consistency_hash.get_index(2000000000) == 0
+        keyhash = crc32(b'test')
+        if keyhash < 100 or keyhash >= 2000000000:
+            expected = 'node_a'
+        elif keyhash < 30000:
+            expected = 'node_c'
+        else:
+            expected = 'node_b'
+        assert consistency_hash.get_node('test') == expected
+
+    def test_locate_many(self):
+        """ 测试 批量定位,分组结果与逐个定位一致并保持顺序
+        """
+        consistency_hash = ConsistencyHash(ring)
+        keys = [f'key_{i}' for i in range(50)]
+        groups = consistency_hash.locate_many(keys)
+        assert sorted(key for group in groups.values() for key in group) == sorted(keys)
+        for node, group in groups.items():
+            assert all(consistency_hash.get_node(key) == node for key in group)
+            assert group == [key for key in keys if key in group]
+
+    def test_iter_nodes(self):
+        """ 测试 从key所在节点开始顺时针获取不重复的真实节点
+        """
+        consistency_hash = ConsistencyHash(dict(ring, **{'50000': 'node_a'}))
+        nodes = list(consistency_hash.iter_nodes('test'))
+        assert nodes[0] == consistency_hash.get_node('test')
+        assert sorted(nodes) == ['node_a', 'node_b', 'node_c']
+
+    def test_get_nodes(self):
+        """ 测试 获取key的多个副本所在的节点
+        """
+        consistency_hash = ConsistencyHash(ring)
+        nodes = list(consistency_hash.iter_nodes('test'))
+        assert consistency_hash.get_nodes('test', 1) == nodes[:1]
+        assert consistency_hash.get_nodes('test', 2) == nodes[:2]
+        assert consistency_hash.get_nodes('test', 10) == nodes
+
+    def test_get_bounded_nodes(self):
+        """ 测试 有界负载:key所在节点过载时溢出到后继节点,候选节点不变
+        """
+        consistency_hash = ConsistencyHash(ring)
+        nodes = consistency_hash.get_nodes('test', 3)
+        assert consistency_hash.get_bounded_nodes('test', {}, 0.25) == nodes
+        loads = {nodes[0]: 100, nodes[1]: 10, nodes[2]: 10}
+        assert consistency_hash.get_bounded_nodes('test', loads, 0.25) == [nodes[1], nodes[0], nodes[2]]
+        assert consistency_hash.get_bounded_nodes('test', loads, 0.25, max_spill=0) == nodes[:1]
+        assert consistency_hash.get_bounded_nodes('test', loads, 0.25, min_capacity=200) == nodes
+        # 所有候选节点都过载时使用key所在的节点
+        loads = {nodes[0]: 100, nodes[1]: 100, nodes[2]: 1}
+        assert consistency_hash.get_bounded_nodes('test', loads, 0.25, max_spill=1) == nodes[:2]
+
+
+class TestJumpConsistencyHash:
+
+    def test_jump(self):
+        """ 测试 增加桶时key只会迁移到新增的桶
+        """
+        for i in range(1000):
+            keyhash = crc32(f'key_{i}'.encode())
+            for buckets in range(1, 20):
+                bucket = JumpConsistencyHash.jump(keyhash, buckets)
+                assert 0 <= bucket < buckets
+                assert JumpConsistencyHash.jump(keyhash, buckets + 1) in (bucket, buckets)
+
+    def test_get_node(self):
+        """ 测试 定位节点,以及依次获取其他节点
+        """
+        consistency_hash = JumpConsistencyHash(ring)
+        keys = [f'key_{i}' for i in range(300)]
+        for key in keys:
+            nodes = list(consistency_hash.iter_nodes(key))
+            assert nodes[0] == consistency_hash.get_node(key)
+            assert sorted(nodes) == ['node_a', 'node_b', 'node_c']
+        groups = consistency_hash.locate_many(keys)
+        assert sorted(groups) == ['node_a', 'node_b', 'node_c']
+        for node, group in groups.items():
+            assert all(consistency_hash.get_node(key) == node for key in group)
+
+
+class TestRendezvousConsistencyHash:
+
+    def test_remove_node(self):
+        """ 测试 删除节点时只迁移此节点上的key
+        """
+        consistency_hash = RendezvousConsistencyHash(ring)
+        removed_hash = RendezvousConsistencyHash({k: v for k, v in ring.items() if v != 'node_b'})
+        for i in range(300):
+            key = f'key_{i}'
+            node = consistency_hash.get_node(key)
+            if node != 'node_b':
+                assert removed_hash.get_node(key) == node
+            else:
+                assert removed_hash.get_node(key) == list(consistency_hash.iter_nodes(key))[1]
+
+    def test_make_consistency_hash(self):
+        """ 测试 根据配置生成一致性hash对象
+        """
+        assert type(make_consistency_hash(ring)) is ConsistencyHash
+        assert isinstance(make_consistency_hash(ring, slots=1024), SlotConsistencyHash)
+        assert isinstance(make_consistency_hash(ring, 'jump', 'murmur3'), JumpConsistencyHash)
+        assert isinstance(make_consistency_hash(ring, 'rendezvous', slots=1024), RendezvousConsistencyHash)
+        assert make_consistency_hash(ring, hasher='fnv1a').hash_key('test') != make_consistency_hash(ring).hash_key('test')
+
+
+class TestFailoverConsistencyHash:
+
+    def test_failover(self):
+        """ 测试 不可用节点上的key定位到顺时针方向的下一个可用节点,其他key不变
+        """
+        consistency_hash = ConsistencyHash(ring)
+        failover_hash = FailoverConsistencyHash(consistency_hash, lambda node: node != 'node_a')
+        keys = [f'key_{i}' for i in range(200)]
+        for key in keys:
+            nodes = [node for node in consistency_hash.iter_nodes(key) if node != 'node_a']
+            assert failover_hash.get_node(key) == nodes[0]
+        groups = failover_hash.locate_many(keys)
+        assert 'node_a' not in groups
+        for node, group in groups.items():
+            assert all(failover_hash.get_node(key) == node for key in group)
+            assert group == [key for key in keys if key in group]
+        assert failover_hash.ring is consistency_hash.ring
+
+
+class TestSlotConsistencyHash:
+
+    def test_slot_table(self):
+        """ 测试 槽位表大小固定,存储的是真实节点下标
+        """
+        slot_hash = SlotConsistencyHash(ring, 1024)
+        assert len(slot_hash.slot_table) == 1024
+        assert slot_hash.node_urls == ['node_a', 'node_b', 'node_c']
+        assert set(slot_hash.slot_table) <= {0, 1, 2}
+
+    def test_same_as_ring(self):
+        """ 测试 不跨越虚拟节点边界的槽位,定位结果与hash环一致
+        """
+        consistency_hash = ConsistencyHash(ring)
+        slot_hash = SlotConsistencyHash(ring)
+        keys = [f'key_{i}' for i in range(1000)]
+        same = sum(slot_hash.get_node(key) == consistency_hash.get_node(key) for key in keys)
+        assert same >= 990
+        groups = slot_hash.locate_many(keys)
+        for node, group in groups.items():
+            assert all(slot_hash.get_node(key) == node for key in group)
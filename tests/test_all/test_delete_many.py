@@ -25,3 +25,9 @@ class TestDeleteMany(TestBase):
         client.get('api/cache_set/cache_delete_b/1/1/0/0')
         get_result = client.get(f'api/delete_many?keys=["cache_delete_b"]&use_prefix=0')
         self.check_result(get_result, b'1')
+
+    def test_replicated(self, client):
+        """ 测试 有副本的key删除所有副本节点上的数据
+        """
+        get_result = client.get('api/delete_many/replicated/cache_delete_c')
+        self.check_result(get_result, b'[1, [null, null]]')
@@ -24,3 +24,13 @@ class TestGetMany(TestBase):
             assert False
         except Exception as _:
             assert True
+
+    def test_order(self, client):
+        """
+        测试 多个节点上的key按输入顺序返回
+        :param client:
+        :return:
+        """
+        client.get('api/set_many?mapping={"get_many_a":1,"get_many_b":2,"get_many_c":3}&timeout=10&use_prefix=0')
+        get_result = client.get('api/get_many?keys=["get_many_c","get_many_x","get_many_a","get_many_b"]&use_prefix=0')
+        self.check_result(get_result, b'[3, null, 1, 2]')
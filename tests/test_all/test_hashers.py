@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 18:20'
+
+Usage:
+
+"""
+from zlib import crc32
+
+import pytest
+
+from distributed_redis_sdk.utils import get_hasher, fnv1a_hash, murmur3_hash, blake2b_hash, HASHERS
+
+
+class TestHashers:
+
+    def test_default(self):
+        """ 测试 默认使用crc32,与原来的定位结果相同
+        """
+        assert get_hasher() is get_hasher('crc32')
+        assert get_hasher()(b'test') == abs(crc32(b'test'))
+
+    def test_vectors(self):
+        """ 测试 hash函数的结果与标准实现相同
+        """
+        assert fnv1a_hash(b'') == 0x811C9DC5
+        assert fnv1a_hash(b'a') == 0xE40C292C
+        assert murmur3_hash(b'') == 0
+        assert murmur3_hash(b'test') == 0xBA6BD213
+        assert murmur3_hash(b'Hello, world!') == 0xC0363E43
+
+    def test_range(self):
+        """ 测试 所有hash函数的结果为32位无符号整数
+        """
+        for hasher in HASHERS.values():
+            for i in range(100):
+                assert 0 <= hasher(f'key_{i}'.encode()) < 2 ** 32
+        assert blake2b_hash(b'test') != blake2b_hash(b'test1')
+
+    def test_invalid(self):
+        """ 测试 不支持的hash函数名
+        """
+        with pytest.raises(ValueError):
+            get_hasher('md5')
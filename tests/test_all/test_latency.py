@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 16:40'
+
+Usage:
+
+"""
+from distributed_redis_sdk.utils import LatencyTracker
+
+
+class TestLatencyTracker:
+
+    def test_percentile(self):
+        """ 测试 百分位延迟
+        """
+        tracker = LatencyTracker(min_samples=10, refresh_every=1)
+        for i in range(1, 101):
+            tracker.record('a', i / 1000)
+        assert tracker.percentile('a', 95) == 0.096
+        assert tracker.percentile('a', 50) == 0.051
+        assert tracker.percentile('b', 95) is None
+
+    def test_window(self):
+        """ 测试 只统计最近的请求
+        """
+        tracker = LatencyTracker(window=10, min_samples=10, refresh_every=1)
+        for _ in range(10):
+            tracker.record('a', 1)
+        for _ in range(10):
+            tracker.record('a', 0.001)
+        assert tracker.percentile('a', 99) == 0.001
+
+    def test_hedge_delay(self):
+        """ 测试 样本不足时使用等待时间下限
+        """
+        tracker = LatencyTracker(min_samples=10)
+        tracker.record('a', 0.5)
+        assert tracker.hedge_delay('a', 95, 0.005) == 0.005
+        for _ in range(10):
+            tracker.record('a', 0.5)
+        assert tracker.hedge_delay('a', 95, 0.005) == 0.5
+
+    def test_sync_nodes(self):
+        """ 测试 删除已经移除节点的统计
+        """
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record('a', 0.1)
+        tracker.record('b', 0.1)
+        tracker.sync_nodes(['a'])
+        assert tracker.percentile('a', 95) == 0.1
+        assert tracker.percentile('b', 95) is None
@@ -22,3 +22,40 @@ class TestMemoize(TestBase):
         # 睡眠1.3s后 缓存消失
         time.sleep(1.3)
         self.check_un_equal(get_result, client.get('api/memoize/1/2').data)
+
+    def test_async(self, client):
+        """ 测试 异步函数的缓存
+        """
+        get_result = client.get('api/memoize_async/1/2')
+        self.check_result(get_result, client.get('api/memoize_async/1/2').data)
+        # 睡眠1.3s后 缓存消失
+        time.sleep(1.3)
+        self.check_un_equal(get_result, client.get('api/memoize_async/1/2').data)
+
+    def test_reset(self, client):
+        """ 测试 重置版本号后 缓存立即失效(版本号缓存在进程内,重置时清除)
+        """
+        get_result = client.get('api/memoize/3/4')
+        self.check_result(get_result, client.get('api/memoize/3/4').data)
+        client.get('api/memoize/reset')
+        self.check_un_equal(get_result, client.get('api/memoize/3/4').data)
+
+    def test_stale(self, client):
+        """ 测试 开启重新计算锁时,软过期后其他进程持有锁,返回旧数据;没有进程持有锁时重新计算
+        """
+        get_result = client.get('api/memoize_stale/5/6')
+        self.check_result(get_result, client.get('api/memoize_stale/5/6').data)
+        # 睡眠1.3s后 软过期,旧数据仍在redis中
+        time.sleep(1.3)
+        client.get('api/memoize_stale/lock/5/6')
+        self.check_result(get_result, client.get('api/memoize_stale/5/6').data)
+
+        get_result = client.get('api/memoize_stale/7/8')
+        time.sleep(1.3)
+        self.check_un_equal(get_result, client.get('api/memoize_stale/7/8').data)
+
+    def test_empty_replica(self, client):
+        """ 测试 只读副本没有数据(复制延迟)时,版本号和缓存从主节点读取,仍然可以命中
+        """
+        first, second = client.get('api/memoize/empty_replica/9/10').json
+        assert first == second
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 19:10'
+
+Usage:
+
+"""
+import time
+
+from distributed_redis_sdk.utils import NearCache, near_key
+
+
+class TestNearCache:
+
+    def test_get_set(self):
+        """ 测试 命中与未命中的统计
+        """
+        cache = NearCache(10)
+        assert cache.get('a') == (False, None)
+        cache.set('a', {'x': 1}, 10)
+        assert cache.get('a') == (True, {'x': 1})
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'bytes': 10}
+
+    def test_lru_entries(self):
+        """ 测试 超过条目数量时淘汰最久未访问的key
+        """
+        cache = NearCache(2)
+        cache.set('a', 1, 1)
+        cache.set('b', 2, 1)
+        cache.get('a')
+        cache.set('c', 3, 1)
+        assert cache.get('b') == (False, None)
+        assert cache.get('a') == (True, 1)
+        assert cache.evictions == 1
+
+    def test_max_bytes(self):
+        """ 测试 按总字节数淘汰,超过上限的单个对象不缓存
+        """
+        cache = NearCache(None, max_bytes=100)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        assert cache.get('a') == (False, None)
+        assert cache.bytes == 60
+        cache.set('c', 3, 101)
+        assert cache.get('c') == (False, None)
+
+    def test_ttl(self):
+        """ 测试 本地过期时间不超过redis中的剩余过期时间
+        """
+        cache = NearCache(10, ttl=5)
+        cache.set('a', 1, 1, remote_ttl=0.05)
+        cache.set('b', 2, 1, remote_ttl=None)
+        cache.set('c', 3, 1, remote_ttl=0)
+        time.sleep(0.06)
+        assert cache.get('a') == (False, None)
+        assert cache.get('b') == (True, 2)
+        assert cache.get('c') == (False, None)
+        assert cache.bytes == 1
+
+    def test_token(self):
+        """ 测试 读取redis期间有清除操作时不写入
+        """
+        cache = NearCache(10)
+        token = cache.token()
+        cache.delete_many(['other'])
+        cache.set('a', 1, 1, token=token)
+        assert cache.get('a') == (False, None)
+        cache.set('a', 1, 1, token=cache.token())
+        assert cache.get('a') == (True, 1)
+
+    def test_invalidate_message(self):
+        """ 测试 处理其他进程广播的清除消息
+        """
+        cache = NearCache(10)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key, 1)
+        cache.invalidate_message(b'["a", "b"]')
+        assert cache.stats()['entries'] == 1
+        cache.invalidate_message(b'*')
+        assert cache.stats()['entries'] == 0
+        assert cache.bytes == 0
+
+    def test_near_key(self):
+        """ 测试 本地缓存中的key统一为str
+        """
+        assert near_key(b'a') == 'a'
+        assert near_key(1) == '1'
+        assert near_key('a') == 'a'
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 17:30'
+
+Usage:
+
+"""
+import time
+
+from distributed_redis_sdk.utils import NodeLoadTracker
+
+
+class TestNodeLoadTracker:
+
+    def test_loads(self):
+        """ 测试 统计节点最近的请求次数
+        """
+        tracker = NodeLoadTracker(window=60)
+        for _ in range(3):
+            tracker.record('a')
+        tracker.record('b')
+        assert tracker.loads() == {'a': 3, 'b': 1}
+
+    def test_window(self):
+        """ 测试 负载为最近两个窗口的请求次数之和,更早的统计过期
+        """
+        tracker = NodeLoadTracker(window=0.05)
+        tracker.record('a')
+        time.sleep(0.06)
+        tracker.record('a')
+        assert tracker.loads() == {'a': 2}
+        time.sleep(0.11)
+        assert tracker.loads() == {}
+
+    def test_sync_nodes(self):
+        """ 测试 删除已经移除节点的统计
+        """
+        tracker = NodeLoadTracker(window=60)
+        tracker.record('a')
+        tracker.record('b')
+        tracker.sync_nodes(['a'])
+        assert tracker.loads() == {'a': 1}
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 12:20'
+
+Usage:
+
+"""
+from tests import TestBase
+
+
+class TestPipeline(TestBase):
+
+    def test_normal(self, client):
+        """ 测试 结果按命令调用顺序返回
+        """
+        get_result = client.get('/api/pipeline/pipeline_test/1')
+        self.check_result(get_result, b'[true, "1", 1, null]')
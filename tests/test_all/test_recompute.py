@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 23:40'
+
+Usage:
+重新计算锁(recompute_lock)的测试,多个sdk对象相当于多个进程,共用节点上的数据和锁
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from distributed_redis_sdk import DistributedRedisSdk
+
+CONFIG = dict(DIS_MANAGER_REDIS_HOST='127.0.0.1', DIS_MANAGER_REDIS_PORT='6379', DIS_MANAGER_REDIS_DB='13',
+              DIS_CACHE_PREFIX='RECOMPUTE:')
+
+
+def make_sdk(**config):
+    """
+    创建sdk对象,与其他测试使用相同的 manager redis
+    """
+    app = Flask(__name__)
+    app.config.update(CONFIG, **config)
+    return DistributedRedisSdk(app)
+
+
+def load(a, b):
+    """
+    被装饰的函数,多个sdk对象装饰后缓存key相同
+    """
+    return a + b + random.random()
+
+
+class TestRecompute:
+
+    def test_toggle(self):
+        """ 测试 开启重新计算锁时写入的缓存(带软过期时间),关闭后仍然读取到原来的对象;反之亦然
+        """
+        writer = make_sdk()
+        # 读取的进程开启本地缓存,本地缓存中也是还原后的对象
+        reader = make_sdk(DIS_NEAR_CACHE_MAX_ENTRIES=100)
+        write = writer.memoize(10)(load)
+        read = reader.memoize(10)(load)
+        # 重置版本号,不读取之前运行时写入的缓存(软过期后仍保留 DIS_STALE_TTL)
+        write.delete_memoized()
+
+        writer.recompute_lock_enabled = True
+        value = write(1, 2)
+        assert isinstance(value, float)
+        assert read(1, 2) == value
+        assert read(1, 2) == value
+
+        writer.recompute_lock_enabled = False
+        reader.recompute_lock_enabled = True
+        value = write(3, 4)
+        assert read(3, 4) == value
+
+    def test_stale(self):
+        """ 测试 软过期后两个进程并发调用,只有获取到锁的调用重新计算,其他调用返回旧数据
+        """
+        calls = []
+
+        def slow(a):
+            calls.append(a)
+            time.sleep(0.2)
+            return len(calls)
+
+        funcs = [make_sdk().memoize(1, recompute_lock=True)(slow), make_sdk().memoize(1, recompute_lock=True)(slow)]
+        funcs[0].delete_memoized()
+        assert funcs[0](1) == 1
+        # 睡眠1.1s后 软过期,旧数据仍在redis中
+        time.sleep(1.1)
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda i: funcs[i % 2](1), range(8)))
+        assert len(calls) == 2
+        assert set(results) == {1, 2}
+        assert funcs[1](1) == 2
+
+    def test_hold_lock(self):
+        """ 测试 其他进程持有锁时返回旧数据,不重新计算;锁释放后重新计算一次
+        """
+        calls = []
+
+        def count(a):
+            calls.append(a)
+            return len(calls)
+
+        sdk = make_sdk()
+        cached = sdk.memoize(1, recompute_lock=True)(count)
+        cached.delete_memoized()
+        assert cached(2) == 1
+        time.sleep(1.1)
+        key = sdk._use_prefix(cached.make_cache_key(cached.uncached, 2), True)
+        token = sdk._recompute_lock_acquire(key)
+        assert token is not None
+        assert cached(2) == 1
+        assert len(calls) == 1
+
+        sdk._recompute_lock_release(key, token)
+        assert cached(2) == 2
+        assert cached(2) == 2
+        assert len(calls) == 2
+
+    def test_poll(self):
+        """ 测试 没有旧数据并且其他进程持有锁时,轮询等待其他进程写入的新数据,不重新计算
+        """
+        calls = []
+
+        def count(a):
+            calls.append(a)
+            return len(calls)
+
+        sdk, other = make_sdk(), make_sdk()
+        cached = sdk.memoize(10, recompute_lock=True)(count)
+        cached.delete_memoized()
+        key = sdk._use_prefix(cached.make_cache_key(cached.uncached, 3), True)
+        token = other._recompute_lock_acquire(key)
+
+        def compute():
+            # 持有锁的进程计算完成后写入缓存并释放锁
+            time.sleep(0.3)
+            other.cache_set(key, 'other', 10, soft_timeout=10)
+            other._recompute_lock_release(key, token)
+
+        threading.Thread(target=compute).start()
+        start = time.monotonic()
+        assert cached(3) == 'other'
+        assert time.monotonic() - start >= 0.3
+        assert not calls
+
+    def test_takeover(self):
+        """ 测试 没有旧数据时等待:持有锁的进程没有写入就释放了锁,获取到锁后自己计算;一直没有释放时超时后自己计算
+        """
+        calls = []
+
+        def count(a):
+            calls.append(a)
+            return len(calls)
+
+        sdk, other = make_sdk(DIS_RECOMPUTE_WAIT=0.5), make_sdk()
+        cached = sdk.memoize(10, recompute_lock=True)(count)
+        cached.delete_memoized()
+        key = sdk._use_prefix(cached.make_cache_key(cached.uncached, 4), True)
+        token = other._recompute_lock_acquire(key)
+        timer = threading.Timer(0.2, other._recompute_lock_release, (key, token))
+        timer.start()
+        assert cached(4) == 1
+        timer.join()
+        # 锁已由自己释放
+        assert other._recompute_lock_acquire(key) is not None
+
+        key = sdk._use_prefix(cached.make_cache_key(cached.uncached, 5), True)
+        assert other._recompute_lock_acquire(key) is not None
+        start = time.monotonic()
+        assert cached(5) == 2
+        assert time.monotonic() - start >= 0.5
+        assert cached(5) == 2
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 15:20'
+
+Usage:
+
+"""
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError, ResponseError
+
+from distributed_redis_sdk.utils import RetryPolicy
+
+
+class TestRetryPolicy:
+
+    def test_retry_connection_error(self):
+        """ 测试 连接错误重试到成功
+        """
+        calls = []
+
+        @RetryPolicy(max_attempts=3, base_delay=0)
+        def execute():
+            calls.append(1)
+            if len(calls) < 3:
+                raise RedisConnectionError
+            return 'ok'
+
+        assert execute() == 'ok'
+        assert len(calls) == 3
+
+    def test_not_retry_response_error(self):
+        """ 测试 命令错误不重试
+        """
+        calls = []
+
+        @RetryPolicy(max_attempts=3, base_delay=0)
+        def execute():
+            calls.append(1)
+            raise ResponseError
+
+        with pytest.raises(ResponseError):
+            execute()
+        assert len(calls) == 1
+
+    def test_deadline(self):
+        """ 测试 等待后会超过截止时间时不再重试
+        """
+        calls = []
+
+        @RetryPolicy(max_attempts=10, base_delay=1, deadline=0.5)
+        def execute():
+            calls.append(1)
+            raise RedisConnectionError
+
+        with pytest.raises(RedisConnectionError):
+            execute()
+        assert len(calls) == 1
+
+    def test_nested(self):
+        """ 测试 嵌套调用只由最外层重试
+        """
+        policy = RetryPolicy(max_attempts=3, base_delay=0)
+        calls = []
+
+        @policy
+        def inner():
+            calls.append(1)
+            raise RedisConnectionError
+
+        @policy
+        def outer():
+            return inner()
+
+        with pytest.raises(RedisConnectionError):
+            outer()
+        assert len(calls) == 3
+
+    def test_delay(self):
+        """ 测试 指数退避的等待时间不超过上限
+        """
+        policy = RetryPolicy(base_delay=0.1, max_delay=0.3, jitter=0)
+        assert [policy.get_delay(i) for i in range(1, 5)] == [0.1, 0.2, 0.3, 0.3]
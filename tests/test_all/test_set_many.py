@@ -18,7 +18,7 @@ class TestSetMany(TestBase):
         """ 测试 添加超时时间,prefix
         """
         resp = client.get('api/set_many?mapping={"set_many_a":1}&timeout=1&use_prefix=1')
-        assert resp.data == b'true'
+        assert resp.data == b'{"set_many_a": true}'
         get_result = client.get(f'api/get_many?keys=["set_many_a"]&use_prefix=1')
         self.check_result(get_result, b'[1]')
         # 睡眠后再获取
@@ -47,6 +47,19 @@ class TestSetMany(TestBase):
         get_result = client.get(f'api/get_many?keys=["set_many_c"]&use_prefix=0')
         self.check_result(get_result, b'[1]')
 
+    def test_timeouts(self, client):
+        """
+        测试每个key单独的超时参数
+        :param client:
+        :return:
+        """
+        resp = client.get('api/set_many?mapping={"set_many_d":1,"set_many_e":2}&timeout=0&use_prefix=0'
+                          '&timeouts={"set_many_d":1}')
+        assert resp.data == b'{"set_many_d": true, "set_many_e": true}'
+        time.sleep(1.5)
+        get_result = client.get(f'api/get_many?keys=["set_many_d","set_many_e"]&use_prefix=0')
+        self.check_result(get_result, b'[null, 2]')
+
     def test_params(self, client):
         """
         测试参数 格式错误
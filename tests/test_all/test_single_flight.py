@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 21:40'
+
+Usage:
+
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from distributed_redis_sdk.utils import SingleFlight
+
+
+def run_threads(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestSingleFlight:
+
+    def test_coalesce(self):
+        """ 测试 同一个key并发的调用只执行一次,其他调用使用它的结果
+        """
+        single_flight = SingleFlight()
+        calls = []
+        results = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        run_threads(10, lambda: results.append(single_flight.do('a', load)))
+        assert len(calls) == 1
+        assert results == ['value'] * 10
+        assert single_flight.stats() == {'leaders': 1, 'coalesced': 9, 'timeouts': 0, 'in_flight': 0}
+        # 执行结束后不再合并
+        assert single_flight.do('a', load) == 'value'
+        assert len(calls) == 2
+
+    def test_timeout(self):
+        """ 测试 等待超时后自己执行
+        """
+        single_flight = SingleFlight(timeout=0.05)
+        calls = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.3)
+            return len(calls)
+
+        run_threads(3, lambda: single_flight.do('a', load))
+        assert len(calls) == 3
+        assert single_flight.stats()['timeouts'] == 2
+
+    def test_error(self):
+        """ 测试 执行的调用抛出的异常,等待的调用也抛出
+        """
+        single_flight = SingleFlight()
+        errors = []
+
+        def load():
+            time.sleep(0.2)
+            raise ValueError('db error')
+
+        def target():
+            with pytest.raises(ValueError):
+                single_flight.do('a', load)
+            errors.append(1)
+
+        run_threads(4, target)
+        assert len(errors) == 4
+        assert single_flight.stats()['leaders'] == 1
+
+    def test_async(self):
+        """ 测试 同一个事件循环中的协程合并
+        """
+        single_flight = SingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return 'value'
+
+        async def main():
+            return await asyncio.gather(*[single_flight.do_async('a', load) for _ in range(5)])
+
+        assert asyncio.run(main()) == ['value'] * 5
+        assert len(calls) == 1
+        assert single_flight.stats() == {'leaders': 1, 'coalesced': 4, 'timeouts': 0, 'in_flight': 0}
+
+    def test_base_exception(self):
+        """ 测试 执行的调用被 BaseException 中断时,等待的调用自己执行
+        """
+        single_flight = SingleFlight()
+        results = []
+
+        def interrupted():
+            time.sleep(0.2)
+            raise KeyboardInterrupt
+
+        def leader():
+            with pytest.raises(KeyboardInterrupt):
+                single_flight.do('a', interrupted)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        time.sleep(0.05)
+        results.append(single_flight.do('a', lambda: 'value'))
+        thread.join()
+        assert results == ['value']
+        assert single_flight.stats()['coalesced'] == 0
+
+    def test_async_error(self):
+        """ 测试 执行的协程抛出异常时,等待的协程也抛出,并与同步版一样计为被合并
+        """
+        single_flight = SingleFlight()
+
+        async def load():
+            await asyncio.sleep(0.1)
+            raise ValueError('db error')
+
+        async def main():
+            return await asyncio.gather(*[single_flight.do_async('a', load) for _ in range(3)], return_exceptions=True)
+
+        assert all(isinstance(result, ValueError) for result in asyncio.run(main()))
+        assert single_flight.stats() == {'leaders': 1, 'coalesced': 2, 'timeouts': 0, 'in_flight': 0}
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+(C) Rgc <2020956572@qq.com>
+All rights reserved
+create time '2026/10/18 21:10'
+
+Usage:
+
+"""
+from distributed_redis_sdk.base_redis import BaseRedis
+from distributed_redis_sdk.utils import function_namespace, compile_function_namespace, compile_kwargs_to_args, \
+    dump_object, load_object, load_entry, load_entry_object
+
+
+def func_0():
+    pass
+
+
+def func_3(a, b, c=3):
+    pass
+
+
+def func_10(a, b, c, d, e, f=6, g=0, h='', i=9, j=None, **kwargs):
+    pass
+
+
+class Service:
+
+    def method(self, a, b=2):
+        pass
+
+    @classmethod
+    def class_method(cls, a):
+        pass
+
+    def __repr__(self):
+        return 'Service<1>'
+
+
+def kwargs_to_args(f, *args, **kwargs):
+    """
+    未预先分析的参数转换结果
+    """
+    return BaseRedis._memoize_kwargs_to_args(None, f, *args, **kwargs)  # pylint:disable=protected-access
+
+
+class TestTransform:
+
+    def test_compile_kwargs_to_args(self):
+        """ 测试 预先分析的参数转换结果与原来相同
+        """
+        calls = [
+            (func_0, (), {}),
+            (func_3, (1, 2), {}),
+            (func_3, (1, 2, 4), {}),
+            (func_3, (1,), {'c': 5, 'b': 2}),
+            (func_3, (), {'a': 1, 'b': 2}),
+            (func_10, tuple(range(10)), {}),
+            (func_10, tuple(range(12)), {}),
+            (func_10, (1, 2, 3, 4, 5), {}),
+            (func_10, (1, 2, 3), {'j': 1, 'd': 4, 'e': 5, 'x': 1, 'b_': 2}),
+            (Service.method, (Service(), 1), {}),
+            (Service.method, (Service(),), {'b': 3, 'a': 1}),
+        ]
+        for f, args, kwargs in calls:
+            assert compile_kwargs_to_args(f)(args, kwargs) == kwargs_to_args(f, *args, **kwargs)
+
+    def test_compile_function_namespace(self):
+        """ 测试 预先分析的命名空间与原来相同
+        """
+        calls = [
+            (func_0, None),
+            (func_3, (1, 2)),
+            (Service.method, (Service(), 1)),
+            (Service.method, None),
+            (Service().method, (1,)),
+            (Service.class_method, (1,)),
+        ]
+        for f, args in calls:
+            assert compile_function_namespace(f)(args) == function_namespace(f, args)
+
+    def test_soft_expiry(self):
+        """ 测试 带软过期时间的数据,load_entry 同时获取软过期时间;load_object 不处理软过期时间,load_entry_object 忽略软过期时间
+        """
+        for value in (1, None, 'a', {'a': [1, 2]}, b'~1'):
+            dump = dump_object(value, 1700000000.5)
+            assert load_entry(dump) == (value, 1700000000.5)
+            assert load_entry_object(dump) == value
+            assert load_entry_object(dump_object(value)) == value
+            assert load_entry(dump_object(value)) == (value, None)
+        assert load_entry(None) == (None, None)
+        # 以 ~ 开头的原始数据(没有经过 dump_object)原样返回
+        assert load_object(b'~hello world') == b'~hello world'